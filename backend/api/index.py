@@ -4,11 +4,7 @@ import os
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# Load environment variables
-from dotenv import load_dotenv
-load_dotenv()
-
-# Now import the app
+# Import the app (main loads a local .env itself when one exists)
 from main import app
 
 # Vercel handler
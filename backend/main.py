@@ -1,31 +1,95 @@
-from fastapi import FastAPI, HTTPException, status
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from openai import OpenAI
-from dotenv import load_dotenv
-from datetime import datetime
-from typing import Optional
+from fastapi.responses import FileResponse, ORJSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
+from datetime import date, datetime
+from typing import Dict, Optional, Tuple, Union
+import asyncio
 import os
-import json
-import urllib.parse
+import orjson
+import zlib
 
-# Load .env variables FIRST
-load_dotenv()
+# Load .env variables FIRST (only when a local .env exists - serverless
+# deployments get their variables from the platform and skip the import)
+_ENV_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")
+if os.path.exists(_ENV_FILE):
+    from dotenv import load_dotenv
+    load_dotenv(_ENV_FILE)
 
 # Import expiry prediction modules
-from utils.predict_expiry import predict_expiry, calculate_days_left
+from utils.predict_expiry import predict_expiry, calculate_days_left, safe_expiry_offsets
+from utils.advice_templates import ADVICE_LLM_THRESHOLD_DAYS, template_advice
+from services.admission import AdmissionMiddleware
+from services.profiler import ProfilingMiddleware, list_profiles, profile_path, profile_summary, profiler_settings
 from services.openrouter_expiry import generate_advice_for_item
-from models.food_item import FoodItemCreate, FoodItem, FoodItemWithPrediction
+from services.openrouter_recipes import (
+    RECIPE_SYSTEM_PROMPT,
+    STRUCTURED_SYSTEM_PROMPT,
+    build_query_prompt,
+    build_structured_prompt,
+    generate_recipe,
+    generate_recipes_concurrently,
+)
+from services.meal_planner import fill_slots, plan_meals
+from services.recipe_corpus import corpus_by_id
+from services.recipe_store import recipe_store
+from services.recipe_warmer import WARM_INTERVAL_SECONDS, recipe_warmer
+from services.shopping_list import aggregate_ingredients
+from models.food_item import FoodItemCreate, FoodItemUpdate, FoodItem, FoodItemWithPrediction
+
+# Import user models for accounts and preferences
+from models.user import Token, UserCreate, UserInDB, UserLogin, UserPreferences, UserResponse
+from fastapi.security import HTTPAuthorizationCredentials
+from utils.auth import (
+    create_access_token,
+    credentials_exception,
+    decode_access_token_cached,
+    get_current_user_email,
+    get_optional_user_email,
+    get_password_hash_async,
+    require_admin,
+    revoke_token,
+    security,
+    verify_password_async,
+)
+
+# Registered accounts (in-memory like the inventories): email -> user
+users: Dict[str, UserInDB] = {}
 
-# Import user models for preferences
-from models.user import UserPreferences
+# In-memory storage only (MongoDB completely removed), partitioned per user
+from services.item_archive import ARCHIVE_SWEEP_INTERVAL_HOURS, item_archive
+from services.item_store import DEFAULT_OWNER, EPOCH_ORDINAL, FIELDS, NULL, Derive, InventoryShard, ItemStore, to_epoch_days
+item_store = ItemStore(safe_expiry_offsets)
 
-# In-memory storage only (MongoDB completely removed)
-food_items_db = {}
-item_counter = {"count": 0}
+# Pub/sub hub pushing expiry alerts to connected clients (topic = inventory owner)
+from services.alert_hub import AlertHub, format_sse
+alert_hub = AlertHub()
+
+def background_jobs_enabled() -> bool:
+    """
+    Whether this process runs the background jobs. Read at startup rather than
+    import, since run_backend.py imports the app before forking its workers
+    and enables the jobs in only one of them.
+    """
+    return os.getenv("RUN_BACKGROUND_JOBS", "true").lower() == "true"
+
+# Daily expiry check interval (0 disables the background job)
+EXPIRY_CHECK_INTERVAL_HOURS = float(os.getenv("EXPIRY_CHECK_INTERVAL_HOURS", "24"))
+# Idle alert streams send a comment this often to keep proxies from closing them
+ALERT_HEARTBEAT_SECONDS = float(os.getenv("ALERT_HEARTBEAT_SECONDS", "25"))
+# Largest page served by /api/expiry/items/query
+ITEM_QUERY_MAX_LIMIT = int(os.getenv("ITEM_QUERY_MAX_LIMIT", "200"))
+# Entries accepted per /api/generate-recipes/batch request, and generations run at once
+BATCH_MAX_ENTRIES = int(os.getenv("BATCH_MAX_ENTRIES", "20"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
 
 # Create FastAPI app
-app = FastAPI(title="ChefBuddy Recipe Generator API")
+app = FastAPI(title="ChefBuddy Recipe Generator API", default_response_class=ORJSONResponse)
+
+# Limit and queue LLM-backed requests (added first so CORS headers wrap its 503s)
+app.add_middleware(AdmissionMiddleware)
+# Opt-in cProfile dumps (PROFILE_ENABLED or PUT /api/admin/profiling)
+app.add_middleware(ProfilingMiddleware)
 
 # Enable CORS for frontend
 app.add_middleware(
@@ -34,19 +98,105 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Change-Seq", "Retry-After"],
 )
 
-# OpenRouter client helper function
-def get_openrouter_client():
-    """Get OpenRouter client with API key from environment"""
-    api_key = os.getenv("OPENROUTER_API_KEY")
-    if not api_key:
-        raise HTTPException(status_code=500, detail="OPENROUTER_API_KEY not configured")
-    return OpenAI(
-        api_key=api_key,
-        base_url="https://openrouter.ai/api/v1"
+def get_inventory(email: Optional[str] = Depends(get_optional_user_email)) -> InventoryShard:
+    """Resolve the caller's inventory shard (shared anonymous shard when no token is sent)."""
+    return item_store.shard(email or DEFAULT_OWNER)
+
+def predict_item_expiry(item: dict) -> dict:
+    """Expiry prediction for a stored item (item-specific data when its name is known)."""
+    return predict_expiry(
+        item["category"], 
+        item["purchaseDate"],
+        datetime.fromisoformat(item["manufacturedDate"]) if item.get("manufacturedDate") else None,
+        item_name=item["name"]
     )
 
+def encode_item(item: dict) -> tuple:
+    """
+    Pre-encode the static part of an item response (item + prediction).
+
+    Returns:
+        (JSON bytes without the closing brace, safe expiry datetime) - only
+        daysLeft changes from day to day, so it is appended per request.
+    """
+    prediction = predict_item_expiry(item)
+    body = orjson.dumps({**item, "prediction": prediction})
+    return body[:-1], datetime.fromisoformat(prediction["safeExpiry"])
+
+def render_item(encoded: tuple) -> bytes:
+    """Complete a pre-encoded item with its current daysLeft."""
+    prefix, safe_expiry = encoded
+    return prefix + b',"daysLeft":%d}' % calculate_days_left(safe_expiry)
+
+# Fields selectable with ?fields= on the item endpoints: stored ones plus computed ones
+ITEM_FIELDS = FIELDS + ("prediction", "daysLeft")
+PREDICTION_DATES = ("purchaseDate", "manufacturingDate", "predictedExpiry", "safeExpiry")
+
+def select_item_fields(fields: Optional[str], compact: bool) -> Optional[Tuple[str, ...]]:
+    """
+    Fields requested with ?fields= / ?compact=, or None for the full cached item.
+    Compact mode without a field list returns the stored fields plus daysLeft.
+
+    Raises:
+        HTTPException: 400 for unknown field names
+    """
+    if fields is None:
+        return tuple(field for field in ITEM_FIELDS if field != "prediction") if compact else None
+    selected = tuple(dict.fromkeys(field.strip() for field in fields.split(",") if field.strip()))
+    unknown = [field for field in selected if field not in ITEM_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return selected
+
+def item_variant(fields: Optional[Tuple[str, ...]], compact: bool) -> str:
+    """ETag suffix distinguishing a projection from the full item."""
+    if fields is None:
+        return ""
+    return f"-{zlib.crc32(','.join(fields).encode()):08x}{'c' if compact else ''}"
+
+def derive_item_fields(fields: Tuple[str, ...], compact: bool) -> Optional[Derive]:
+    """Computed fields for a projection; the prediction only runs when it was asked for."""
+    want_prediction = "prediction" in fields
+    want_days_left = "daysLeft" in fields
+    if not (want_prediction or want_days_left):
+        return None
+
+    def derive(view, expiry_day: int) -> dict:
+        extra = {}
+        if want_prediction:
+            prediction = predict_item_expiry(view())
+            if compact:
+                for key in PREDICTION_DATES:
+                    prediction[key] = to_epoch_days(prediction[key])
+            extra["prediction"] = prediction
+        if want_days_left:
+            extra["daysLeft"] = None if expiry_day == NULL else calculate_days_left(
+                datetime.fromordinal(expiry_day + EPOCH_ORDINAL)
+            )
+        return extra
+
+    return derive
+
+def etag_matches(request: Request, etag: Optional[str]) -> bool:
+    """Check a request's If-None-Match header against an ETag."""
+    header = request.headers.get("if-none-match")
+    if not header or etag is None:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so ignore any W/ prefix
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+def cache_headers(etag: str) -> dict:
+    # no-cache makes browsers revalidate with If-None-Match on every poll
+    return {"ETag": etag, "Cache-Control": "no-cache"}
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers(etag))
+
 # ----------------------------
 #      REQUEST MODELS
 # ----------------------------
@@ -64,6 +214,32 @@ class RecipeQuery(BaseModel):
 class MultiRecipeRequest(BaseModel):
     item_ids: list[str]
 
+class MealPlanRequest(BaseModel):
+    dietary_type: str = "None"
+    cuisine_type: str = "None"
+    food_available: str = ""
+    like_eating: str = ""
+    difficulty: str = "None"
+    days: int = Field(default=7, ge=1, le=14)
+    meals_per_day: int = Field(default=3, ge=1, le=4)
+    use_inventory: bool = True
+    use_corpus: bool = True
+    stream: bool = True
+
+class BatchRecipeRequest(BaseModel):
+    entries: list[Union[RecipePreferences, RecipeQuery]] = Field(..., min_length=1, max_length=BATCH_MAX_ENTRIES)
+    stream: bool = False
+
+class ShoppingListRequest(BaseModel):
+    recipes: list[dict] = Field(default_factory=list)
+    corpus_ids: list[int] = Field(default_factory=list)
+    subtract_inventory: bool = True
+
+class ProfilingSettingsUpdate(BaseModel):
+    enabled: Optional[bool] = None
+    sample_rate: Optional[float] = Field(default=None, ge=0, le=1)
+    slow_ms: Optional[float] = Field(default=None, ge=0)
+
 # ----------------------------
 #      RESPONSE MODEL
 # ----------------------------
@@ -85,11 +261,65 @@ async def test_storage():
     """Check storage mode and current data"""
     return {
         "storage_mode": "in-memory",
-        "food_items_count": len(food_items_db),
+        "food_items_count": item_store.count(),
+        "inventory_shards": len(item_store.shards()),
         "note": "Using in-memory storage - data persists only during server session"
     }
 
 
+# ========================================
+#    AUTH ENDPOINTS (In-Memory)
+# ========================================
+
+@app.post("/api/auth/register", response_model=Token)
+async def register_user(user: UserCreate):
+    """Create an account and return an access token (bcrypt runs off the event loop)."""
+    email = user.email.lower()
+    if email in users:
+        raise HTTPException(status_code=400, detail="Email already registered")
+    hashed_password = await get_password_hash_async(user.password)
+    # Another registration may have finished while this one was hashing
+    if email in users:
+        raise HTTPException(status_code=400, detail="Email already registered")
+    users[email] = UserInDB(
+        email=email,
+        hashed_password=hashed_password,
+        full_name=user.full_name,
+        age=user.age,
+        location=user.location,
+    )
+    return Token(access_token=create_access_token({"sub": email}), token_type="bearer")
+
+
+@app.post("/api/auth/login", response_model=Token)
+async def login_user(credentials: UserLogin):
+    """Exchange email and password for an access token."""
+    user = users.get(credentials.email.lower())
+    if user is None or not await verify_password_async(credentials.password, user.hashed_password):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect email or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return Token(access_token=create_access_token({"sub": user.email}), token_type="bearer")
+
+
+@app.get("/api/auth/me", response_model=UserResponse)
+async def read_current_user(email: str = Depends(get_current_user_email)):
+    """Profile of the account the token belongs to."""
+    user = users.get(email)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return UserResponse(**user.model_dump())
+
+
+@app.post("/api/auth/logout")
+async def logout_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Revoke the caller's token."""
+    revoke_token(credentials.credentials)
+    return {"success": True}
+
+
 # ========================================
 #    PREFERENCES ENDPOINT (No Auth)
 # ========================================
@@ -109,106 +339,226 @@ async def update_user_preferences(preferences: UserPreferences):
 # ========================================
 
 @app.post("/api/expiry/items")
-async def add_food_item(item: FoodItemCreate):
+async def add_food_item(item: FoodItemCreate, inventory: InventoryShard = Depends(get_inventory)):
     """Add a new grocery item to track."""
     try:
         item_dict = item.model_dump()
         item_dict["createdAt"] = datetime.utcnow().isoformat()
         
         # In-memory storage
-        item_counter["count"] += 1
-        item_id = str(item_counter["count"])
-        item_dict["id"] = item_id
-        food_items_db[item_id] = item_dict
+        item = inventory.add(item_dict)
         
-        return {"success": True, "item": item_dict}
+        return {"success": True, "item": item.to_dict()}
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid item: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error adding item: {str(e)}")
 
 
 @app.get("/api/expiry/items")
-async def get_all_items():
-    """Get all grocery items with expiry predictions."""
+async def get_all_items(
+    request: Request,
+    fields: Optional[str] = None,
+    compact: bool = False,
+    inventory: InventoryShard = Depends(get_inventory),
+):
+    """
+    Get all grocery items with expiry predictions.
+    `fields` (comma-separated, e.g. name,daysLeft) and `compact` (dates as
+    epoch days) trim each item; unrequested fields are never computed.
+    """
+    selected = select_item_fields(fields, compact)
     try:
-        items = []
-        
-        # In-memory storage
-        for item_id, item in sorted(food_items_db.items(), key=lambda x: x[1].get("createdAt", ""), reverse=True):
-            # Calculate expiry prediction
-            prediction = predict_expiry(
-                item["category"], 
-                item["purchaseDate"],
-                datetime.fromisoformat(item["manufacturedDate"]) if item.get("manufacturedDate") else None
-            )
-            
-            days_left = calculate_days_left(prediction["safeExpiry"])
-            
-            items.append({
-                **item,
-                "prediction": prediction,
-                "daysLeft": days_left
-            })
-        
-        return items
+        etag = inventory.etag(date.today().toordinal(), item_variant(selected, compact))
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        # Read before listing so delta sync from this seq can only repeat changes, never miss one
+        seq = inventory.version
+
+        if selected is None:
+            # In-memory storage (newest first), assembled from cached item JSON
+            encoded_items = inventory.list_encoded(encode_item)
+            body = b"[" + b",".join(render_item(encoded) for encoded in encoded_items) + b"]"
+        else:
+            body = orjson.dumps(inventory.projected(selected, compact, derive_item_fields(selected, compact)))
+        return Response(
+            content=body,
+            media_type="application/json",
+            headers={**cache_headers(etag), "X-Change-Seq": str(seq)},
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching items: {str(e)}")
 
 
+@app.get("/api/expiry/items/changes")
+async def get_item_changes(since: int = 0, instance: Optional[str] = None, inventory: InventoryShard = Depends(get_inventory)):
+    """
+    Delta sync: changes to the caller's items after sequence number `since`.
+    Adds and updates carry the full current item (clients upsert them);
+    deletes carry only the id. When `resync` is true the client must reload
+    GET /api/expiry/items and continue from its X-Change-Seq header.
+    """
+    try:
+        changes = None if instance not in (None, inventory.instance) else inventory.changes_since(since)
+        header = b'{"seq":%d,"instance":%s,"resync":%s,"changes":[' % (
+            inventory.version, orjson.dumps(inventory.instance), b"true" if changes is None else b"false"
+        )
+
+        entries = []
+        for seq, op, item_id in changes or []:
+            entry = b'{"seq":%d,"op":"%s","id":%s' % (seq, op.encode(), orjson.dumps(item_id))
+            encoded = inventory.get_encoded(item_id, encode_item) if op != "delete" else None
+            if encoded:
+                entry += b',"item":' + render_item(encoded)
+            entries.append(entry + b"}")
+
+        return Response(content=header + b",".join(entries) + b"]}", media_type="application/json")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching changes: {str(e)}")
+
+
+@app.get("/api/expiry/items/query")
+async def query_items(
+    category: Optional[str] = None,
+    prefix: Optional[str] = None,
+    min_quantity: Optional[int] = None,
+    max_quantity: Optional[int] = None,
+    sort: str = Query("newest", pattern="^(newest|oldest|name|quantity|-quantity)$"),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=ITEM_QUERY_MAX_LIMIT),
+    fields: Optional[str] = None,
+    compact: bool = False,
+    inventory: InventoryShard = Depends(get_inventory),
+):
+    """
+    Filtered, paginated items (same item shape as GET /api/expiry/items,
+    including `fields` / `compact`). Filters combine through the store's
+    secondary indexes: `category` (case-insensitive), `prefix` (name prefix,
+    case-insensitive) and an inclusive quantity range.
+    """
+    selected = select_item_fields(fields, compact)
+    try:
+        filters = dict(
+            category=category,
+            prefix=prefix,
+            min_quantity=min_quantity,
+            max_quantity=max_quantity,
+            sort=sort,
+            offset=offset,
+            limit=limit,
+        )
+        header = b'{"total":%d,"offset":%d,"limit":%d,"items":'
+        if selected is None:
+            total, encoded_items = inventory.query_encoded(encode_item, **filters)
+            items = b"[" + b",".join(render_item(encoded) for encoded in encoded_items) + b"]"
+        else:
+            total, projected = inventory.query_projected(
+                selected, compact, derive_item_fields(selected, compact), **filters
+            )
+            items = orjson.dumps(projected)
+        body = header % (total, offset, limit) + items + b"}"
+        return Response(content=body, media_type="application/json")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error querying items: {str(e)}")
+
+
+@app.get("/api/expiry/stats")
+async def get_inventory_stats(inventory: InventoryShard = Depends(get_inventory)):
+    """
+    Dashboard counts for the caller's inventory: items per category, expired,
+    expiring today / this week, and a days-to-safe-expiry histogram.
+    Maintained as items change, so the cost doesn't grow with the inventory.
+    """
+    try:
+        return inventory.stats(date.today().toordinal() - EPOCH_ORDINAL)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching stats: {str(e)}")
+
+
 @app.get("/api/expiry/items/{item_id}")
-async def get_item_by_id(item_id: str):
-    """Get a single item with prediction."""
+async def get_item_by_id(
+    item_id: str,
+    request: Request,
+    fields: Optional[str] = None,
+    compact: bool = False,
+    inventory: InventoryShard = Depends(get_inventory),
+):
+    """Get a single item with prediction (`fields` / `compact` as for the item list)."""
+    selected = select_item_fields(fields, compact)
     try:
+        etag = inventory.item_etag(item_id, date.today().toordinal(), item_variant(selected, compact))
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        if selected is not None:
+            item = inventory.get_projected(item_id, selected, compact, derive_item_fields(selected, compact))
+            if item is None:
+                raise HTTPException(status_code=404, detail="Item not found")
+            return Response(content=orjson.dumps(item), media_type="application/json", headers=cache_headers(etag))
+
         # In-memory storage
-        item = food_items_db.get(item_id)
-        if not item:
+        encoded = inventory.get_encoded(item_id, encode_item)
+        if not encoded:
             raise HTTPException(status_code=404, detail="Item not found")
         
-        prediction = predict_expiry(
-            item["category"], 
-            item["purchaseDate"],
-            datetime.fromisoformat(item["manufacturedDate"]) if item.get("manufacturedDate") else None
-        )
-        
-        days_left = calculate_days_left(prediction["safeExpiry"])
-        
-        return {
-            **item,
-            "prediction": prediction,
-            "daysLeft": days_left
-        }
+        return Response(content=render_item(encoded), media_type="application/json", headers=cache_headers(etag))
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching item: {str(e)}")
 
 
+@app.patch("/api/expiry/items/{item_id}")
+async def update_item(item_id: str, changes: FoodItemUpdate, inventory: InventoryShard = Depends(get_inventory)):
+    """Update fields of a food item."""
+    try:
+        item = inventory.update(item_id, changes.model_dump(exclude_unset=True))
+        if not item:
+            raise HTTPException(status_code=404, detail="Item not found")
+        
+        return {"success": True, "item": item.to_dict()}
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid item: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error updating item: {str(e)}")
+
+
 @app.post("/api/expiry/items/{item_id}/advice")
-async def generate_item_advice(item_id: str):
-    """Generate LLM-powered advice and recipes for a specific item."""
+async def generate_item_advice(item_id: str, more_ideas: bool = False, inventory: InventoryShard = Depends(get_inventory)):
+    """
+    Advice and recipe ideas for a specific item. Items more than
+    ADVICE_LLM_THRESHOLD_DAYS from expiry get instant template advice;
+    near-expiry items, or `more_ideas=true`, go to the LLM.
+    """
     try:
-        item = food_items_db.get(item_id)
+        item = inventory.get(item_id)
         if not item:
             raise HTTPException(status_code=404, detail="Item not found")
         
-        prediction = predict_expiry(
-            item["category"], 
-            item["purchaseDate"],
-            datetime.fromisoformat(item["manufacturedDate"]) if item.get("manufacturedDate") else None
-        )
+        prediction = predict_item_expiry(item)
         
         days_left = calculate_days_left(prediction["safeExpiry"])
         
-        # Generate advice using OpenRouter
-        advice = await generate_advice_for_item(
-            item["name"], 
-            item["category"], 
-            days_left
-        )
+        if days_left > ADVICE_LLM_THRESHOLD_DAYS and not more_ideas:
+            advice = template_advice(item["name"], item["category"], days_left)
+            source = "template"
+        else:
+            # Generate advice using OpenRouter
+            advice = await generate_advice_for_item(
+                item["name"], 
+                item["category"], 
+                days_left
+            )
+            source = "llm"
         
         return {
             "advice": advice,
             "daysLeft": days_left,
-            "prediction": prediction
+            "prediction": prediction,
+            "source": source
         }
     except HTTPException:
         raise
@@ -216,21 +566,98 @@ async def generate_item_advice(item_id: str):
         raise HTTPException(status_code=500, detail=f"Error generating advice: {str(e)}")
 
 
+@app.get("/api/expiry/alerts/stream")
+async def stream_expiry_alerts(
+    token: Optional[str] = None,
+    email: Optional[str] = Depends(get_optional_user_email),
+):
+    """
+    Server-Sent Events stream of expiry alerts for the caller's inventory.
+    EventSource can't send headers, so the bearer token may be passed as ?token=.
+    On connect the client first gets an alert for every item already near
+    expiry (with template advice, so reconnects never cost LLM calls), then
+    live alerts from the daily check.
+    """
+    if email is None and token:
+        email = decode_access_token_cached(token)
+        if email is None:
+            raise credentials_exception()
+    inventory = item_store.shard(email or DEFAULT_OWNER)
+    subscription = alert_hub.subscribe(inventory.owner)
+    current = [
+        expiry_alert(item, prediction, days_left, template_advice(item["name"], item["category"], days_left))
+        for item, prediction, days_left in near_expiry_items(inventory)
+    ]
+
+    async def event_stream():
+        try:
+            yield b": connected\n\n"
+            for alert in current:
+                yield format_sse("expiry-alert", alert)
+            while True:
+                try:
+                    frame = await asyncio.wait_for(subscription.queue.get(), ALERT_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    frame = b": keep-alive\n\n"
+                dropped = subscription.take_dropped()
+                if dropped:
+                    yield format_sse("dropped", {"count": dropped})
+                yield frame
+        finally:
+            alert_hub.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/api/expiry/archive")
+async def get_archived_items(
+    category: Optional[str] = None,
+    prefix: Optional[str] = None,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=ITEM_QUERY_MAX_LIMIT),
+    inventory: InventoryShard = Depends(get_inventory),
+):
+    """
+    Items the sweeper archived (most recent first), filtered by `category`
+    and name `prefix` like the item query. Each carries an `archiveId`.
+    """
+    try:
+        total, items = item_archive.query(inventory.owner, category, prefix, offset, limit)
+        return {"total": total, "offset": offset, "limit": limit, "items": items}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching archived items: {str(e)}")
+
+
+@app.post("/api/expiry/archive/{archive_id}/restore")
+async def restore_archived_item(archive_id: str, inventory: InventoryShard = Depends(get_inventory)):
+    """Move an archived item back into the inventory (under a new id)."""
+    try:
+        item = item_archive.restore(inventory, archive_id)
+        if not item:
+            raise HTTPException(status_code=404, detail="Archived item not found")
+
+        return {"success": True, "item": item.to_dict()}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error restoring item: {str(e)}")
+
+
 @app.post("/api/expiry/multi-recipe")
-async def generate_multi_item_recipe(request: MultiRecipeRequest):
+async def generate_multi_item_recipe(request: MultiRecipeRequest, inventory: InventoryShard = Depends(get_inventory)):
     """Generate a recipe combining selected near-expiry items."""
     try:
         items = []
         
         # In-memory storage only
         for item_id in request.item_ids:
-            if item_id in food_items_db:
-                item = food_items_db[item_id]
-                prediction = predict_expiry(
-                    item["category"], 
-                    item["purchaseDate"],
-                    datetime.fromisoformat(item["manufacturedDate"]) if item.get("manufacturedDate") else None
-                )
+            item = inventory.get(item_id)
+            if item:
+                prediction = predict_item_expiry(item)
                 days_left = calculate_days_left(prediction["safeExpiry"])
                 items.append({
                     "name": item["name"],
@@ -275,41 +702,7 @@ Rules:
 Make sure to incorporate all or most of these items in the recipe.
 Return the recipe in the JSON format specified."""
 
-        client = get_openrouter_client()
-        response = client.chat.completions.create(
-            model="x-ai/grok-4.1-fast:free",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            max_tokens=1500,
-            temperature=0.8,
-        )
-
-        raw_output = response.choices[0].message.content.strip()
-        
-        # Clean up markdown code blocks if present
-        if raw_output.startswith("```"):
-            lines = raw_output.split("\n")
-            raw_output = "\n".join(lines[1:-1] if lines[-1] == "```" else lines[1:])
-        
-        # Parse JSON
-        try:
-            recipe_json = json.loads(raw_output)
-        except json.JSONDecodeError:
-            json_start = raw_output.find("{")
-            json_end = raw_output.rfind("}") + 1
-            if json_start >= 0 and json_end > json_start:
-                recipe_json = json.loads(raw_output[json_start:json_end])
-            else:
-                raise ValueError("Could not parse recipe JSON")
-
-        # Add YouTube search links based on recipe title
-        recipe_title = recipe_json.get("title", "recipe")
-        search_query = urllib.parse.quote(f"{recipe_title} recipe tutorial")
-        recipe_json["youtubeLinks"] = [
-            f"https://www.youtube.com/results?search_query={search_query}"
-        ]
+        recipe_json = await generate_recipe(user_prompt, system_prompt)
 
         return {
             "recipe": recipe_json,
@@ -323,13 +716,12 @@ Return the recipe in the JSON format specified."""
 
 
 @app.delete("/api/expiry/items/{item_id}")
-async def delete_item(item_id: str):
+async def delete_item(item_id: str, inventory: InventoryShard = Depends(get_inventory)):
     """Delete a food item."""
     try:
         # In-memory storage
-        if item_id not in food_items_db:
+        if not inventory.delete(item_id):
             raise HTTPException(status_code=404, detail="Item not found")
-        del food_items_db[item_id]
         
         return {"success": True, "message": "Item deleted"}
     except HTTPException:
@@ -359,88 +751,9 @@ async def generate_recipe_from_query(request_data: dict):
             query_text = request_data.get("query", "Generate a healthy recipe")
             preferences = request_data.get("preferences", {})
         
-        # Use provided preferences or empty defaults
-        dietary_context = ""
-        if preferences:
-            if preferences.get("dietary_type") and preferences.get("dietary_type") != "None":
-                dietary_context += f"\nDietary preference: {preferences['dietary_type']}"
-            if preferences.get("cuisine_type") and preferences.get("cuisine_type") != "None":
-                dietary_context += f"\nCuisine type: {preferences['cuisine_type']}"
-            if preferences.get("food_category") and preferences.get("food_category") != "None":
-                dietary_context += f"\nFood category: {preferences['food_category']}"
-            if preferences.get("difficulty") and preferences.get("difficulty") != "None":
-                dietary_context += f"\nDifficulty level: {preferences['difficulty']}"
-        
-        # STRICT JSON PROMPT
-        system_prompt = """You are a helpful chef assistant. Return ONLY valid JSON following EXACTLY this structure:
-{
-  "title": "Recipe Name",
-  "subtitle": "A brief tagline",
-  "description": "A paragraph describing the dish",
-  "servings": "4",
-  "time": "30 minutes",
-  "ingredients": [
-    { "name": "ingredient name", "amount": "1 cup" }
-  ],
-  "steps": [
-    "Step 1 instruction",
-    "Step 2 instruction"
-  ],
-  "suggestions": [
-    "Tip 1",
-    "Tip 2"
-  ],
-  "youtubeLinks": []
-}
+        user_prompt = build_query_prompt(query_text, preferences)
 
-Rules:
-- DO NOT include any text before or after the JSON.
-- DO NOT return markdown code blocks.
-- Fill every field with meaningful content.
-- Include at least 5-8 ingredients and 4-6 steps."""
-
-        user_prompt = f"""Generate a recipe based on this request: {query_text}
-{dietary_context}
-
-Return a complete recipe in the JSON format specified."""
-
-        client = get_openrouter_client()
-        response = client.chat.completions.create(
-            model="x-ai/grok-4.1-fast:free",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            max_tokens=1500,
-            temperature=0.8,
-        )
-
-        raw_output = response.choices[0].message.content.strip()
-        
-        # Clean up the response - remove markdown code blocks if present
-        if raw_output.startswith("```"):
-            lines = raw_output.split("\n")
-            # Remove first line (```json) and last line (```)
-            raw_output = "\n".join(lines[1:-1] if lines[-1] == "```" else lines[1:])
-        
-        # Parse JSON
-        try:
-            recipe_json = json.loads(raw_output)
-        except json.JSONDecodeError:
-            # Safety fallback - try to extract JSON
-            json_start = raw_output.find("{")
-            json_end = raw_output.rfind("}") + 1
-            if json_start >= 0 and json_end > json_start:
-                recipe_json = json.loads(raw_output[json_start:json_end])
-            else:
-                raise ValueError("Could not parse recipe JSON from response")
-
-        # Add YouTube search links based on recipe title
-        recipe_title = recipe_json.get("title", "recipe")
-        search_query = urllib.parse.quote(f"{recipe_title} recipe tutorial")
-        recipe_json["youtubeLinks"] = [
-            f"https://www.youtube.com/results?search_query={search_query}"
-        ]
+        recipe_json = await generate_recipe(user_prompt)
 
         return {"recipe": recipe_json}
 
@@ -456,90 +769,14 @@ async def generate_recipe_structured(preferences: RecipePreferences):
     Accepts user preferences directly in the request for personalized recommendations.
     """
     try:
-        # Build dietary context from provided preferences
-        dietary_context = ""
-        if preferences.dietary_type and preferences.dietary_type != "None":
-            dietary_context += f"\nDietary preference: {preferences.dietary_type}"
-        if preferences.cuisine_type and preferences.cuisine_type != "None":
-            dietary_context += f"\nCuisine type: {preferences.cuisine_type}"
-        if preferences.food_category and preferences.food_category != "None":
-            dietary_context += f"\nFood category: {preferences.food_category}"
-        if preferences.difficulty and preferences.difficulty != "None":
-            dietary_context += f"\nDifficulty level: {preferences.difficulty}"
-        
-        # STRICT JSON PROMPT
-        system_prompt = """Return ONLY valid JSON following EXACTLY this structure:
-{
-  "title": "",
-  "subtitle": "",
-  "description": "",
-  "servings": "",
-  "time": "",
-  "ingredients": [
-    { "name": "", "amount": "" }
-  ],
-  "steps": [
-    ""
-  ],
-  "suggestions": [
-    ""
-  ],
-  "youtubeLinks": []
-}
+        # Popular preference combos are pre-generated while the LLM is idle
+        combo = recipe_warmer.record(preferences.model_dump())
+        warmed = recipe_warmer.take(combo) if combo else None
+        if warmed is not None:
+            return RecipeResponse(recipe=warmed)
 
-Rules:
-- DO NOT include any text before or after the JSON.
-- DO NOT return markdown.
-- Fill every field with meaningful content."""
-
-        user_prompt = f"""Generate a recipe based on these preferences:
-
-Dietary Type: {preferences.dietary_type}
-Cuisine Type: {preferences.cuisine_type}
-Food Category: {preferences.food_category}
-Difficulty: {preferences.difficulty}
-Available Ingredients: {preferences.food_available}
-User Likes Eating: {preferences.like_eating}
-{dietary_context}
-
-Fill all JSON fields meaningfully."""
-
-        client = get_openrouter_client()
-        response = client.chat.completions.create(
-            model="x-ai/grok-4.1-fast:free",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            max_tokens=1500,
-            temperature=0.8,
-        )
-
-        raw_output = response.choices[0].message.content.strip()
-
-        # Clean up markdown code blocks if present
-        if raw_output.startswith("```"):
-            lines = raw_output.split("\n")
-            raw_output = "\n".join(lines[1:-1] if lines[-1] == "```" else lines[1:])
-
-        # Parse JSON
-        try:
-            recipe_json = json.loads(raw_output)
-        except json.JSONDecodeError:
-            # Safety fallback - try to extract JSON
-            json_start = raw_output.find("{")
-            json_end = raw_output.rfind("}") + 1
-            if json_start >= 0 and json_end > json_start:
-                recipe_json = json.loads(raw_output[json_start:json_end])
-            else:
-                raise ValueError("Could not parse recipe JSON")
-
-        # Add YouTube search links based on recipe title
-        recipe_title = recipe_json.get("title", "recipe")
-        search_query = urllib.parse.quote(f"{recipe_title} recipe tutorial")
-        recipe_json["youtubeLinks"] = [
-            f"https://www.youtube.com/results?search_query={search_query}"
-        ]
+        user_prompt = build_structured_prompt(preferences.model_dump())
+        recipe_json = await generate_recipe(user_prompt, STRUCTURED_SYSTEM_PROMPT)
 
         return RecipeResponse(recipe=recipe_json)
 
@@ -551,115 +788,288 @@ Fill all JSON fields meaningfully."""
 async def generate_recipe_public(query_data: RecipeQuery):
     """Generate a recipe without authentication (for testing/demo)."""
     try:
-        # STRICT JSON PROMPT
-        system_prompt = """You are a helpful chef assistant. Return ONLY valid JSON following EXACTLY this structure:
-{
-  "title": "Recipe Name",
-  "subtitle": "A brief tagline",
-  "description": "A paragraph describing the dish",
-  "servings": "4",
-  "time": "30 minutes",
-  "ingredients": [
-    { "name": "ingredient name", "amount": "1 cup" }
-  ],
-  "steps": [
-    "Step 1 instruction",
-    "Step 2 instruction"
-  ],
-  "suggestions": [
-    "Tip 1",
-    "Tip 2"
-  ],
-  "youtubeLinks": []
-}
+        recipe_json = await generate_recipe(build_query_prompt(query_data.query))
 
-Rules:
-- DO NOT include any text before or after the JSON.
-- DO NOT return markdown code blocks.
-- Fill every field with meaningful content.
-- Include at least 5-8 ingredients and 4-6 steps."""
+        return {"recipe": recipe_json}
 
-        user_prompt = f"""Generate a recipe based on this request: {query_data.query}
+    except Exception as e:
+        print(f"Error generating recipe: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error generating recipe: {str(e)}")
 
-Return a complete recipe in the JSON format specified."""
 
-        client = get_openrouter_client()
-        response = client.chat.completions.create(
-            model="x-ai/grok-4.1-fast:free",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            max_tokens=1500,
-            temperature=0.8,
-        )
+@app.post("/api/generate-recipes/batch")
+async def generate_recipes_batch(request: BatchRecipeRequest):
+    """
+    Generate recipes for several preference sets and/or queries at once.
+    Identical entries share one generation and unique ones run concurrently
+    (at most BATCH_CONCURRENCY at a time). Results come back in entry order,
+    or with stream=true as NDJSON "result" lines in completion order followed
+    by "done". A failed entry carries an error instead of a recipe.
+    """
+    ready: list = []      # entries answered from the pre-warmed pool
+    prompts: dict = {}
+    waiting: dict = {}
+    for index, entry in enumerate(request.entries):
+        if isinstance(entry, RecipePreferences):
+            combo = recipe_warmer.record(entry.model_dump())
+            warmed = recipe_warmer.take(combo) if combo else None
+            if warmed is not None:
+                ready.append({"index": index, "recipe": warmed})
+                continue
+            prompt = (build_structured_prompt(entry.model_dump()), STRUCTURED_SYSTEM_PROMPT)
+        else:
+            prompt = (build_query_prompt(entry.query), RECIPE_SYSTEM_PROMPT)
+        prompts[prompt] = prompt
+        waiting.setdefault(prompt, []).append(index)
+
+    async def entry_results():
+        for result in ready:
+            yield result
+        async for prompt, recipe, error in generate_recipes_concurrently(prompts, BATCH_CONCURRENCY):
+            for index in waiting[prompt]:
+                yield {"index": index, "error": error} if error else {"index": index, "recipe": recipe}
+
+    if not request.stream:
+        results = {result["index"]: result async for result in entry_results()}
+        ordered = [results[index] for index in range(len(request.entries))]
+        return {
+            "results": ordered,
+            "generations": len(prompts),
+            "failed": sum("error" in result for result in ordered),
+        }
 
-        raw_output = response.choices[0].message.content.strip()
-        
-        # Clean up the response - remove markdown code blocks if present
-        if raw_output.startswith("```"):
-            lines = raw_output.split("\n")
-            raw_output = "\n".join(lines[1:-1] if lines[-1] == "```" else lines[1:])
+    async def event_stream():
+        failed = 0
+        async for result in entry_results():
+            failed += "error" in result
+            yield orjson.dumps({"type": "result", **result}) + b"\n"
+        yield orjson.dumps({"type": "done", "generations": len(prompts), "failed": failed}) + b"\n"
 
-        # Parse JSON
-        try:
-            recipe_json = json.loads(raw_output)
-        except json.JSONDecodeError:
-            json_start = raw_output.find("{")
-            json_end = raw_output.rfind("}") + 1
-            if json_start >= 0 and json_end > json_start:
-                recipe_json = json.loads(raw_output[json_start:json_end])
-            else:
-                raise ValueError("Could not parse recipe JSON from response")
-
-        # Add YouTube search links based on recipe title
-        recipe_title = recipe_json.get("title", "recipe")
-        search_query = urllib.parse.quote(f"{recipe_title} recipe tutorial")
-        recipe_json["youtubeLinks"] = [
-            f"https://www.youtube.com/results?search_query={search_query}"
-        ]
+    return StreamingResponse(event_stream(), media_type="application/x-ndjson")
 
-        return {"recipe": recipe_json}
 
+@app.get("/api/recipes/{recipe_id}")
+async def get_stored_recipe(recipe_id: str, request: Request):
+    """
+    Fetch a previously generated recipe by the id returned with it.
+    Ids are content hashes, so a stored recipe never changes and can be cached indefinitely.
+    """
+    etag = f'"{recipe_id}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=31536000, immutable"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    # Cache misses read from disk, and a concurrent save may hold the store lock
+    recipe = await asyncio.to_thread(recipe_store.get, recipe_id)
+    if recipe is None:
+        raise HTTPException(status_code=404, detail="Recipe not found")
+    return ORJSONResponse({"recipe": recipe}, headers=headers)
+
+
+# ========================================
+#    MEAL PLAN ENDPOINT
+# ========================================
+
+@app.post("/api/meal-plan")
+async def create_meal_plan(request: MealPlanRequest, inventory: InventoryShard = Depends(get_inventory)):
+    """
+    Plan days x meals recipes, using up soon-to-expire pantry items first.
+    Corpus recipes are reused where they fit and the rest are generated
+    concurrently. By default results stream back as NDJSON lines
+    (one "plan" line, a "slot" line per meal as it completes, then "done");
+    with stream=false the whole plan is returned at once.
+    """
+    try:
+        pantry = []
+        if request.use_inventory:
+            # Days left is clamped at 0, so the store's expiry column keeps expired items out
+            today = date.today().toordinal() - EPOCH_ORDINAL
+            for item in inventory.expiring(today + request.days, from_day=today):
+                days_left = calculate_days_left(predict_item_expiry(item)["safeExpiry"])
+                if days_left < request.days:
+                    pantry.append((item["name"], days_left))
+
+        preferences = request.model_dump(include={"dietary_type", "cuisine_type", "food_available", "like_eating", "difficulty"})
+        slots, prompts = plan_meals(request.days, request.meals_per_day, preferences, pantry, request.use_corpus)
     except Exception as e:
-        print(f"Error generating recipe: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error generating recipe: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error planning meals: {str(e)}")
+
+    plan_info = {
+        "type": "plan",
+        "days": request.days,
+        "mealsPerDay": request.meals_per_day,
+        "generations": len(prompts),
+        "slots": [slot.summary() for slot in slots],
+    }
+
+    def slot_event(slot, recipe, error) -> dict:
+        event = {"type": "slot", "day": slot.day, "meal": slot.meal}
+        if error:
+            event["error"] = error
+        else:
+            event["recipe"] = recipe
+        return event
+
+    if not request.stream:
+        events = {id(slot): slot_event(slot, recipe, error) async for slot, recipe, error in fill_slots(slots, prompts)}
+        return {**plan_info, "type": "meal-plan", "meals": [events[id(slot)] for slot in slots]}
+
+    async def event_stream():
+        yield orjson.dumps(plan_info) + b"\n"
+        failed = 0
+        async for slot, recipe, error in fill_slots(slots, prompts):
+            failed += bool(error)
+            yield orjson.dumps(slot_event(slot, recipe, error)) + b"\n"
+        yield orjson.dumps({"type": "done", "failed": failed}) + b"\n"
+
+    return StreamingResponse(event_stream(), media_type="application/x-ndjson")
+
+
+# ========================================
+#    SHOPPING LIST ENDPOINT
+# ========================================
+
+@app.post("/api/shopping-list")
+async def build_shopping_list(request: ShoppingListRequest, inventory: InventoryShard = Depends(get_inventory)):
+    """
+    Merge the ingredients of generated recipes and/or corpus recipes (by id)
+    into one list, converting units and subtracting what's in the inventory.
+    """
+    try:
+        corpus = corpus_by_id()
+        missing = [corpus_id for corpus_id in request.corpus_ids if corpus_id not in corpus]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Unknown corpus recipe ids: {missing}")
+
+        recipes = request.recipes + [corpus[corpus_id] for corpus_id in request.corpus_ids]
+        pantry = inventory.list() if request.subtract_inventory else []
+        return aggregate_ingredients(recipes, pantry)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error building shopping list: {str(e)}")
+
+
+# ========================================
+#    ADMIN: PROFILING
+# ========================================
+
+@app.get("/api/admin/profiles", dependencies=[Depends(require_admin)])
+async def get_profiles():
+    """Profiling settings and saved request profiles, newest first."""
+    return {"settings": profiler_settings.to_dict(), "profiles": list_profiles()}
+
+
+@app.get("/api/admin/profiles/{name}", dependencies=[Depends(require_admin)])
+async def get_profile(name: str, raw: bool = False):
+    """Text summary of a saved profile (top functions by cumulative time), or the pstats file with raw=true."""
+    path = profile_path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if raw:
+        return FileResponse(path, media_type="application/octet-stream", filename=name)
+    return PlainTextResponse(profile_summary(path))
+
+
+@app.put("/api/admin/profiling", dependencies=[Depends(require_admin)])
+async def update_profiling(changes: ProfilingSettingsUpdate):
+    """Switch profiling on/off or change its sample rate / slow-request threshold at runtime."""
+    if changes.enabled is not None:
+        profiler_settings.enabled = changes.enabled
+    if changes.sample_rate is not None:
+        profiler_settings.sample_rate = changes.sample_rate
+    if changes.slow_ms is not None:
+        profiler_settings.slow_ms = changes.slow_ms
+    return profiler_settings.to_dict()
 
 
 # ========================================
 #    DAILY EXPIRY CHECK (In-Memory)
 # ========================================
 
+def near_expiry_items(inventory: InventoryShard) -> list:
+    """(item, prediction, days left) for items within 3 days of safe expiry."""
+    # Date-column scan narrows the shard to candidates; days left is checked exactly below
+    cutoff_day = date.today().toordinal() - EPOCH_ORDINAL + 4
+    found = []
+    for item in inventory.expiring(cutoff_day):
+        prediction = predict_item_expiry(item)
+        days_left = calculate_days_left(prediction["safeExpiry"])
+        if days_left <= 3:
+            found.append((item, prediction, days_left))
+    return found
+
+
+def expiry_alert(item, prediction: dict, days_left: int, advice: str) -> dict:
+    """Payload of an expiry-alert event."""
+    return {
+        "id": item["id"],
+        "name": item["name"],
+        "category": item["category"],
+        "daysLeft": days_left,
+        "safeExpiry": prediction["safeExpiry"],
+        "advice": advice,
+    }
+
+
 async def check_expiring_items():
-    """Daily job to check for items nearing expiry and generate advice."""
-    print("Running daily expiry check...")
+    """Daily job to check for items nearing expiry and push alerts with advice to subscribers."""
+    print(f"Running daily expiry check ({alert_hub.subscriber_count()} subscriber(s))...")
     try:
-        # In-memory storage
-        for item_id, item in food_items_db.items():
-            prediction = predict_expiry(
-                item["category"], 
-                item["purchaseDate"],
-                datetime.fromisoformat(item["manufacturedDate"]) if item.get("manufacturedDate") else None
-            )
-            days_left = calculate_days_left(prediction["safeExpiry"])
-            
-            # Alert for items expiring within 3 days
-            if days_left <= 3:
-                advice = await generate_advice_for_item(
-                    item["name"], 
-                    item["category"], 
-                    days_left
+        # In-memory storage, one shard at a time
+        for inventory in item_store.shards():
+            # Advice may cost an LLM call, so only inventories with someone listening get it
+            if not alert_hub.has_subscribers(inventory.owner):
+                continue
+            for item, prediction, days_left in near_expiry_items(inventory):
+                # The subscriber may have left while earlier advice was generated
+                if not alert_hub.has_subscribers(inventory.owner):
+                    break
+                advice = await generate_advice_for_item(item["name"], item["category"], days_left)
+                delivered = alert_hub.publish(
+                    inventory.owner, "expiry-alert", expiry_alert(item, prediction, days_left, advice)
                 )
-                
-                print(f"\n{'='*60}")
-                print(f"EXPIRY ALERT: {item['name']} ({days_left} days left)")
-                print(f"{'='*60}")
-                print(advice)
-                print(f"{'='*60}\n")
+                print(f"EXPIRY ALERT: {item['name']} ({days_left} days left) -> {delivered} subscriber(s)")
     except Exception as e:
         print(f"Error in daily expiry check: {str(e)}")
 
 
+async def run_expiry_checks():
+    """Run check_expiring_items every EXPIRY_CHECK_INTERVAL_HOURS."""
+    while True:
+        await asyncio.sleep(EXPIRY_CHECK_INTERVAL_HOURS * 3600)
+        await check_expiring_items()
+
+
+@app.on_event("startup")
+async def start_expiry_checks():
+    if EXPIRY_CHECK_INTERVAL_HOURS > 0 and background_jobs_enabled():
+        app.state.expiry_check_task = asyncio.create_task(run_expiry_checks())
+
+
+async def run_archive_sweeps():
+    """Archive long-expired items every ARCHIVE_SWEEP_INTERVAL_HOURS."""
+    while True:
+        await asyncio.sleep(ARCHIVE_SWEEP_INTERVAL_HOURS * 3600)
+        try:
+            archived = item_archive.sweep(item_store.shards(), date.today().toordinal() - EPOCH_ORDINAL)
+            print(f"Archive sweep: {archived} item(s) archived")
+        except Exception as e:
+            print(f"Error in archive sweep: {str(e)}")
+
+
+@app.on_event("startup")
+async def start_archive_sweeps():
+    if ARCHIVE_SWEEP_INTERVAL_HOURS > 0 and background_jobs_enabled():
+        app.state.archive_sweep_task = asyncio.create_task(run_archive_sweeps())
+
+
+@app.on_event("startup")
+async def start_recipe_warmer():
+    if WARM_INTERVAL_SECONDS > 0 and background_jobs_enabled():
+        app.state.recipe_warmer_task = asyncio.create_task(recipe_warmer.run())
+
+
 # Start server
 if __name__ == "__main__":
     import uvicorn
@@ -5,7 +5,16 @@ No MongoDB dependencies - uses simple string IDs.
 
 from datetime import datetime
 from typing import Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
+
+def check_iso_date(value: Optional[str]) -> Optional[str]:
+    """Reject dates the store can't parse (ISO 8601, optionally with a Z suffix)."""
+    if value is not None:
+        try:
+            datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            raise ValueError("must be an ISO 8601 date, e.g. 2024-05-01") from None
+    return value
 
 class FoodItemBase(BaseModel):
     """Base schema for food item."""
@@ -16,10 +25,31 @@ class FoodItemBase(BaseModel):
     notes: Optional[str] = None
     manufacturedDate: Optional[str] = None
 
+    _check_dates = field_validator("purchaseDate", "manufacturedDate")(check_iso_date)
+
 class FoodItemCreate(FoodItemBase):
     """Schema for creating a food item."""
     pass
 
+class FoodItemUpdate(BaseModel):
+    """Schema for partially updating a food item (omitted fields stay as they are)."""
+    name: Optional[str] = None
+    category: Optional[str] = None
+    purchaseDate: Optional[str] = None
+    quantity: Optional[int] = None
+    notes: Optional[str] = None
+    manufacturedDate: Optional[str] = None
+
+    @field_validator("name", "category", "purchaseDate")
+    @classmethod
+    def not_null(cls, value: Optional[str]) -> str:
+        # Only reached for values the client sent; these fields can't be cleared
+        if value is None:
+            raise ValueError("may be omitted but not null")
+        return value
+
+    _check_dates = field_validator("purchaseDate", "manufacturedDate")(check_iso_date)
+
 class FoodItem(FoodItemBase):
     """Schema for food item with database ID."""
     id: Optional[str] = Field(alias="_id")
@@ -2,12 +2,29 @@
 """
 Backend Status Check and Startup Script
 Verifies all components before starting the server
+
+Usage:
+    python run_backend.py                              # development (auto-reload)
+    python run_backend.py --production                 # one worker, no auto-reload
+    python run_backend.py --production --workers 4 --allow-per-worker-state
+                                                       # pre-forked workers, state split per worker
 """
 
+import argparse
+import gc
+import signal
 import sys
 import os
+import time
 from pathlib import Path
 
+# Seconds workers get to finish in-flight requests (e.g. LLM generations) on shutdown
+GRACEFUL_SHUTDOWN_SECONDS = int(os.getenv("GRACEFUL_SHUTDOWN_SECONDS", "60"))
+# Longest pause before replacing a worker that keeps crashing on startup
+RESPAWN_MAX_BACKOFF_SECONDS = float(os.getenv("RESPAWN_MAX_BACKOFF_SECONDS", "30"))
+# Workers that live at least this long reset the backoff
+RESPAWN_STABLE_SECONDS = 10
+
 def print_header(text):
     print(f"\n{'='*60}")
     print(f"  {text}")
@@ -135,8 +152,166 @@ def check_routes():
         print(f"❌ Route check failed: {e}")
         return False
 
+def warm_up_shared():
+    """
+    Load everything workers share before forking, so it stays in
+    copy-on-write pages: the app and its imports, the shelf-life
+    knowledge base, the recipe corpus and the recipe store index.
+    """
+    print_header("Warming Up")
+    started = time.perf_counter()
+
+    from main import app
+    from services.recipe_corpus import corpus_by_id, get_corpus
+    from services.recipe_store import recipe_store
+    from utils.predict_expiry import FOOD_DATA, predict_expiry
+    from utils.shelf_life_kb import get_knowledge_base
+
+    kb = get_knowledge_base()
+    print(f"✓ Shelf-life knowledge base: {'loaded' if kb else 'not built (category defaults only)'}")
+    # One prediction per category pages in the lookup paths
+    today = time.strftime("%Y-%m-%d")
+    for category in FOOD_DATA:
+        predict_expiry(category, today, item_name=category)
+    print(f"✓ Expiry prediction for {len(FOOD_DATA)} categories")
+    get_corpus()
+    print(f"✓ Recipe corpus: {len(corpus_by_id())} recipes")
+    print(f"✓ Recipe store: {len(recipe_store.ids())} recipes indexed")
+
+    # Keep the collector from touching (and un-sharing) the preloaded objects
+    gc.freeze()
+    print(f"\n✓ Warm-up finished in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return app
+
+
+def warm_up_worker():
+    """Per-worker warm-up: connection pools can't be shared across a fork."""
+    from services.llm_client import get_async_client
+    try:
+        get_async_client()
+    except Exception as e:
+        print(f"⚠️  [worker {os.getpid()}] LLM client not ready: {e}")
+
+
+def run_worker(config, sock, leader):
+    """
+    Worker process body: warm up, then serve on the inherited socket.
+    Only the leader runs the app's background jobs, so they don't run once per worker.
+    """
+    import uvicorn
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    os.environ["RUN_BACKGROUND_JOBS"] = "true" if leader else "false"
+    warm_up_worker()
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def run_production(host, port, workers):
+    """
+    Pre-fork server: the app is imported and warmed once in this process,
+    the listening socket is bound here, and workers are forked to share it.
+    SIGTERM / CTRL+C is forwarded to workers, which stop accepting
+    connections and drain in-flight requests for up to
+    GRACEFUL_SHUTDOWN_SECONDS; workers that die unexpectedly are replaced,
+    with an exponential backoff while they keep dying soon after starting.
+    The first worker (or its replacement) runs the background jobs.
+    """
+    import uvicorn
+
+    app = warm_up_shared()
+    config = uvicorn.Config(
+        app,
+        host=host,
+        port=port,
+        timeout_graceful_shutdown=GRACEFUL_SHUTDOWN_SECONDS,
+    )
+
+    if not hasattr(os, "fork"):
+        print("⚠️  os.fork is unavailable on this platform - running a single worker")
+        warm_up_worker()
+        uvicorn.Server(config).run()
+        return
+
+    if workers > 1:
+        print("⚠️  Running with per-worker state: each worker has its own in-memory")
+        print("   inventories, alert hub and change log, so a client only sees items")
+        print("   written through the same worker, expiry alerts reach only SSE clients")
+        print("   connected to the worker running background jobs, and ETags / change")
+        print("   feed sequence numbers differ between workers (delta sync resyncs).")
+
+    sock = config.bind_socket()
+    # pid -> (leader, started)
+    children = {}
+
+    def spawn(leader):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                run_worker(config, sock, leader)
+            finally:
+                os._exit(0)
+        children[pid] = (leader, time.monotonic())
+        print(f"✓ Worker {pid} started{' (background jobs)' if leader else ''}")
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for index in range(workers):
+        spawn(index == 0)
+    print(f"\nServing on http://{host}:{port} with {workers} worker(s)")
+    print("Press CTRL+C to stop\n")
+
+    backoff = 0.0
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        leader, started = children.pop(pid, (False, 0.0))
+        if stopping:
+            continue
+        if time.monotonic() - started < RESPAWN_STABLE_SECONDS:
+            backoff = min(max(backoff * 2, 1.0), RESPAWN_MAX_BACKOFF_SECONDS)
+        else:
+            backoff = 0.0
+        print(f"⚠️  Worker {pid} exited (status {status}), restarting in {backoff:.0f}s")
+        time.sleep(backoff)
+        if not stopping:
+            spawn(leader)
+    sock.close()
+    print("✓ All workers stopped")
+
+
 def main():
     """Run all checks and start server if everything is OK."""
+    parser = argparse.ArgumentParser(description="Check and start the ChefBuddy backend")
+    parser.add_argument("--production", action="store_true", help="pre-forked workers, no auto-reload")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "1")),
+                        help="worker processes in production mode (default: WEB_CONCURRENCY or 1)")
+    parser.add_argument("--allow-per-worker-state", action="store_true",
+                        help="allow --workers > 1 although inventories, alerts and change feeds are per worker")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    args = parser.parse_args()
+    if args.production and args.workers > 1 and not args.allow_per_worker_state:
+        parser.error(
+            "--workers > 1 splits the in-memory inventories, expiry alerts and change feeds "
+            "between processes; pass --allow-per-worker-state to run that way anyway"
+        )
+
     print("\n" + "="*60)
     print("  🚀 ChefBuddy Backend - Pre-flight Check")
     print("="*60)
@@ -156,12 +331,17 @@ def main():
     
     print_header("✅ All Checks Passed!")
     print("🎉 Backend is ready to start!")
-    print("\nStarting server on http://0.0.0.0:8000...")
+
+    if args.production:
+        run_production(args.host, args.port, max(args.workers, 1))
+        return
+
+    print(f"\nStarting server on http://{args.host}:{args.port}...")
     print("Press CTRL+C to stop\n")
     
     # Start the server
     import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    uvicorn.run("main:app", host=args.host, port=args.port, reload=True)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,275 @@
+"""
+Admission control for LLM-backed endpoints.
+Each expensive route gets a concurrency limit and a bounded wait queue.
+When the queue is full the request is rejected at once with 503 and a
+Retry-After estimate; queued requests whose deadline passes are dropped
+before they reach OpenRouter, and admitted requests carry their deadline
+into llm_client so it becomes the upstream timeout. If the client
+disconnects, its queued request is dropped or its running generation is
+cancelled (closing the upstream call), unless the generation is nearly done
+and its recipe can still be saved to the recipe store. Routes not listed
+here (item CRUD, SSE, stats) bypass admission entirely.
+"""
+
+import asyncio
+import math
+import os
+import re
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Pattern, Tuple
+
+import orjson
+
+from services.llm_client import request_deadline
+
+# Requests running at once per route, and requests allowed to wait behind them
+ADMISSION_CONCURRENCY = int(os.getenv("ADMISSION_CONCURRENCY", "4"))
+ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", "8"))
+# Default (and maximum) time budget of a request, including time spent queued
+ADMISSION_DEADLINE_SECONDS = float(os.getenv("ADMISSION_DEADLINE_SECONDS", "60"))
+# Meal plans and batches run several generations, so they get a longer budget
+MEAL_PLAN_DEADLINE_SECONDS = float(os.getenv("MEAL_PLAN_DEADLINE_SECONDS", "300"))
+BATCH_DEADLINE_SECONDS = float(os.getenv("BATCH_DEADLINE_SECONDS", "300"))
+
+# A disconnected request that has run this fraction of the route's average
+# duration is left to finish so its recipe lands in the store (0 disables)
+DISCONNECT_SALVAGE_FRACTION = float(os.getenv("DISCONNECT_SALVAGE_FRACTION", "0.75"))
+
+# Clients may shorten their budget with this header (seconds)
+DEADLINE_HEADER = b"x-request-deadline"
+
+# (route name, method, path pattern, deadline seconds)
+ADMISSION_ROUTES: List[Tuple[str, str, Pattern, float]] = [
+    ("recipe", "POST", re.compile(r"^/api/generate-recipe(-structured|-public)?$"), ADMISSION_DEADLINE_SECONDS),
+    ("multi-recipe", "POST", re.compile(r"^/api/expiry/multi-recipe$"), ADMISSION_DEADLINE_SECONDS),
+    ("advice", "POST", re.compile(r"^/api/expiry/items/[^/]+/advice$"), ADMISSION_DEADLINE_SECONDS),
+    ("meal-plan", "POST", re.compile(r"^/api/meal-plan$"), MEAL_PLAN_DEADLINE_SECONDS),
+    ("batch", "POST", re.compile(r"^/api/generate-recipes/batch$"), BATCH_DEADLINE_SECONDS),
+]
+
+# Single-recipe routes whose output is worth salvaging after a disconnect
+SALVAGE_ROUTES = {"recipe", "multi-recipe"}
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+class DisconnectWatcher:
+    """
+    Reads the request's ASGI messages in the background so a disconnect is
+    noticed while the app is still working; the app reads the same messages
+    through `receive`.
+    """
+
+    def __init__(self, receive):
+        self._messages: asyncio.Queue = asyncio.Queue()
+        self.disconnected = asyncio.get_running_loop().create_future()
+        self._pump = asyncio.create_task(self._read(receive))
+
+    async def _read(self, receive) -> None:
+        while True:
+            message = await receive()
+            await self._messages.put(message)
+            if message["type"] == "http.disconnect":
+                self.disconnected.set_result(None)
+                return
+
+    async def receive(self):
+        return await self._messages.get()
+
+    async def run(self, awaitable, salvage=lambda: False):
+        """
+        Await something unless the client disconnects first.
+
+        Args:
+            awaitable: Coroutine to run as a task
+            salvage: Called on disconnect; if it returns True the task is
+                left to finish instead of being cancelled
+
+        Raises:
+            ClientDisconnected: If the client went away (after cancelling or
+                finishing the task)
+        """
+        task = asyncio.ensure_future(awaitable)
+        await asyncio.wait({task, self.disconnected}, return_when=asyncio.FIRST_COMPLETED)
+        if task.done():
+            return task.result()
+        if not salvage():
+            task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                raise
+        raise ClientDisconnected()
+
+    def close(self) -> None:
+        self._pump.cancel()
+
+
+class RouteLimiter:
+    """Concurrency limit with a bounded FIFO of waiters for one route."""
+
+    def __init__(self, limit: int, queue_size: int):
+        self.limit = max(limit, 1)
+        self.queue_size = queue_size
+        self.active = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+        # Running average of request duration, for Retry-After
+        self.avg_seconds = 5.0
+
+    def full(self) -> bool:
+        return self.active >= self.limit and len(self.waiters) >= self.queue_size
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely to be free."""
+        return max(1, math.ceil(self.avg_seconds * (len(self.waiters) + 1) / self.limit))
+
+    def reserve(self) -> Optional[asyncio.Future]:
+        """
+        Take a slot or a place in line, synchronously, so requests arriving
+        together can't all pass the full() check first (caller checks full()).
+
+        Returns:
+            None if a slot was taken, else a future resolved when one is handed over
+        """
+        if self.active < self.limit and not self.waiters:
+            self.active += 1
+            return None
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        return waiter
+
+    async def wait(self, waiter: asyncio.Future, timeout: float) -> None:
+        """
+        Wait in line for at most `timeout` seconds (call abandon() if this fails).
+
+        Raises:
+            asyncio.TimeoutError: If no slot freed up in time
+        """
+        await asyncio.wait_for(asyncio.shield(waiter), max(timeout, 0))
+
+    def abandon(self, waiter: asyncio.Future) -> None:
+        """Give up a place in line, passing on the slot if it was handed over meanwhile."""
+        if waiter.done() and not waiter.cancelled():
+            self.release()
+            return
+        waiter.cancel()
+        try:
+            self.waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def release(self) -> None:
+        """Free a slot, handing it straight to the next waiter if there is one."""
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def record(self, seconds: float) -> None:
+        self.avg_seconds = 0.8 * self.avg_seconds + 0.2 * seconds
+
+
+def _budget(scope: dict, default: float) -> float:
+    """Request time budget: the X-Request-Deadline header, capped at the route default."""
+    for name, value in scope.get("headers", []):
+        if name == DEADLINE_HEADER:
+            try:
+                return min(max(float(value), 0.0), default)
+            except ValueError:
+                break
+    return default
+
+
+async def _reject(send, status: int, detail: str, retry_after: int) -> None:
+    body = orjson.dumps({"detail": detail})
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(retry_after).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class AdmissionMiddleware:
+    """Pure ASGI middleware applying admission control to ADMISSION_ROUTES."""
+
+    def __init__(self, app, concurrency: int = ADMISSION_CONCURRENCY, queue_size: int = ADMISSION_QUEUE_SIZE):
+        self.app = app
+        self.limiters: Dict[str, RouteLimiter] = {
+            name: RouteLimiter(concurrency, queue_size) for name, _, _, _ in ADMISSION_ROUTES
+        }
+
+    def _match(self, scope: dict) -> Optional[Tuple[str, float]]:
+        for name, method, pattern, deadline in ADMISSION_ROUTES:
+            if scope["method"] == method and pattern.match(scope["path"]):
+                return name, deadline
+        return None
+
+    async def __call__(self, scope, receive, send):
+        route = self._match(scope) if scope["type"] == "http" else None
+        if route is None:
+            await self.app(scope, receive, send)
+            return
+
+        name, default_deadline = route
+        limiter = self.limiters[name]
+        deadline = time.monotonic() + _budget(scope, default_deadline)
+
+        if limiter.full():
+            await _reject(send, 503, "Server busy, please retry shortly", limiter.retry_after())
+            return
+        # No await between the check and the reservation
+        waiter = limiter.reserve()
+
+        watcher = DisconnectWatcher(receive)
+        try:
+            if waiter is not None:
+                admitted = False
+                try:
+                    await watcher.run(limiter.wait(waiter, deadline - time.monotonic()))
+                    admitted = True
+                except asyncio.TimeoutError:
+                    await _reject(send, 503, "Request deadline passed while queued", limiter.retry_after())
+                    return
+                except ClientDisconnected:
+                    return
+                finally:
+                    if not admitted:
+                        limiter.abandon(waiter)
+
+            token = request_deadline.set(deadline)
+            started = time.monotonic()
+
+            def salvage() -> bool:
+                # Nearly finished single-recipe generations still end up in the recipe store
+                elapsed = time.monotonic() - started
+                return (
+                    name in SALVAGE_ROUTES
+                    and DISCONNECT_SALVAGE_FRACTION > 0
+                    and elapsed >= DISCONNECT_SALVAGE_FRACTION * limiter.avg_seconds
+                )
+
+            completed = False
+            try:
+                await watcher.run(self.app(scope, watcher.receive, send), salvage)
+                completed = True
+            except ClientDisconnected:
+                print(f"Client disconnected from {scope['path']} after {time.monotonic() - started:.1f}s")
+            finally:
+                request_deadline.reset(token)
+                # Cut-short requests would drag the Retry-After estimate down
+                if completed:
+                    limiter.record(time.monotonic() - started)
+                limiter.release()
+        finally:
+            watcher.close()
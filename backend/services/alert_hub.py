@@ -0,0 +1,83 @@
+"""
+In-process pub/sub hub for pushing expiry alerts to connected clients.
+Each subscriber gets a small bounded buffer; when a slow client falls behind,
+its oldest events are dropped and it is told how many it missed, so one stuck
+connection can never hold memory or block publishers.
+"""
+
+import asyncio
+import json
+import os
+from collections import defaultdict
+from typing import Dict, Set
+
+# Events buffered per subscriber before the oldest are dropped
+ALERT_BUFFER_SIZE = int(os.getenv("ALERT_BUFFER_SIZE", "32"))
+
+
+def format_sse(event: str, data: dict) -> bytes:
+    """Encode one Server-Sent Events frame."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode()
+
+
+class Subscription:
+    """A single connected client listening on a topic."""
+
+    def __init__(self, topic: str, buffer_size: int):
+        self.topic = topic
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=buffer_size)
+        self.dropped = 0
+
+    def push(self, frame: bytes) -> None:
+        """Enqueue a frame, evicting the oldest one if the buffer is full."""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(frame)
+
+    def take_dropped(self) -> int:
+        """Number of frames dropped since the last call."""
+        dropped, self.dropped = self.dropped, 0
+        return dropped
+
+
+class AlertHub:
+    """Topic-based fan-out of pre-encoded SSE frames (topic = inventory owner)."""
+
+    def __init__(self, buffer_size: int = ALERT_BUFFER_SIZE):
+        self.buffer_size = buffer_size
+        self._subscribers: Dict[str, Set[Subscription]] = defaultdict(set)
+
+    def subscribe(self, topic: str) -> Subscription:
+        subscription = Subscription(topic, self.buffer_size)
+        self._subscribers[topic].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(subscription.topic)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.topic]
+
+    def has_subscribers(self, topic: str) -> bool:
+        return bool(self._subscribers.get(topic))
+
+    def subscriber_count(self) -> int:
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def publish(self, topic: str, event: str, data: dict) -> int:
+        """
+        Send an event to every subscriber of a topic.
+
+        Returns:
+            Number of subscribers the event was delivered to
+        """
+        subscribers = self._subscribers.get(topic)
+        if not subscribers:
+            return 0
+        # Encode once, share the bytes across all subscribers
+        frame = format_sse(event, data)
+        for subscription in list(subscribers):
+            subscription.push(frame)
+        return len(subscribers)
@@ -0,0 +1,180 @@
+"""
+Archive tier for long-expired inventory items.
+A periodic sweep moves items more than ARCHIVE_GRACE_DAYS past their safe
+expiry out of the in-memory item store into gzip-compressed NDJSON segments
+on disk, one directory per owner and one segment per owner per sweep. The
+active store then only holds items people can still use, while archived ones
+stay queryable and restorable. Nothing archived is kept in memory.
+"""
+
+import gzip
+import hashlib
+import os
+import re
+import secrets
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+import orjson
+
+from services.item_store import EPOCH_ORDINAL, FIELDS, InventoryShard, ItemRow, from_epoch_days
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", os.path.join(BACKEND_DIR, "data", "archive"))
+# Days past safe expiry before an item is archived
+ARCHIVE_GRACE_DAYS = int(os.getenv("ARCHIVE_GRACE_DAYS", "30"))
+# How often the sweep runs (0 disables it)
+ARCHIVE_SWEEP_INTERVAL_HOURS = float(os.getenv("ARCHIVE_SWEEP_INTERVAL_HOURS", "24"))
+
+_SEGMENT_SUFFIX = ".ndjson.gz"
+# Archive ids are "<segment>-<item id>", e.g. 20261019-040000-1a2b3c-42
+_ARCHIVE_ID = re.compile(r"^(\d{8}-\d{6}-[0-9a-f]{6})-(\d+)$")
+
+
+class ItemArchive:
+    """Compressed on-disk segments of archived items, per owner."""
+
+    def __init__(self, directory: str = ARCHIVE_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    def _owner_dir(self, owner: str) -> str:
+        # Owners are emails; hash them rather than use them as paths
+        return os.path.join(self.directory, hashlib.sha256(owner.encode()).hexdigest()[:16])
+
+    def _segments(self, owner: str) -> List[str]:
+        """Segment paths for an owner, newest first."""
+        directory = self._owner_dir(owner)
+        try:
+            names = sorted((name for name in os.listdir(directory) if name.endswith(_SEGMENT_SUFFIX)), reverse=True)
+        except FileNotFoundError:
+            return []
+        return [os.path.join(directory, name) for name in names]
+
+    @staticmethod
+    def _read(path: str) -> List[dict]:
+        with gzip.open(path, "rb") as f:
+            return [orjson.loads(line) for line in f if line.strip()]
+
+    @staticmethod
+    def _write(path: str, records: List[dict]) -> None:
+        """Write a segment atomically (a crash never leaves half a segment)."""
+        temporary = path + ".tmp"
+        with gzip.open(temporary, "wb") as f:
+            f.write(b"".join(orjson.dumps(record) + b"\n" for record in records))
+        os.replace(temporary, path)
+
+    def store(self, owner: str, items: List[Tuple[ItemRow, int]]) -> None:
+        """
+        Write (item, safe expiry day) pairs as a new segment.
+
+        Raises:
+            OSError: If the segment can't be written (the items then stay live)
+        """
+        if not items:
+            return
+        segment = f"{time.strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(3)}"
+        archived_at = datetime.utcnow().isoformat()
+        records = [
+            {
+                **item.to_dict(),
+                "archiveId": f"{segment}-{item['id']}",
+                "safeExpiry": from_epoch_days(expiry_day),
+                "archivedAt": archived_at,
+            }
+            for item, expiry_day in items
+        ]
+        with self._lock:
+            os.makedirs(self._owner_dir(owner), exist_ok=True)
+            self._write(os.path.join(self._owner_dir(owner), segment + _SEGMENT_SUFFIX), records)
+
+    def query(
+        self,
+        owner: str,
+        category: Optional[str] = None,
+        prefix: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 50,
+    ) -> Tuple[int, List[dict]]:
+        """
+        Archived items, most recently archived first, streamed from the segments.
+
+        Returns:
+            (total matches, requested page)
+        """
+        wanted_category = category.casefold() if category is not None else None
+        wanted_prefix = prefix.casefold() if prefix else None
+        total, page = 0, []
+        for path in self._segments(owner):
+            for record in self._read(path):
+                if wanted_category is not None and (record.get("category") or "").casefold() != wanted_category:
+                    continue
+                if wanted_prefix and not (record.get("name") or "").casefold().startswith(wanted_prefix):
+                    continue
+                if offset <= total < offset + limit:
+                    page.append(record)
+                total += 1
+        return total, page
+
+    def take(self, owner: str, archive_id: str) -> Optional[dict]:
+        """Remove one item from the archive and return it, or None if it isn't there."""
+        match = _ARCHIVE_ID.match(archive_id)
+        if not match:
+            return None
+        path = os.path.join(self._owner_dir(owner), match.group(1) + _SEGMENT_SUFFIX)
+        with self._lock:
+            try:
+                records = self._read(path)
+            except FileNotFoundError:
+                return None
+            found = next((record for record in records if record.get("archiveId") == archive_id), None)
+            if found is None:
+                return None
+            remaining = [record for record in records if record is not found]
+            if remaining:
+                self._write(path, remaining)
+            else:
+                os.remove(path)
+        return found
+
+    def restore(self, inventory: InventoryShard, archive_id: str) -> Optional[ItemRow]:
+        """
+        Move an archived item back into an inventory (it gets a new id).
+        Unless its dates are corrected, the next sweep archives it again.
+        """
+        record = self.take(inventory.owner, archive_id)
+        if record is None:
+            return None
+        try:
+            return inventory.add({field: record.get(field) for field in FIELDS if field != "id"})
+        except Exception:
+            # Put it back rather than lose it
+            self.store(inventory.owner, [(_record_row(record), _expiry_day(record))])
+            raise
+
+    def sweep(self, shards: List[InventoryShard], today: int) -> int:
+        """Archive every shard's items past the grace period; returns the number archived."""
+        cutoff_day = today - ARCHIVE_GRACE_DAYS
+        archived = 0
+        for shard in shards:
+            try:
+                archived += shard.archive_expired(cutoff_day, lambda items: self.store(shard.owner, items))
+            except OSError as e:
+                print(f"Archive sweep failed for one inventory: {e}")
+        return archived
+
+
+def _record_row(record: dict) -> ItemRow:
+    row = ItemRow()
+    for field in FIELDS:
+        setattr(row, field, record.get(field))
+    return row
+
+
+def _expiry_day(record: dict) -> int:
+    return datetime.fromisoformat(record["safeExpiry"]).toordinal() - EPOCH_ORDINAL
+
+
+item_archive = ItemArchive()
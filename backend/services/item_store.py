@@ -0,0 +1,762 @@
+"""
+In-memory food item store partitioned by user.
+Each user's inventory lives in its own shard with its own lock and id counter,
+so reads only touch the caller's items and writes from different users never
+contend.
+
+Items are stored column-wise in typed arrays rather than one dict per item:
+categories as a uint8 enum, dates as int32 epoch days, quantities as int32,
+and names/notes as indexes into a per-shard interned string table. Deleted
+rows are tombstoned and compacted away in bulk. Callers get ItemRow views
+that read like the old dicts, or projections of just the fields they asked
+for, read straight from the columns.
+
+Each row also keeps its safe expiry day, and each shard maintains
+per-category counts and a days-to-expiry histogram as items come and go, so
+dashboard stats never rescan the inventory. Secondary indexes (category ->
+ids, ids sorted by name and by quantity) serve filtered queries the same way.
+Full item responses are pre-encoded on first read and kept in one bounded
+LRU shared by all shards, so hot items skip re-encoding without the cache
+outgrowing the columns.
+"""
+
+import calendar
+import os
+import secrets
+import threading
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter, OrderedDict, deque
+from itertools import islice
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+# Shard used for requests without a valid bearer token
+DEFAULT_OWNER = "anonymous"
+
+# Number of recent changes kept per shard for delta sync
+CHANGE_LOG_SIZE = int(os.getenv("CHANGE_LOG_SIZE", "1000"))
+
+# Pre-encoded item responses kept per store (LRU across all shards)
+ENCODED_CACHE_SIZE = int(os.getenv("ENCODED_CACHE_SIZE", "4096"))
+
+# Days covered by the expiry histogram (day 0 = expiring today)
+STATS_HISTOGRAM_DAYS = max(int(os.getenv("STATS_HISTOGRAM_DAYS", "14")), 7)
+
+# Missing date / quantity marker in int32 columns
+NULL = -(2 ** 31)
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+FIELDS = ("id", "name", "category", "purchaseDate", "quantity", "notes", "manufacturedDate", "createdAt")
+
+# Projection hook: (lazy full view, safe expiry epoch day) -> extra fields
+Derive = Callable[[Callable[[], "ItemRow"], int], dict]
+
+# Categories every shard starts with. Categories are free text, so each shard
+# extends its own table; once it holds 256 entries (the uint8 column's range),
+# further new values are stored as OTHER_CATEGORY.
+CATEGORIES = ("dairy", "vegetables", "fruits", "meat", "packaged", "spices", "bakery", "frozen")
+OTHER_CATEGORY = "other"
+MAX_CATEGORIES = 256
+
+# Fields an item can't be without
+REQUIRED_FIELDS = ("name", "category", "purchaseDate")
+
+
+def normalize_category(category: str) -> str:
+    """Case- and whitespace-insensitive form of a category."""
+    normalized = " ".join(category.split()).casefold()
+    if not normalized:
+        raise ValueError("category must not be empty")
+    return normalized
+
+
+def to_epoch_days(value: Optional[str]) -> int:
+    if value is None:
+        return NULL
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).date().toordinal() - EPOCH_ORDINAL
+
+
+def from_epoch_days(days: int) -> Optional[str]:
+    return None if days == NULL else date.fromordinal(days + EPOCH_ORDINAL).isoformat()
+
+
+def to_epoch_seconds(value: Optional[str]) -> int:
+    if value is None:
+        return 0
+    moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return calendar.timegm(moment.utctimetuple())
+
+
+class ItemRow:
+    """Read-only snapshot of one stored item with dict-style access."""
+
+    __slots__ = FIELDS
+
+    def __getitem__(self, field: str):
+        try:
+            return getattr(self, field)
+        except (AttributeError, TypeError):
+            raise KeyError(field) from None
+
+    def get(self, field: str, default=None):
+        return getattr(self, field, default) if field in FIELDS else default
+
+    def keys(self):
+        return FIELDS
+
+    def to_dict(self) -> dict:
+        return {field: getattr(self, field) for field in FIELDS}
+
+
+class EncodedCache:
+    """LRU of pre-encoded item responses, keyed by (owner, item id)."""
+
+    def __init__(self, size: int = ENCODED_CACHE_SIZE):
+        self.size = size
+        self._entries: "OrderedDict[Tuple[str, str], Tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Tuple[str, str]) -> Optional[Tuple]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Tuple[str, str], value: Tuple) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def discard(self, key: Tuple[str, str]) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class InventoryShard:
+    """A single user's inventory."""
+
+    def __init__(
+        self,
+        owner: str,
+        expiry_offsets: Callable[[str, str], Tuple[int, int]],
+        encoded: Optional[EncodedCache] = None,
+    ):
+        """
+        Args:
+            owner: Inventory owner
+            expiry_offsets: (category, name) -> (store delay, days from
+                manufacture to safe expiry)
+            encoded: Pre-encoded response cache (shared across a store's
+                shards; a private one if omitted)
+        """
+        self.owner = owner
+        self.expiry_offsets = expiry_offsets
+        # This shard's category enum (kept across compaction)
+        self.categories: List[str] = [*CATEGORIES, OTHER_CATEGORY]
+        self.category_codes: Dict[str, int] = {name: code for code, name in enumerate(self.categories)}
+        self.counter = 0
+        self.live = 0
+        self.lock = threading.RLock()
+        self._init_columns()
+        # (owner, item id) -> pre-encoded static JSON, dropped whenever the item changes
+        self.encoded = encoded if encoded is not None else EncodedCache()
+        # Monotonic version bumped on every mutation; each row remembers the
+        # version it was last changed at. The instance tag keeps ETags from
+        # colliding across shards and server restarts.
+        self.version = 0
+        self.instance = secrets.token_hex(4)
+        # Bounded change log of (seq, op, item_id); seq is the version after the change
+        self.changes: deque = deque(maxlen=CHANGE_LOG_SIZE)
+        # Secondary indexes over live rows: category code -> item ids, and
+        # item ids ordered by (casefolded name, id) and by (quantity, id)
+        self.by_category: Dict[int, Set[int]] = {}
+        self.by_name = array("I")
+        self.by_quantity = array("I")
+        # Aggregates of live rows: count per safe expiry day, and that
+        # spread bucketed relative to `stats_day`
+        self.expiry_days: Counter = Counter()
+        self.stats_day = date.today().toordinal() - EPOCH_ORDINAL
+        self.expired = 0                              # safe expiry before stats_day
+        self.window = [0] * STATS_HISTOGRAM_DAYS      # stats_day + 0 .. N-1
+        self.later = 0                                # beyond the window
+        self.undated = 0
+
+    def _init_columns(self) -> None:
+        # Rows are in creation order, so ids are ascending and found by bisection
+        self.ids = array("I")
+        self.alive = array("B")
+        self.revision = array("I")
+        self.category = array("B")
+        self.purchased = array("i")
+        self.manufactured = array("i")
+        self.created = array("I")     # epoch seconds, so createdAt keeps its time
+        self.quantity = array("i")
+        self.expiry = array("i")      # safe expiry, epoch days (derived)
+        self.name = array("I")
+        self.notes = array("I")
+        # Interned strings; index 0 stands for None
+        self.strings: List[Optional[str]] = [None]
+        self.string_ids: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return self.live
+
+    def _intern(self, value: Optional[str]) -> int:
+        if value is None:
+            return 0
+        index = self.string_ids.get(value)
+        if index is None:
+            index = self.string_ids[value] = len(self.strings)
+            self.strings.append(value)
+        return index
+
+    def _row_of(self, key: int) -> int:
+        """Row index of a stored id, live or not (caller holds the lock)."""
+        return bisect_left(self.ids, key)
+
+    def _name_key(self, key: int) -> Tuple[str, int]:
+        row = self._row_of(key)
+        return (self.strings[self.name[row]] or "").casefold(), key
+
+    def _quantity_key(self, key: int) -> Tuple[int, int]:
+        return self.quantity[self._row_of(key)], key
+
+    def _category_code(self, category: str) -> int:
+        name = normalize_category(category)
+        code = self.category_codes.get(name)
+        if code is None:
+            if len(self.categories) >= MAX_CATEGORIES:
+                return self.category_codes[OTHER_CATEGORY]
+            code = self.category_codes[name] = len(self.categories)
+            self.categories.append(name)
+        return code
+
+    def _row(self, item_id: str) -> Optional[int]:
+        """Row index of a live item (caller holds the lock)."""
+        if not (item_id.isascii() and item_id.isdecimal()):
+            return None
+        key = int(item_id)
+        row = bisect_left(self.ids, key)
+        if row < len(self.ids) and self.ids[row] == key and self.alive[row]:
+            return row
+        return None
+
+    def _view(self, row: int) -> ItemRow:
+        view = ItemRow()
+        view.id = str(self.ids[row])
+        view.name = self.strings[self.name[row]]
+        view.category = self.categories[self.category[row]]
+        view.purchaseDate = from_epoch_days(self.purchased[row])
+        view.quantity = None if self.quantity[row] == NULL else self.quantity[row]
+        view.notes = self.strings[self.notes[row]]
+        view.manufacturedDate = from_epoch_days(self.manufactured[row])
+        view.createdAt = datetime.utcfromtimestamp(self.created[row]).isoformat() if self.created[row] else None
+        return view
+
+    def _write(self, row: int, fields: dict) -> None:
+        """
+        Encode fields into a row, all or nothing: every value (and the safe
+        expiry they imply) is worked out before any column changes (caller
+        holds the lock).
+
+        Raises:
+            ValueError: For a null required field or an unparseable value
+        """
+        for field in REQUIRED_FIELDS:
+            if field in fields and fields[field] is None:
+                raise ValueError(f"{field} must not be null")
+        encoded = []
+        if "name" in fields:
+            encoded.append((self.name, self._intern(fields["name"])))
+        if "category" in fields:
+            encoded.append((self.category, self._category_code(fields["category"])))
+        if "purchaseDate" in fields:
+            encoded.append((self.purchased, to_epoch_days(fields["purchaseDate"])))
+        if "manufacturedDate" in fields:
+            encoded.append((self.manufactured, to_epoch_days(fields["manufacturedDate"])))
+        if "quantity" in fields:
+            quantity = fields["quantity"]
+            if quantity is not None and not NULL < quantity < 2 ** 31:
+                raise ValueError("quantity out of range")
+            encoded.append((self.quantity, NULL if quantity is None else quantity))
+        if "notes" in fields:
+            encoded.append((self.notes, self._intern(fields["notes"])))
+        if fields.keys() & {"name", "category", "purchaseDate", "manufacturedDate"}:
+            pending = {id(column): value for column, value in encoded}
+
+            def value(column: array) -> int:
+                return pending.get(id(column), column[row])
+
+            encoded.append((self.expiry, self._safe_expiry(
+                value(self.category), value(self.name), value(self.purchased), value(self.manufactured)
+            )))
+        for column, encoded_value in encoded:
+            column[row] = encoded_value
+
+    def _safe_expiry(self, category: int, name: int, purchased: int, manufactured: int) -> int:
+        """Safe expiry epoch day from encoded column values."""
+        store_delay, shelf_days = self.expiry_offsets(self.categories[category], self.strings[name] or "")
+        if manufactured == NULL:
+            if purchased == NULL:
+                return NULL
+            manufactured = purchased - store_delay
+        return manufactured + shelf_days
+
+    def _track(self, row: int, delta: int) -> None:
+        """Add (+1) or remove (-1) a live row from the indexes and aggregates (caller holds the lock)."""
+        key = self.ids[row]
+        if delta > 0:
+            self.by_category.setdefault(self.category[row], set()).add(key)
+            insort(self.by_name, key, key=self._name_key)
+            insort(self.by_quantity, key, key=self._quantity_key)
+        else:
+            self.by_category[self.category[row]].discard(key)
+            del self.by_name[bisect_left(self.by_name, self._name_key(key), key=self._name_key)]
+            del self.by_quantity[bisect_left(self.by_quantity, self._quantity_key(key), key=self._quantity_key)]
+
+        day = self.expiry[row]
+        if day == NULL:
+            self.undated += delta
+            return
+        self.expiry_days[day] += delta
+        if not self.expiry_days[day]:
+            del self.expiry_days[day]
+        offset = day - self.stats_day
+        if offset < 0:
+            self.expired += delta
+        elif offset < STATS_HISTOGRAM_DAYS:
+            self.window[offset] += delta
+        else:
+            self.later += delta
+
+    def _roll(self, today: int) -> None:
+        """Re-bucket the histogram for a new day: O(days passed), not O(items)."""
+        days = today - self.stats_day
+        if days == 0:
+            return
+        if 0 < days < STATS_HISTOGRAM_DAYS:
+            self.expired += sum(self.window[:days])
+            first_new = self.stats_day + STATS_HISTOGRAM_DAYS
+            arriving = [self.expiry_days.get(day, 0) for day in range(first_new, first_new + days)]
+            self.window = self.window[days:] + arriving
+            self.later -= sum(arriving)
+        else:
+            # Long gap or clock moved back: rebuild from the per-day counts
+            self.expired = self.later = 0
+            self.window = [0] * STATS_HISTOGRAM_DAYS
+            for day, count in self.expiry_days.items():
+                offset = day - today
+                if offset < 0:
+                    self.expired += count
+                elif offset < STATS_HISTOGRAM_DAYS:
+                    self.window[offset] += count
+                else:
+                    self.later += count
+        self.stats_day = today
+
+    def stats(self, today: int) -> dict:
+        """
+        Inventory aggregates as of epoch day `today`, in O(categories + histogram days).
+
+        Returns:
+            {"total", "byCategory", "expired", "expiringToday", "expiringThisWeek",
+            "histogram": counts for 0..N-1 days to safe expiry, "later", "undated"}
+        """
+        with self.lock:
+            self._roll(today)
+            return {
+                "total": self.live,
+                "byCategory": {self.categories[code]: len(ids) for code, ids in self.by_category.items() if ids},
+                "expired": self.expired,
+                "expiringToday": self.window[0],
+                "expiringThisWeek": sum(self.window[:7]),
+                "histogram": list(self.window),
+                "later": self.later,
+                "undated": self.undated,
+            }
+
+    def add(self, item: dict) -> ItemRow:
+        """Store a new item, assigning the next id in this shard."""
+        missing = [field for field in REQUIRED_FIELDS if item.get(field) is None]
+        if missing:
+            raise ValueError(f"Missing required fields: {', '.join(missing)}")
+        with self.lock:
+            created = to_epoch_seconds(item.get("createdAt"))
+            row = len(self.ids)
+            for column, blank in (
+                (self.alive, 1), (self.revision, 0), (self.category, 0), (self.purchased, NULL),
+                (self.manufactured, NULL), (self.created, created), (self.quantity, NULL),
+                (self.expiry, NULL), (self.name, 0), (self.notes, 0),
+            ):
+                column.append(blank)
+            self.ids.append(self.counter + 1)
+            try:
+                self._write(row, item)
+            except Exception:
+                self._truncate(row)
+                raise
+            self._track(row, 1)
+            self.counter += 1
+            self.live += 1
+            item_id = str(self.counter)
+            self._record("add", item_id, row)
+            return self._view(row)
+
+    def _truncate(self, length: int) -> None:
+        for column in self._columns():
+            del column[length:]
+
+    def _columns(self) -> Tuple[array, ...]:
+        return (self.ids, self.alive, self.revision, self.category, self.purchased,
+                self.manufactured, self.created, self.quantity, self.expiry, self.name, self.notes)
+
+    def update(self, item_id: str, fields: dict) -> Optional[ItemRow]:
+        """Apply field changes to an item. Returns None if it doesn't exist."""
+        with self.lock:
+            row = self._row(item_id)
+            if row is None:
+                return None
+            self._track(row, -1)
+            try:
+                self._write(row, fields)
+            finally:
+                self._track(row, 1)
+            self.encoded.discard((self.owner, item_id))
+            self._record("update", item_id, row)
+            return self._view(row)
+
+    def get(self, item_id: str) -> Optional[ItemRow]:
+        with self.lock:
+            row = self._row(item_id)
+            return None if row is None else self._view(row)
+
+    def delete(self, item_id: str) -> bool:
+        """Tombstone an item. Returns False if it didn't exist."""
+        with self.lock:
+            row = self._row(item_id)
+            if row is None:
+                return False
+            self._remove(row)
+            if len(self.ids) - self.live > max(64, self.live):
+                self.compact()
+            return True
+
+    def _remove(self, row: int) -> None:
+        """Tombstone a live row, logging a delete (caller holds the lock)."""
+        item_id = str(self.ids[row])
+        self._track(row, -1)
+        self.alive[row] = 0
+        self.live -= 1
+        self.encoded.discard((self.owner, item_id))
+        self._record("delete", item_id, row)
+
+    def archive_expired(self, cutoff_day: int, store: Callable[[List[Tuple[ItemRow, int]]], None]) -> int:
+        """
+        Move items whose safe expiry is on or before `cutoff_day` out of the shard.
+
+        Args:
+            cutoff_day: Last safe expiry epoch day to archive
+            store: Persists (item, safe expiry day) pairs; if it raises,
+                nothing is removed
+
+        Returns:
+            Number of items archived (they appear as deletes in the change log)
+        """
+        with self.lock:
+            if not self.expiry_days or min(self.expiry_days) > cutoff_day:
+                return 0
+            rows = [
+                row for row in self._live_rows_newest_first()
+                if self.expiry[row] != NULL and self.expiry[row] <= cutoff_day
+            ]
+            store([(self._view(row), self.expiry[row]) for row in rows])
+            for row in rows:
+                self._remove(row)
+            # Release the rows now rather than waiting for enough tombstones
+            self.compact()
+            return len(rows)
+
+    def compact(self) -> None:
+        """Drop tombstoned rows and strings no live row uses."""
+        with self.lock:
+            keep = [row for row in range(len(self.ids)) if self.alive[row]]
+            old = self._columns()
+            old_strings = self.strings
+            self._init_columns()
+            for old_column, new_column in zip(old, self._columns()):
+                new_column.extend(old_column[row] for row in keep)
+            self.name = array("I", (self._intern(old_strings[index]) for index in self.name))
+            self.notes = array("I", (self._intern(old_strings[index]) for index in self.notes))
+
+    def _record(self, op: str, item_id: str, row: int) -> None:
+        """Bump the version and log a change (caller holds the lock)."""
+        self.version += 1
+        self.revision[row] = self.version
+        self.changes.append((self.version, op, item_id))
+
+    def changes_since(self, since: int) -> Optional[List[Tuple[int, str, str]]]:
+        """
+        Changes after sequence number `since`, collapsed to the latest per item.
+
+        Returns:
+            List of (seq, op, item_id) in sequence order, or None when `since`
+            has aged out of the log (or is from the future) and the client
+            must resync in full
+        """
+        with self.lock:
+            oldest_known = self.changes[0][0] - 1 if self.changes else self.version
+            if since < oldest_known or since > self.version:
+                return None
+            latest: Dict[str, Tuple[int, str, str]] = {}
+            for change in self.changes:
+                if change[0] > since:
+                    latest[change[2]] = change
+            return sorted(latest.values())
+
+    def etag(self, day: int, variant: str = "") -> str:
+        """
+        Strong ETag for the item list (days-left changes daily, so the day is
+        part of it; `variant` tells projections of the same data apart).
+        """
+        return f'"{self.instance}-{self.version}-{day}{variant}"'
+
+    def item_etag(self, item_id: str, day: int, variant: str = "") -> Optional[str]:
+        """Strong ETag for a single item, or None if it doesn't exist."""
+        with self.lock:
+            row = self._row(item_id)
+            if row is None:
+                return None
+            return f'"{self.instance}-{item_id}.{self.revision[row]}-{day}{variant}"'
+
+    def _live_rows_newest_first(self) -> Iterator[int]:
+        alive = self.alive
+        return (row for row in range(len(alive) - 1, -1, -1) if alive[row])
+
+    def list(self) -> List[ItemRow]:
+        """Snapshot of the items, newest first."""
+        with self.lock:
+            return [self._view(row) for row in self._live_rows_newest_first()]
+
+    def _name_range(self, prefix: str) -> Iterable[int]:
+        """Ids whose casefolded name starts with `prefix` (caller holds the lock)."""
+        prefix = prefix.casefold()
+        lo = bisect_left(self.by_name, (prefix, 0), key=self._name_key)
+        hi = bisect_left(self.by_name, (prefix + "\U0010ffff", 0), key=self._name_key)
+        return self.by_name[lo:hi]
+
+    def _quantity_range(self, low: Optional[int], high: Optional[int]) -> Iterable[int]:
+        """Ids with low <= quantity <= high; items without a quantity never match (caller holds the lock)."""
+        lo = bisect_left(self.by_quantity, (NULL + 1 if low is None else max(low, NULL + 1), 0), key=self._quantity_key)
+        hi = len(self.by_quantity) if high is None else bisect_left(self.by_quantity, (high + 1, 0), key=self._quantity_key)
+        return self.by_quantity[lo:hi]
+
+    def query_encoded(
+        self,
+        encode: Callable[[ItemRow], Tuple],
+        category: Optional[str] = None,
+        prefix: Optional[str] = None,
+        min_quantity: Optional[int] = None,
+        max_quantity: Optional[int] = None,
+        sort: str = "newest",
+        offset: int = 0,
+        limit: int = 50,
+    ) -> Tuple[int, List[Tuple]]:
+        """
+        Filtered, sorted page of cached item encodings.
+
+        Each filter resolves to an id set through its index and the sets
+        are intersected smallest first, so the cost follows the size of the
+        matches rather than of the inventory.
+
+        Args:
+            encode: Builds an item's cached encoding on a miss
+            category: Category, case-insensitive
+            prefix: Case-insensitive name prefix
+            min_quantity, max_quantity: Inclusive quantity bounds
+            sort: "newest", "oldest", "name", "quantity" or "-quantity"
+            offset, limit: Page of the sorted matches
+
+        Returns:
+            (total number of matches, encodings of the page)
+        """
+        with self.lock:
+            total, page = self._query_page(category, prefix, min_quantity, max_quantity, sort, offset, limit)
+            return total, [self._encoded(self._row_of(key), encode) for key in page]
+
+    def query_projected(
+        self, fields: Tuple[str, ...], compact: bool, derive: Optional[Derive] = None, **filters
+    ) -> Tuple[int, List[dict]]:
+        """Like query_encoded, but returning projections (see `projected`)."""
+        with self.lock:
+            total, page = self._query_page(**filters)
+            return total, [self._project(self._row_of(key), fields, compact, derive) for key in page]
+
+    def _query_page(
+        self,
+        category: Optional[str] = None,
+        prefix: Optional[str] = None,
+        min_quantity: Optional[int] = None,
+        max_quantity: Optional[int] = None,
+        sort: str = "newest",
+        offset: int = 0,
+        limit: int = 50,
+    ) -> Tuple[int, List[int]]:
+        """(total matches, ids of the requested page) - caller holds the lock."""
+        filters: List[Set[int]] = []
+        if category is not None:
+            code = self.category_codes.get(" ".join(category.split()).casefold())
+            filters.append(set(self.by_category.get(code, ())))
+        if prefix:
+            filters.append(set(self._name_range(prefix)))
+        if min_quantity is not None or max_quantity is not None:
+            filters.append(set(self._quantity_range(min_quantity, max_quantity)))
+
+        if sort == "name":
+            order: Iterable[int] = self.by_name
+        elif sort == "quantity":
+            order = self.by_quantity
+        elif sort == "-quantity":
+            order = reversed(self.by_quantity)
+        else:
+            rows = range(len(self.ids)) if sort == "oldest" else range(len(self.ids) - 1, -1, -1)
+            order = (self.ids[row] for row in rows if self.alive[row])
+
+        if filters:
+            filters.sort(key=len)
+            matches = filters[0].intersection(*filters[1:])
+            total = len(matches)
+            if total * 8 < self.live:
+                # Few matches: sorting them beats walking the whole order
+                sort_key = self._name_key if sort == "name" else (
+                    self._quantity_key if sort in ("quantity", "-quantity") else None
+                )
+                ordered = sorted(matches, key=sort_key, reverse=sort not in ("name", "quantity", "oldest"))
+                page = ordered[offset:offset + limit]
+            else:
+                page = list(islice((key for key in order if key in matches), offset, offset + limit))
+        else:
+            total = self.live
+            page = list(islice(order, offset, offset + limit))
+        return total, page
+
+    def _encoded(self, row: int, encode: Callable[[ItemRow], Tuple]) -> Tuple:
+        """Cached encoding of a live row, building it with `encode` on a miss (caller holds the lock)."""
+        key = (self.owner, str(self.ids[row]))
+        cached = self.encoded.get(key)
+        if cached is None:
+            cached = encode(self._view(row))
+            self.encoded.put(key, cached)
+        return cached
+
+    def get_encoded(self, item_id: str, encode: Callable[[ItemRow], Tuple]) -> Optional[Tuple]:
+        """Cached encoding of one item, building it with `encode` on a miss."""
+        with self.lock:
+            row = self._row(item_id)
+            return None if row is None else self._encoded(row, encode)
+
+    def list_encoded(self, encode: Callable[[ItemRow], Tuple]) -> List[Tuple]:
+        """Cached encodings of all items, newest first."""
+        with self.lock:
+            return [self._encoded(row, encode) for row in self._live_rows_newest_first()]
+
+    def _project(self, row: int, fields: Tuple[str, ...], compact: bool, derive: Optional[Derive]) -> dict:
+        """
+        One row reduced to `fields`, converting only those columns (caller
+        holds the lock). Compact dates stay epoch days (createdAt epoch seconds).
+        """
+        item = {"id": str(self.ids[row])}
+        for field in fields:
+            if field == "name":
+                item["name"] = self.strings[self.name[row]]
+            elif field == "category":
+                item["category"] = self.categories[self.category[row]]
+            elif field == "quantity":
+                item["quantity"] = None if self.quantity[row] == NULL else self.quantity[row]
+            elif field == "notes":
+                item["notes"] = self.strings[self.notes[row]]
+            elif field in ("purchaseDate", "manufacturedDate"):
+                days = (self.purchased if field == "purchaseDate" else self.manufactured)[row]
+                item[field] = (None if days == NULL else days) if compact else from_epoch_days(days)
+            elif field == "createdAt":
+                created = self.created[row]
+                if compact:
+                    item["createdAt"] = created or None
+                else:
+                    item["createdAt"] = datetime.utcfromtimestamp(created).isoformat() if created else None
+        if derive is not None:
+            item.update(derive(lambda: self._view(row), self.expiry[row]))
+        return item
+
+    def projected(self, fields: Tuple[str, ...], compact: bool, derive: Optional[Derive] = None) -> List[dict]:
+        """
+        All items, newest first, with just the requested fields.
+
+        Args:
+            fields: Stored fields to include ("id" is always included)
+            compact: Dates as epoch days instead of ISO strings
+            derive: Adds computed fields; gets a function building the full
+                view (called only if needed) and the safe expiry day
+        """
+        with self.lock:
+            return [self._project(row, fields, compact, derive) for row in self._live_rows_newest_first()]
+
+    def get_projected(
+        self, item_id: str, fields: Tuple[str, ...], compact: bool, derive: Optional[Derive] = None
+    ) -> Optional[dict]:
+        """One item with just the requested fields (see `projected`), or None."""
+        with self.lock:
+            row = self._row(item_id)
+            return None if row is None else self._project(row, fields, compact, derive)
+
+    def expiring(self, cutoff_day: int, from_day: Optional[int] = None) -> List[ItemRow]:
+        """
+        Items whose safe expiry falls on or before `cutoff_day` (and, if given,
+        on or after `from_day`; epoch days), found by scanning the expiry
+        column without building a view per row.
+        """
+        with self.lock:
+            if not self.expiry_days or min(self.expiry_days) > cutoff_day:
+                return []
+            low = NULL + 1 if from_day is None else from_day
+            if max(self.expiry_days) < low:
+                return []
+            expiry = self.expiry
+            return [
+                self._view(row) for row in self._live_rows_newest_first()
+                if expiry[row] != NULL and low <= expiry[row] <= cutoff_day
+            ]
+
+
+class ItemStore:
+    """Registry of per-user inventory shards."""
+
+    def __init__(self, expiry_offsets: Callable[[str, str], Tuple[int, int]]):
+        # Offsets depend only on (category, name), so shards share one memo
+        self.expiry_offsets = lru_cache(maxsize=4096)(expiry_offsets)
+        self.encoded = EncodedCache()
+        self._shards: Dict[str, InventoryShard] = {}
+        self._lock = threading.Lock()
+
+    def shard(self, owner: str) -> InventoryShard:
+        """Get (or create) the shard for an owner."""
+        shard = self._shards.get(owner)
+        if shard is None:
+            with self._lock:
+                shard = self._shards.setdefault(owner, InventoryShard(owner, self.expiry_offsets, self.encoded))
+        return shard
+
+    def shards(self) -> List[InventoryShard]:
+        with self._lock:
+            return list(self._shards.values())
+
+    def count(self) -> int:
+        """Total number of items across all shards."""
+        return sum(len(shard) for shard in self.shards())
@@ -0,0 +1,134 @@
+"""
+Shared async OpenRouter client.
+A single AsyncOpenAI instance (one connection pool) is reused by every
+request, so concurrent generations never block the event loop.
+"""
+
+import os
+import time
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Callable, Optional
+
+from services.llm_ledger import ledger, prompt_hash
+
+BASE_URL = os.getenv("OPENROUTER_BASE", "https://openrouter.ai/api/v1")
+RECIPE_MODEL = os.getenv("OPENROUTER_MODEL", "x-ai/grok-4.1-fast:free")
+
+# Completions currently awaiting OpenRouter (background work waits for 0)
+_in_flight = 0
+
+
+def in_flight() -> int:
+    """Number of chat completions currently in progress."""
+    return _in_flight
+
+
+# time.monotonic() deadline of the request being served (set by admission control)
+request_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """The request's deadline passed before the LLM call could be made."""
+
+
+@lru_cache(maxsize=1)
+def get_async_client():
+    """Get the shared async OpenRouter client (created on first use)."""
+    api_key = os.getenv("OPENROUTER_API_KEY")
+    if not api_key:
+        raise ValueError("OPENROUTER_API_KEY not set in environment")
+    # Imported lazily so cold starts don't pay for the openai package
+    from openai import AsyncOpenAI
+    return AsyncOpenAI(api_key=api_key, base_url=BASE_URL)
+
+
+def _usage(response) -> Optional[dict]:
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return None
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", None),
+        "completion_tokens": getattr(usage, "completion_tokens", None),
+        "total_tokens": getattr(usage, "total_tokens", None),
+    }
+
+
+async def chat_completion(
+    messages: list,
+    max_tokens: int = 1500,
+    temperature: float = 0.8,
+    model: str = RECIPE_MODEL,
+    parse: Optional[Callable[[str], Any]] = None,
+) -> Any:
+    """
+    Run one chat completion and return the raw text of the first choice.
+
+    Args:
+        messages: OpenAI-style chat messages
+        max_tokens: Completion token limit
+        temperature: Sampling temperature
+        model: OpenRouter model id
+        parse: Optional parser applied to the text; its result is returned
+            instead, and whether it succeeded goes into the call ledger
+
+    Returns:
+        Stripped completion text (or the parsed result)
+
+    Raises:
+        DeadlineExceeded: If the current request's deadline has already passed
+        LookupError: In ledger replay mode, if the prompt was never recorded
+    """
+    global _in_flight
+    key = prompt_hash(model, messages, max_tokens, temperature) if ledger.mode != "off" else None
+    if ledger.replaying:
+        entry = await ledger.replay(key)
+        return parse(entry["output"]) if parse else entry["output"]
+
+    # Whatever is left of the request deadline becomes the upstream timeout
+    options = {}
+    deadline = request_deadline.get()
+    if deadline is not None:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded("Request deadline passed before the LLM call")
+        options["timeout"] = remaining
+
+    client = get_async_client()
+    entry = {"ts": time.time(), "key": key, "model": model, "parser": getattr(parse, "__name__", None)}
+    started = time.perf_counter()
+    _in_flight += 1
+    try:
+        response = await client.chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            **options,
+        )
+    except Exception as e:
+        if ledger.recording:
+            ledger.record({**entry, "latencyMs": round((time.perf_counter() - started) * 1000, 1), "error": str(e), "messages": messages})
+        raise
+    finally:
+        _in_flight -= 1
+    text = (response.choices[0].message.content or "").strip()
+    if not ledger.recording:
+        return parse(text) if parse else text
+
+    entry.update(
+        latencyMs=round((time.perf_counter() - started) * 1000, 1),
+        usage=_usage(response),
+        messages=messages,
+        output=text,
+        parse=None,
+    )
+    try:
+        result = parse(text) if parse else text
+        entry["parse"] = "ok" if parse else None
+        return result
+    except Exception as e:
+        entry["parse"] = f"error: {str(e)}"
+        raise
+    finally:
+        ledger.record(entry)
@@ -0,0 +1,176 @@
+"""
+Append-only ledger of LLM calls, with offline replay.
+Record mode is the default: every chat completion is written to an NDJSON file with its
+prompt hash, model, latency, token usage, raw output and parse outcome. In
+replay mode completions are served from that file instead of OpenRouter, so
+parsing, caching and end-to-end latency can be benchmarked repeatably.
+
+Usage:
+    python -m services.llm_ledger stats
+    python -m services.llm_ledger reparse [--repeat 100]
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# off | record | replay
+LLM_LEDGER_MODE = os.getenv("LLM_LEDGER_MODE", "record").lower()
+LLM_LEDGER_PATH = os.getenv("LLM_LEDGER_PATH", os.path.join(BACKEND_DIR, "data", "llm_ledger.ndjson"))
+# none: replayed completions return immediately; recorded: sleep for the recorded latency
+LLM_REPLAY_LATENCY = os.getenv("LLM_REPLAY_LATENCY", "none").lower()
+
+
+def prompt_hash(model: str, messages: list, max_tokens: int, temperature: float) -> str:
+    """Stable key for a request: same model, messages and sampling settings -> same hash."""
+    canonical = json.dumps(
+        {"model": model, "messages": messages, "max_tokens": max_tokens, "temperature": temperature},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()[:24]
+
+
+def read_entries(path: str = LLM_LEDGER_PATH) -> List[dict]:
+    """All ledger entries (skipping lines cut short by a crash)."""
+    entries = []
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return entries
+
+
+class Ledger:
+    def __init__(self, mode: str = LLM_LEDGER_MODE, path: str = LLM_LEDGER_PATH):
+        self.mode = mode
+        self.path = path
+        self._lock = threading.Lock()
+        # Report an unwritable ledger (e.g. read-only serverless filesystem) once, not per call
+        self._write_failed = False
+        # Replay: prompt hash -> recorded successful entries, served round-robin
+        self._recorded: Optional[Dict[str, List[dict]]] = None
+        self._replayed: Dict[str, int] = defaultdict(int)
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def record(self, entry: dict) -> None:
+        """Append one entry to the ledger."""
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line)
+            except OSError as e:
+                if not self._write_failed:
+                    self._write_failed = True
+                    print(f"LLM ledger write failed, further failures not reported: {e}")
+
+    async def replay(self, key: str) -> dict:
+        """
+        Recorded entry for a prompt hash (rotating through repeat recordings).
+
+        Raises:
+            LookupError: If the prompt was never recorded
+        """
+        with self._lock:
+            if self._recorded is None:
+                self._recorded = defaultdict(list)
+                for entry in read_entries(self.path):
+                    if entry.get("error") is None and entry.get("output") is not None:
+                        self._recorded[entry["key"]].append(entry)
+            recordings = self._recorded.get(key)
+            if not recordings:
+                raise LookupError(f"No recorded completion for prompt {key} in {self.path}")
+            entry = recordings[self._replayed[key] % len(recordings)]
+            self._replayed[key] += 1
+        if LLM_REPLAY_LATENCY == "recorded":
+            await asyncio.sleep(entry.get("latencyMs", 0) / 1000)
+        return entry
+
+
+ledger = Ledger()
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+def print_stats(entries: List[dict]) -> None:
+    by_model: Dict[str, List[dict]] = defaultdict(list)
+    for entry in entries:
+        by_model[entry.get("model", "?")].append(entry)
+    print(f"{len(entries)} calls, {len({entry['key'] for entry in entries})} distinct prompts")
+    for model, calls in by_model.items():
+        latencies = [call.get("latencyMs", 0) for call in calls]
+        usage = [call.get("usage") or {} for call in calls]
+        errors = sum(1 for call in calls if call.get("error"))
+        parse_failures = sum(1 for call in calls if call.get("parse") not in (None, "ok"))
+        print(f"\n{model}")
+        print(f"  calls {len(calls)}  errors {errors}  parse failures {parse_failures}")
+        print(f"  latency ms  p50 {_percentile(latencies, 0.5):.0f}  p95 {_percentile(latencies, 0.95):.0f}  max {max(latencies):.0f}")
+        print(f"  tokens  prompt {sum(u.get('prompt_tokens') or 0 for u in usage)}"
+              f"  completion {sum(u.get('completion_tokens') or 0 for u in usage)}")
+
+
+def reparse(entries: List[dict], repeat: int) -> None:
+    """Re-run the current recipe parser over recorded outputs and time it."""
+    from services.openrouter_recipes import parse_recipe_json
+
+    outputs = [entry["output"] for entry in entries if entry.get("parser") == "parse_recipe_json" and entry.get("output")]
+    if not outputs:
+        print("No recorded recipe outputs")
+        return
+    failures = 0
+    for output in outputs:
+        try:
+            parse_recipe_json(output)
+        except Exception:
+            failures += 1
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for output in outputs:
+            try:
+                parse_recipe_json(output)
+            except Exception:
+                pass
+    elapsed = time.perf_counter() - started
+    print(f"{len(outputs)} recipe outputs, {failures} fail to parse with the current parser")
+    print(f"{elapsed / (repeat * len(outputs)) * 1e6:.1f} µs per parse ({repeat} rounds)")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect the LLM call ledger")
+    parser.add_argument("command", choices=["stats", "reparse"])
+    parser.add_argument("--path", default=LLM_LEDGER_PATH)
+    parser.add_argument("--repeat", type=int, default=100, help="reparse rounds")
+    args = parser.parse_args()
+
+    recorded = read_entries(args.path)
+    if not recorded:
+        print(f"No entries in {args.path}")
+    elif args.command == "stats":
+        print_stats(recorded)
+    else:
+        reparse(recorded, args.repeat)
@@ -0,0 +1,139 @@
+"""
+Meal plan generation.
+Plans a grid of day x meal slots, spreads soon-to-expire pantry items over
+the earliest slots, fills what it can from the local recipe corpus and
+generates the rest concurrently - identical slot requests share one
+generation, so a week's plan costs a handful of LLM calls running side by side.
+"""
+
+import os
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from services import recipe_corpus
+from services.openrouter_recipes import build_preference_context, generate_recipes_concurrently
+
+MEALS_BY_COUNT = {
+    1: ["dinner"],
+    2: ["lunch", "dinner"],
+    3: ["breakfast", "lunch", "dinner"],
+    4: ["breakfast", "lunch", "snack", "dinner"],
+}
+
+# Generations in flight per meal plan
+MEAL_PLAN_CONCURRENCY = int(os.getenv("MEAL_PLAN_CONCURRENCY", "4"))
+# Distinct recipes generated for otherwise identical slots (e.g. 7 plain breakfasts)
+MEAL_PLAN_VARIETY = int(os.getenv("MEAL_PLAN_VARIETY", "3"))
+# Pantry items assigned to a single slot
+FOCUS_ITEMS_PER_SLOT = 2
+
+
+class MealSlot:
+    __slots__ = ("day", "meal", "focus", "job", "recipe")
+
+    def __init__(self, day: int, meal: str):
+        self.day = day
+        self.meal = meal
+        self.focus: List[str] = []
+        self.job: Optional[Tuple] = None     # key of the generation this slot waits on
+        self.recipe: Optional[dict] = None   # set directly for corpus recipes
+
+    def summary(self) -> dict:
+        return {
+            "day": self.day,
+            "meal": self.meal,
+            "focus": self.focus,
+            "source": "corpus" if self.recipe is not None else "generated",
+        }
+
+
+def _assign_pantry(slots: List[MealSlot], pantry: List[Tuple[str, int]]) -> None:
+    """Give the most urgent pantry items to the earliest slots that come before their expiry."""
+    candidates = [slot for slot in slots if slot.meal != "breakfast"] or slots
+    for name, days_left in sorted(pantry, key=lambda entry: entry[1]):
+        for slot in candidates:
+            if slot.day > max(days_left, 0):
+                break
+            if len(slot.focus) < FOCUS_ITEMS_PER_SLOT:
+                slot.focus.append(name)
+                break
+
+
+def _build_prompt(meal: str, focus: List[str], preferences: dict, variant: int) -> str:
+    prompt = f"Generate a {meal} recipe for a weekly meal plan."
+    prompt += build_preference_context({k: v for k, v in preferences.items() if k != "food_category"})
+    if focus:
+        prompt += f"\nIt must use these pantry ingredients that expire soon: {', '.join(focus)}"
+    if variant:
+        prompt += f"\nThis is {meal} idea #{variant + 1} in the plan - make it clearly different from the others."
+    prompt += "\n\nReturn a complete recipe in the JSON format specified."
+    return prompt
+
+
+def plan_meals(
+    days: int,
+    meals_per_day: int,
+    preferences: dict,
+    pantry: List[Tuple[str, int]],
+    use_corpus: bool = True,
+) -> Tuple[List[MealSlot], Dict[Tuple, str]]:
+    """
+    Lay out meal slots and decide how each one is filled.
+
+    Args:
+        days: Number of days to plan
+        meals_per_day: 1-4 meals per day
+        preferences: RecipePreferences-style dict
+        pantry: (item name, days left) for inventory items to use up
+        use_corpus: Reuse local corpus recipes where they fit
+
+    Returns:
+        (slots, prompts) - prompts maps each unique generation key to its
+        prompt; slots either carry a corpus recipe or point at a key
+    """
+    meals = MEALS_BY_COUNT[meals_per_day]
+    slots = [MealSlot(day, meal) for day in range(days) for meal in meals]
+    _assign_pantry(slots, pantry)
+
+    # Each corpus recipe is used at most once per plan, only for slots with no pantry focus
+    used_corpus = set()
+    prompts: Dict[Tuple, str] = {}
+    occurrences: Dict[Tuple, int] = defaultdict(int)
+    for slot in slots:
+        if use_corpus and not slot.focus:
+            for entry in recipe_corpus.find_recipes(slot.meal, preferences):
+                if entry.get("id") not in used_corpus:
+                    used_corpus.add(entry.get("id"))
+                    slot.recipe = recipe_corpus.to_recipe(entry)
+                    break
+            if slot.recipe is not None:
+                continue
+
+        # Identical requests share a generation, up to MEAL_PLAN_VARIETY variants
+        base_key = (slot.meal, tuple(sorted(name.lower() for name in slot.focus)))
+        variant = occurrences[base_key] % max(MEAL_PLAN_VARIETY, 1)
+        occurrences[base_key] += 1
+        slot.job = base_key + (variant,)
+        if slot.job not in prompts:
+            prompts[slot.job] = _build_prompt(slot.meal, slot.focus, preferences, variant)
+
+    return slots, prompts
+
+
+async def fill_slots(slots: List[MealSlot], prompts: Dict[Tuple, str]):
+    """
+    Produce recipes for every slot, corpus slots first, then generations as they finish.
+
+    Yields:
+        (slot, recipe, error) for each slot
+    """
+    waiting: Dict[Tuple, List[MealSlot]] = defaultdict(list)
+    for slot in slots:
+        if slot.recipe is not None:
+            yield slot, slot.recipe, None
+        else:
+            waiting[slot.job].append(slot)
+
+    async for job, recipe, error in generate_recipes_concurrently(prompts, MEAL_PLAN_CONCURRENCY):
+        for slot in waiting[job]:
+            yield slot, recipe, error
@@ -3,23 +3,7 @@ OpenRouter service for generating expiry advice and recipes.
 Uses LLM to provide friendly suggestions for near-expiry items.
 """
 
-import os
-from openai import OpenAI
-
-# Initialize OpenRouter client - API key is loaded from .env via main.py
-API_KEY = os.getenv("OPENROUTER_API_KEY")
-BASE_URL = os.getenv("OPENROUTER_BASE", "https://openrouter.ai/api/v1")
-MODEL = os.getenv("OPENROUTER_MODEL", "x-ai/grok-4.1-fast:free")
-
-def get_openrouter_client():
-    """Get OpenRouter client with current API key"""
-    api_key = os.getenv("OPENROUTER_API_KEY")
-    if not api_key:
-        raise ValueError("OPENROUTER_API_KEY not set in environment")
-    return OpenAI(
-        api_key=api_key,
-        base_url=BASE_URL
-    )
+from services.llm_client import chat_completion
 
 async def generate_advice_for_item(item_name: str, category: str, days_left: int) -> str:
     """
@@ -51,15 +35,11 @@ Format your response in a structured way with clear sections.
 """
 
     try:
-        client = get_openrouter_client()
-        response = client.chat.completions.create(
-            model=MODEL,
-            messages=[{"role": "user", "content": prompt}],
+        return await chat_completion(
+            [{"role": "user", "content": prompt}],
             max_tokens=450,
-            temperature=0.7
+            temperature=0.7,
         )
-        
-        return response.choices[0].message.content
     except Exception as e:
         return f"Error generating advice: {str(e)}"
 
@@ -97,14 +77,10 @@ Be creative but practical. Focus on flavor combinations that work well together.
 """
 
     try:
-        client = get_openrouter_client()
-        response = client.chat.completions.create(
-            model=MODEL,
-            messages=[{"role": "user", "content": prompt}],
+        return await chat_completion(
+            [{"role": "user", "content": prompt}],
             max_tokens=600,
-            temperature=0.8
+            temperature=0.8,
         )
-        
-        return response.choices[0].message.content
     except Exception as e:
         return f"Error generating recipes: {str(e)}"
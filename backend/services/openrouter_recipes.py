@@ -0,0 +1,209 @@
+"""
+OpenRouter service for structured recipe generation.
+Shared prompt, parsing and post-processing used by the recipe endpoints,
+the meal planner and other callers that need recipe JSON from the LLM.
+"""
+
+import asyncio
+import json
+import urllib.parse
+from typing import Optional
+
+from services.llm_client import chat_completion
+from services.recipe_store import recipe_store
+from utils.nutrition import add_nutrition
+
+# Standard JSON recipe prompt used by free-form generation
+RECIPE_SYSTEM_PROMPT = """You are a helpful chef assistant. Return ONLY valid JSON following EXACTLY this structure:
+{
+  "title": "Recipe Name",
+  "subtitle": "A brief tagline",
+  "description": "A paragraph describing the dish",
+  "servings": "4",
+  "time": "30 minutes",
+  "ingredients": [
+    { "name": "ingredient name", "amount": "1 cup" }
+  ],
+  "steps": [
+    "Step 1 instruction",
+    "Step 2 instruction"
+  ],
+  "suggestions": [
+    "Tip 1",
+    "Tip 2"
+  ],
+  "youtubeLinks": []
+}
+
+Rules:
+- DO NOT include any text before or after the JSON.
+- DO NOT return markdown code blocks.
+- Fill every field with meaningful content.
+- Include at least 5-8 ingredients and 4-6 steps."""
+
+# Stricter variant used for preference-based generation
+STRUCTURED_SYSTEM_PROMPT = """Return ONLY valid JSON following EXACTLY this structure:
+{
+  "title": "",
+  "subtitle": "",
+  "description": "",
+  "servings": "",
+  "time": "",
+  "ingredients": [
+    { "name": "", "amount": "" }
+  ],
+  "steps": [
+    ""
+  ],
+  "suggestions": [
+    ""
+  ],
+  "youtubeLinks": []
+}
+
+Rules:
+- DO NOT include any text before or after the JSON.
+- DO NOT return markdown.
+- Fill every field with meaningful content."""
+
+
+def parse_recipe_json(raw_output: str) -> dict:
+    """
+    Parse recipe JSON from an LLM completion.
+
+    Strips markdown code fences and falls back to the outermost {...} block.
+
+    Raises:
+        ValueError: If no JSON object can be recovered
+    """
+    # Clean up markdown code blocks if present
+    if raw_output.startswith("```"):
+        lines = raw_output.split("\n")
+        raw_output = "\n".join(lines[1:-1] if lines[-1] == "```" else lines[1:])
+
+    try:
+        return json.loads(raw_output)
+    except json.JSONDecodeError:
+        # Safety fallback - try to extract JSON
+        json_start = raw_output.find("{")
+        json_end = raw_output.rfind("}") + 1
+        if json_start >= 0 and json_end > json_start:
+            return json.loads(raw_output[json_start:json_end])
+        raise ValueError("Could not parse recipe JSON from response")
+
+
+def add_youtube_links(recipe: dict) -> dict:
+    """Add YouTube search links based on the recipe title."""
+    recipe_title = recipe.get("title", "recipe")
+    search_query = urllib.parse.quote(f"{recipe_title} recipe tutorial")
+    recipe["youtubeLinks"] = [
+        f"https://www.youtube.com/results?search_query={search_query}"
+    ]
+    return recipe
+
+
+async def generate_recipe(user_prompt: str, system_prompt: str = RECIPE_SYSTEM_PROMPT) -> dict:
+    """
+    Generate one recipe as parsed JSON with YouTube links and a nutrition estimate added.
+
+    The recipe is saved to the recipe store; if an equivalent recipe is
+    already stored, that copy (and its id) is returned instead.
+
+    Args:
+        user_prompt: What to cook
+        system_prompt: JSON structure instructions
+
+    Returns:
+        Recipe dictionary with its store "id"
+    """
+    recipe_json = await chat_completion(
+        [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ],
+        max_tokens=1500,
+        temperature=0.8,
+        parse=parse_recipe_json,
+    )
+    # Saving writes and fsyncs files under the store lock - keep it off the event loop
+    _, recipe = await asyncio.to_thread(recipe_store.put, add_nutrition(add_youtube_links(recipe_json)))
+    return recipe
+
+
+def build_preference_context(preferences: dict) -> str:
+    """Prompt lines for the preference fields that are set (skips empty/"None")."""
+    labels = [
+        ("dietary_type", "Dietary preference"),
+        ("cuisine_type", "Cuisine type"),
+        ("food_category", "Food category"),
+        ("difficulty", "Difficulty level"),
+        ("food_available", "Available ingredients"),
+        ("like_eating", "User likes eating"),
+    ]
+    context = ""
+    for field, label in labels:
+        value = preferences.get(field)
+        if value and value != "None":
+            context += f"\n{label}: {value}"
+    return context
+
+
+def build_query_prompt(query: str, preferences: Optional[dict] = None) -> str:
+    """User prompt for a free-text recipe request, plus any preferences set."""
+    context = build_preference_context(
+        {k: (preferences or {}).get(k) for k in ("dietary_type", "cuisine_type", "food_category", "difficulty")}
+    )
+    return f"""Generate a recipe based on this request: {query}{context}
+
+Return a complete recipe in the JSON format specified."""
+
+
+def build_structured_prompt(preferences: dict) -> str:
+    """User prompt for /api/generate-recipe-structured from a RecipePreferences dict."""
+    dietary_context = build_preference_context(
+        {k: preferences.get(k) for k in ("dietary_type", "cuisine_type", "food_category", "difficulty")}
+    )
+    return f"""Generate a recipe based on these preferences:
+
+Dietary Type: {preferences.get("dietary_type")}
+Cuisine Type: {preferences.get("cuisine_type")}
+Food Category: {preferences.get("food_category")}
+Difficulty: {preferences.get("difficulty")}
+Available Ingredients: {preferences.get("food_available")}
+User Likes Eating: {preferences.get("like_eating")}
+{dietary_context}
+
+Fill all JSON fields meaningfully."""
+
+
+async def generate_recipes_concurrently(prompts: dict, limit: int):
+    """
+    Generate several recipes with at most `limit` LLM calls in flight.
+
+    Args:
+        prompts: Mapping of caller-defined key -> user prompt, or
+            (user prompt, system prompt) to override RECIPE_SYSTEM_PROMPT
+        limit: Maximum concurrent generations
+
+    Yields:
+        (key, recipe, error) tuples in completion order; exactly one of
+        recipe/error is set. Pending generations are cancelled if the
+        consumer stops iterating.
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(key, prompt):
+        user_prompt, system_prompt = prompt if isinstance(prompt, tuple) else (prompt, RECIPE_SYSTEM_PROMPT)
+        async with semaphore:
+            try:
+                return key, await generate_recipe(user_prompt, system_prompt), None
+            except Exception as e:
+                return key, None, str(e)
+
+    tasks = [asyncio.create_task(run(key, prompt)) for key, prompt in prompts.items()]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,156 @@
+"""
+Opt-in request profiling.
+A pure ASGI middleware runs cProfile around a sampled fraction of requests,
+up to the point their response headers are sent, and writes pstats dumps
+(optionally only the slow ones) to a rotating local directory. Only one
+request is profiled at a time (cProfile can't nest, and one profile already
+sees everything the event loop runs meanwhile); stopping at the response
+start keeps long streams from holding the profiler. Settings can be changed
+at runtime through the admin routes.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import random
+import re
+import time
+from typing import List, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROFILE_ENABLED = os.getenv("PROFILE_ENABLED", "false").lower() == "true"
+# Fraction of requests profiled (0-1)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0.01"))
+# Only keep sampled profiles at least this slow to the response start (0 keeps all)
+PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", "0"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(BACKEND_DIR, "data", "profiles"))
+# Oldest dumps beyond this are deleted
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "50"))
+
+# Never profile the profiler's own admin routes
+_EXCLUDED_PREFIX = "/api/admin"
+_SLUG = re.compile(r"[^A-Za-z0-9]+")
+_PROFILE_NAME = re.compile(r"^[\w.-]+\.prof$")
+
+
+class ProfilerSettings:
+    """Runtime-adjustable profiling settings (shared by the middleware and admin routes)."""
+
+    def __init__(self):
+        self.enabled = PROFILE_ENABLED
+        self.sample_rate = PROFILE_SAMPLE_RATE
+        self.slow_ms = PROFILE_SLOW_MS
+        self.directory = PROFILE_DIR
+        self.max_files = PROFILE_MAX_FILES
+        self.busy = False
+
+    def to_dict(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "sampleRate": self.sample_rate,
+            "slowMs": self.slow_ms,
+            "directory": self.directory,
+            "maxFiles": self.max_files,
+        }
+
+
+profiler_settings = ProfilerSettings()
+
+
+def _save(profiler: cProfile.Profile, method: str, path: str, elapsed_ms: float) -> None:
+    settings = profiler_settings
+    os.makedirs(settings.directory, exist_ok=True)
+    slug = _SLUG.sub("_", path).strip("_")[:60] or "root"
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{int(time.time() * 1000) % 1000:03d}-{method}-{slug}-{elapsed_ms:.0f}ms.prof"
+    profiler.dump_stats(os.path.join(settings.directory, name))
+
+    files = sorted(entry for entry in os.listdir(settings.directory) if entry.endswith(".prof"))
+    for old in files[:max(len(files) - settings.max_files, 0)]:
+        try:
+            os.remove(os.path.join(settings.directory, old))
+        except OSError:
+            pass
+
+
+def list_profiles() -> List[dict]:
+    """Saved profiles, newest first."""
+    directory = profiler_settings.directory
+    try:
+        names = sorted((entry for entry in os.listdir(directory) if entry.endswith(".prof")), reverse=True)
+    except FileNotFoundError:
+        return []
+    profiles = []
+    for name in names:
+        stat = os.stat(os.path.join(directory, name))
+        profiles.append({"name": name, "bytes": stat.st_size, "savedAt": stat.st_mtime})
+    return profiles
+
+
+def profile_path(name: str) -> Optional[str]:
+    """Path of a saved profile, or None for unknown / unsafe names."""
+    if not _PROFILE_NAME.match(name):
+        return None
+    path = os.path.join(profiler_settings.directory, name)
+    return path if os.path.isfile(path) else None
+
+
+def profile_summary(path: str, limit: int = 40) -> str:
+    """Top functions of a saved profile by cumulative time, as text."""
+    out = io.StringIO()
+    stats = pstats.Stats(path, stream=out)
+    stats.sort_stats("cumulative").print_stats(limit)
+    return out.getvalue()
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware applying profiler_settings to HTTP requests."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        settings = profiler_settings
+        if (
+            scope["type"] != "http"
+            or not settings.enabled
+            or settings.busy
+            or scope["path"].startswith(_EXCLUDED_PREFIX)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        if random.random() >= settings.sample_rate:
+            await self.app(scope, receive, send)
+            return
+
+        settings.busy = True
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        stopped = False
+
+        def stop() -> None:
+            nonlocal stopped
+            if stopped:
+                return
+            stopped = True
+            profiler.disable()
+            settings.busy = False
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if elapsed_ms >= settings.slow_ms:
+                try:
+                    _save(profiler, scope["method"], scope["path"], elapsed_ms)
+                except OSError as e:
+                    print(f"Profile not saved: {e}")
+
+        async def send_wrapper(message):
+            # The response is decided once headers go out; don't profile the stream
+            if message["type"] == "http.response.start":
+                stop()
+            await send(message)
+
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            stop()
@@ -0,0 +1,108 @@
+"""
+Local recipe corpus (the frontend's data/recipes.json).
+Loaded once and converted to the same JSON shape the LLM endpoints return,
+so callers can serve corpus recipes instead of generating new ones.
+"""
+
+import json
+import os
+from functools import lru_cache
+from typing import List
+
+from services.openrouter_recipes import add_youtube_links
+from utils.nutrition import add_nutrition
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORPUS_PATH = os.getenv(
+    "RECIPE_CORPUS_PATH",
+    os.path.join(os.path.dirname(BACKEND_DIR), "frontend", "data", "recipes.json"),
+)
+
+# Ingredient keywords that rule a recipe out for vegetarian / vegan plans
+MEAT_WORDS = {
+    "chicken", "beef", "steak", "ribeye", "pork", "lamb", "mutton", "fish", "salmon", "tuna",
+    "shrimp", "prawn", "bacon", "ham", "sausage", "meat", "turkey", "duck", "anchovy", "crab",
+}
+ANIMAL_WORDS = MEAT_WORDS | {
+    "milk", "cheese", "feta", "butter", "egg", "honey", "yogurt", "cream", "paneer", "ghee",
+}
+
+
+def to_recipe(entry: dict) -> dict:
+    """Convert a corpus entry to the generated-recipe structure."""
+    total_time = (entry.get("prep_time") or 0) + (entry.get("cook_time") or 0)
+    recipe = {
+        "title": entry.get("name", ""),
+        "subtitle": f"{entry.get('cuisine_type', '')} · {entry.get('difficulty', '')}".strip(" ·"),
+        "description": entry.get("description", ""),
+        "servings": str(entry.get("servings", "")),
+        "time": f"{total_time} minutes" if total_time else "",
+        "ingredients": [
+            {"name": ing.get("name", ""), "amount": f"{ing.get('qty', '')} {ing.get('unit', '')}".strip()}
+            for ing in entry.get("ingredients", [])
+        ],
+        "steps": list(entry.get("instructions", [])),
+        "suggestions": [],
+        "youtubeLinks": [],
+        "calories": entry.get("calories"),
+        "source": "corpus",
+        "corpusId": entry.get("id"),
+    }
+    return add_nutrition(add_youtube_links(recipe))
+
+
+@lru_cache(maxsize=1)
+def get_corpus() -> List[dict]:
+    """Raw corpus entries (empty if the file isn't deployed alongside the backend)."""
+    try:
+        with open(CORPUS_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Recipe corpus unavailable: {e}")
+        return []
+
+
+@lru_cache(maxsize=1)
+def corpus_by_id() -> dict:
+    """Corpus entries indexed by their id."""
+    return {entry.get("id"): entry for entry in get_corpus()}
+
+
+def meal_type(entry: dict) -> str:
+    """Corpus recipes only distinguish breakfast dishes from mains."""
+    return "breakfast" if entry.get("cuisine_type", "").lower() == "breakfast" else "main"
+
+
+def suits_diet(entry: dict, dietary_type: str) -> bool:
+    diet = (dietary_type or "").lower()
+    excluded = ANIMAL_WORDS if "vegan" in diet else MEAT_WORDS if "vegetarian" in diet else set()
+    if not excluded:
+        return True
+    words = {word for ing in entry.get("ingredients", []) for word in ing.get("name", "").lower().split()}
+    return not (words & excluded)
+
+
+def find_recipes(meal: str, preferences: dict) -> List[dict]:
+    """
+    Corpus entries usable for a meal slot under the given preferences.
+
+    Args:
+        meal: breakfast, lunch, dinner or snack
+        preferences: RecipePreferences-style dict (cuisine, difficulty, diet)
+    """
+    wanted_type = "breakfast" if meal == "breakfast" else "main"
+    cuisine = (preferences.get("cuisine_type") or "None").lower()
+    difficulty = (preferences.get("difficulty") or "None").lower()
+
+    matches = []
+    for entry in get_corpus():
+        if meal_type(entry) != wanted_type:
+            continue
+        if cuisine not in ("none", "any", "") and entry.get("cuisine_type", "").lower() != cuisine:
+            continue
+        if difficulty not in ("none", "any", "") and entry.get("difficulty", "").lower() != difficulty:
+            continue
+        if not suits_diet(entry, preferences.get("dietary_type", "")):
+            continue
+        matches.append(entry)
+    return matches
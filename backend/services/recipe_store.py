@@ -0,0 +1,219 @@
+"""
+Content-addressed store for generated recipes.
+Recipes are keyed by a hash of their normalized content and persisted as
+JSON files, so a recipe can be reopened or shared by id without another LLM
+call. Near-duplicates (same dish, almost the same ingredients) resolve to the
+recipe already stored instead of piling up as variants.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+from utils.units import canonical_ingredient
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RECIPE_STORE_DIR = os.getenv("RECIPE_STORE_DIR", os.path.join(BACKEND_DIR, "data", "generated_recipes"))
+# Recipes kept in memory (the rest are read back from disk on demand)
+RECIPE_CACHE_SIZE = int(os.getenv("RECIPE_CACHE_SIZE", "512"))
+# Ingredient-set similarity above which two recipes with similar titles are the same dish
+RECIPE_DUPLICATE_THRESHOLD = float(os.getenv("RECIPE_DUPLICATE_THRESHOLD", "0.8"))
+
+# Fields that vary between otherwise identical recipes and don't define the dish
+_VOLATILE_FIELDS = {"id", "youtubeLinks", "nutrition", "source"}
+_ID_PATTERN = re.compile(r"^[0-9a-f]{16}$")
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _text(value) -> str:
+    return " ".join(str(value or "").lower().split())
+
+
+def normalize_recipe(recipe: dict) -> dict:
+    """Canonical form used for hashing: case/whitespace-insensitive, ingredients sorted."""
+    normalized = {}
+    for field, value in recipe.items():
+        if field in _VOLATILE_FIELDS:
+            continue
+        if field == "ingredients":
+            normalized[field] = sorted(
+                (canonical_ingredient(ing.get("name", "")), _text(ing.get("amount", ing.get("qty", ""))))
+                if isinstance(ing, dict) else (canonical_ingredient(str(ing)), "")
+                for ing in value or []
+            )
+        elif isinstance(value, list):
+            normalized[field] = [_text(entry) for entry in value]
+        else:
+            normalized[field] = _text(value)
+    return normalized
+
+
+def recipe_id(recipe: dict) -> str:
+    """Content hash of a recipe (16 hex chars of SHA-256)."""
+    canonical = json.dumps(normalize_recipe(recipe), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()[:16]
+
+
+def _title_words(recipe: dict) -> Set[str]:
+    return set(_WORD.findall(_text(recipe.get("title"))))
+
+
+def _ingredient_set(recipe: dict) -> Set[str]:
+    return {
+        canonical_ingredient(ing.get("name", "") if isinstance(ing, dict) else str(ing))
+        for ing in recipe.get("ingredients", [])
+    }
+
+
+def _write_atomic(path: str, data: str) -> None:
+    """Write a file via a synced temporary, so readers never see half a recipe."""
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+
+def _jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class RecipeStore:
+    """Disk-backed recipe store with an in-memory LRU and a near-duplicate index."""
+
+    def __init__(self, directory: str = RECIPE_STORE_DIR, cache_size: int = RECIPE_CACHE_SIZE):
+        self.directory = directory
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, dict]" = OrderedDict()
+        # Near-duplicate index: title word -> ids, id -> (title words, ingredient set)
+        self._by_title_word: Dict[str, Set[str]] = {}
+        self._signatures: Dict[str, Tuple[Set[str], Set[str]]] = {}
+        self._lock = threading.Lock()
+        self._loaded = False
+        # Set when the index ends in a torn line, so the next append starts a new one
+        self._index_torn = False
+
+    def _index_path(self) -> str:
+        return os.path.join(self.directory, "index.ndjson")
+
+    def _recipe_path(self, rid: str) -> str:
+        return os.path.join(self.directory, f"{rid}.json")
+
+    def _ensure_loaded(self) -> None:
+        """
+        Rebuild the near-duplicate index from the append-only index file (once).
+        Corrupt lines (e.g. torn by a crash mid-append) are skipped and logged.
+        """
+        if self._loaded:
+            return
+        try:
+            with open(self._index_path(), encoding="utf-8", errors="replace") as f:
+                for number, line in enumerate(f, 1):
+                    self._index_torn = not line.endswith("\n")
+                    if not line.strip():
+                        continue
+                    try:
+                        entry = json.loads(line)
+                        self._add_signature(entry["id"], set(entry["title"]), set(entry["ingredients"]))
+                    except (ValueError, KeyError, TypeError) as e:
+                        print(f"Recipe index: skipping bad line {number}: {e}")
+        except FileNotFoundError:
+            pass
+        self._loaded = True
+
+    def _add_signature(self, rid: str, title_words: Set[str], ingredients: Set[str]) -> None:
+        self._signatures[rid] = (title_words, ingredients)
+        for word in title_words:
+            self._by_title_word.setdefault(word, set()).add(rid)
+
+    def _find_duplicate(self, title_words: Set[str], ingredients: Set[str]) -> Optional[str]:
+        candidates = set()
+        for word in title_words:
+            candidates |= self._by_title_word.get(word, set())
+        for candidate in candidates:
+            other_title, other_ingredients = self._signatures[candidate]
+            if _jaccard(title_words, other_title) >= 0.5 and _jaccard(ingredients, other_ingredients) >= RECIPE_DUPLICATE_THRESHOLD:
+                return candidate
+        return None
+
+    def _remember(self, rid: str, recipe: dict) -> None:
+        self._cache[rid] = recipe
+        self._cache.move_to_end(rid)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def put(self, recipe: dict) -> Tuple[str, dict]:
+        """
+        Store a recipe (or find its existing copy / near-duplicate). This does
+        blocking file I/O, so async callers run it in a thread.
+
+        Returns:
+            (id, stored recipe) - the stored recipe carries its "id"
+        """
+        rid = recipe_id(recipe)
+        title_words, ingredients = _title_words(recipe), _ingredient_set(recipe)
+
+        with self._lock:
+            self._ensure_loaded()
+            if rid not in self._signatures:
+                duplicate = self._find_duplicate(title_words, ingredients)
+                if duplicate is not None:
+                    stored = self._get_locked(duplicate)
+                    if stored is not None:
+                        return duplicate, stored
+
+            existing = self._get_locked(rid)
+            if existing is not None:
+                return rid, existing
+
+            stored = {**recipe, "id": rid}
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                _write_atomic(self._recipe_path(rid), json.dumps(stored))
+                entry = json.dumps({"id": rid, "title": sorted(title_words), "ingredients": sorted(ingredients)})
+                with open(self._index_path(), "a", encoding="utf-8") as f:
+                    f.write(("\n" if self._index_torn else "") + entry + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._index_torn = False
+            except OSError as e:
+                # Read-only deployments still serve ids from memory for this process
+                print(f"Recipe store not persisted: {e}")
+            self._add_signature(rid, title_words, ingredients)
+            self._remember(rid, stored)
+            return rid, stored
+
+    def _get_locked(self, rid: str) -> Optional[dict]:
+        recipe = self._cache.get(rid)
+        if recipe is not None:
+            self._cache.move_to_end(rid)
+            return recipe
+        try:
+            with open(self._recipe_path(rid), encoding="utf-8") as f:
+                recipe = json.load(f)
+        except (OSError, ValueError):
+            return None
+        self._remember(rid, recipe)
+        return recipe
+
+    def get(self, rid: str) -> Optional[dict]:
+        """Fetch a stored recipe by id."""
+        if not _ID_PATTERN.match(rid):
+            return None
+        with self._lock:
+            return self._get_locked(rid)
+
+    def ids(self) -> List[str]:
+        with self._lock:
+            self._ensure_loaded()
+            return list(self._signatures)
+
+
+recipe_store = RecipeStore()
@@ -0,0 +1,127 @@
+"""
+Background pre-warming of popular structured recipe requests.
+Counts how often each preference combination (diet x cuisine x category x
+difficulty) is requested and, while no other LLM call is in flight, keeps a
+small pool of freshly generated recipes for the most popular ones. Pooled
+recipes are handed out once each, so repeat visitors still see variety.
+"""
+
+import asyncio
+import os
+import time
+from collections import Counter, deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from services.llm_client import in_flight
+from services.openrouter_recipes import STRUCTURED_SYSTEM_PROMPT, build_structured_prompt, generate_recipe
+
+# Seconds between warming passes (0 disables the warmer)
+WARM_INTERVAL_SECONDS = float(os.getenv("WARM_INTERVAL_SECONDS", "60"))
+# Combinations kept warm, and recipes pooled for each
+WARM_TOP_COMBOS = int(os.getenv("WARM_TOP_COMBOS", "5"))
+WARM_POOL_SIZE = int(os.getenv("WARM_POOL_SIZE", "3"))
+# Requests a combination needs before it's worth spending quota on
+WARM_MIN_REQUESTS = int(os.getenv("WARM_MIN_REQUESTS", "3"))
+# Pooled recipes older than this are discarded
+WARM_MAX_AGE_HOURS = float(os.getenv("WARM_MAX_AGE_HOURS", "24"))
+# Request counts are halved this often so "popular" follows recent traffic
+WARM_DECAY_HOURS = float(os.getenv("WARM_DECAY_HOURS", "6"))
+
+COMBO_FIELDS = ("dietary_type", "cuisine_type", "food_category", "difficulty")
+# Free-text fields; requests that set them are personal and never served from a pool
+FREE_TEXT_FIELDS = ("food_available", "like_eating")
+# Distinct combinations tracked before the rarest are forgotten
+MAX_TRACKED_COMBOS = 1000
+
+Combo = Tuple[str, ...]
+
+
+def _blank(value) -> bool:
+    return not value or str(value).strip().lower() in ("none", "any")
+
+
+class RecipeWarmer:
+    def __init__(self):
+        self.counts: Counter = Counter()
+        self.pools: Dict[Combo, Deque[Tuple[float, dict]]] = {}
+        self.last_decay = time.monotonic()
+
+    def record(self, preferences: dict) -> Optional[Combo]:
+        """
+        Count a structured request.
+
+        Returns:
+            The request's combination key, or None if it has free-text
+            preferences and so can't be answered from a pool
+        """
+        if not all(_blank(preferences.get(field)) for field in FREE_TEXT_FIELDS):
+            return None
+        combo = tuple((preferences.get(field) or "None").strip() for field in COMBO_FIELDS)
+        self.counts[combo] += 1
+        if len(self.counts) > MAX_TRACKED_COMBOS:
+            self.counts = Counter(dict(self.counts.most_common(MAX_TRACKED_COMBOS // 2)))
+        return combo
+
+    def take(self, combo: Combo) -> Optional[dict]:
+        """Hand out a pooled recipe for a combination (each one is served once)."""
+        pool = self.pools.get(combo)
+        cutoff = time.time() - WARM_MAX_AGE_HOURS * 3600
+        while pool:
+            created_at, recipe = pool.popleft()
+            if created_at >= cutoff:
+                return recipe
+        return None
+
+    def top_combos(self) -> List[Combo]:
+        return [combo for combo, count in self.counts.most_common(WARM_TOP_COMBOS) if count >= WARM_MIN_REQUESTS]
+
+    def _decay(self) -> None:
+        if time.monotonic() - self.last_decay < WARM_DECAY_HOURS * 3600:
+            return
+        self.last_decay = time.monotonic()
+        self.counts = Counter({combo: count // 2 for combo, count in self.counts.items() if count // 2})
+        # Pools of combinations that fell out of the top are released
+        top = set(self.top_combos())
+        for combo in list(self.pools):
+            if combo not in top:
+                del self.pools[combo]
+
+    async def fill(self) -> int:
+        """
+        Top up the pools of popular combinations, one generation at a time,
+        stopping as soon as any other LLM call is in flight.
+
+        Returns:
+            Number of recipes generated
+        """
+        generated = 0
+        for combo in self.top_combos():
+            pool = self.pools.setdefault(combo, deque())
+            while len(pool) < WARM_POOL_SIZE:
+                if in_flight():
+                    return generated
+                preferences = dict(zip(COMBO_FIELDS, combo), food_available="None", like_eating="None")
+                try:
+                    recipe = await generate_recipe(build_structured_prompt(preferences), STRUCTURED_SYSTEM_PROMPT)
+                except Exception as e:
+                    print(f"Recipe warmer: generation failed for {combo}: {str(e)}")
+                    return generated
+                generated += 1
+                # The recipe store may resolve a new generation to one already pooled
+                if all(pooled.get("id") != recipe.get("id") for _, pooled in pool):
+                    pool.append((time.time(), recipe))
+                else:
+                    break
+        return generated
+
+    async def run(self) -> None:
+        """Warm pools every WARM_INTERVAL_SECONDS."""
+        while True:
+            await asyncio.sleep(WARM_INTERVAL_SECONDS)
+            self._decay()
+            generated = await self.fill()
+            if generated:
+                print(f"Recipe warmer: generated {generated} recipe(s)")
+
+
+recipe_warmer = RecipeWarmer()
@@ -0,0 +1,105 @@
+"""
+Shopping list aggregation.
+Merges ingredients from many recipes in a single pass: each ingredient is
+keyed by (canonical name, unit dimension) in a dict, amounts are converted to
+base units (g / ml / counts) before summing, and what's already in the
+inventory is subtracted at the end.
+"""
+
+from typing import Dict, Iterable, List, Tuple
+
+from utils.units import MASS, VOLUME, canonical_ingredient, ingredient_amount, parse_amount, split_ingredient, to_base
+
+
+class _Line:
+    __slots__ = ("name", "dimension", "unit", "quantity", "unquantified", "recipes", "display_name")
+
+    def __init__(self, name: str, dimension: str, unit: str, display_name: str):
+        self.name = name
+        self.dimension = dimension
+        self.unit = unit
+        self.quantity = 0.0
+        self.unquantified = False   # some recipe said "to taste" / gave no amount
+        self.recipes = set()
+        self.display_name = display_name
+
+
+def _display(quantity: float, dimension: str, unit: str) -> Tuple[float, str]:
+    """Pick a readable unit (kg / l above 1000 g / ml)."""
+    if dimension == MASS and quantity >= 1000:
+        return round(quantity / 1000, 2), "kg"
+    if dimension == VOLUME and quantity >= 1000:
+        return round(quantity / 1000, 2), "l"
+    return round(quantity, 2), unit
+
+
+def aggregate_ingredients(recipes: Iterable[dict], pantry: Iterable[dict] = ()) -> Dict[str, List[dict]]:
+    """
+    Build a merged shopping list.
+
+    Args:
+        recipes: Recipe dicts with an "ingredients" list (generated or corpus format)
+        pantry: Inventory items ({name, quantity}) to subtract; their counts
+            offset count-based lines, and any pantry match is reported
+
+    Returns:
+        {"items": still to buy, "covered": fully covered by the pantry}
+    """
+    lines: Dict[Tuple[str, str], _Line] = {}
+    for index, recipe in enumerate(recipes):
+        recipe_name = recipe.get("title") or recipe.get("name") or f"recipe {index + 1}"
+        ingredients = recipe.get("ingredients")
+        if not isinstance(ingredients, list):
+            continue
+        for ingredient in ingredients:
+            if not isinstance(ingredient, (str, dict)):
+                continue
+            name, amount = ingredient_amount(ingredient)
+            key_name, name_unit = split_ingredient(name)
+            if not key_name:
+                continue
+            quantity, unit = parse_amount(amount)
+            # "Garlic cloves: 3" counts cloves, like "garlic: 3 cloves"
+            unit = unit or name_unit
+            dimension, base_quantity, base_unit = to_base(quantity, unit)
+
+            line = lines.get((key_name, dimension))
+            if line is None:
+                line = lines[(key_name, dimension)] = _Line(key_name, dimension, base_unit, name.split(",")[0].strip())
+            if base_quantity is None:
+                line.unquantified = True
+            else:
+                line.quantity += base_quantity
+            line.recipes.add(recipe_name)
+
+    # Pantry counts (quantity has no unit) offset count lines of the same ingredient
+    on_hand: Dict[str, float] = {}
+    for item in pantry:
+        key_name = canonical_ingredient(item.get("name", ""))
+        on_hand[key_name] = on_hand.get(key_name, 0) + (item.get("quantity") or 1)
+
+    items, covered = [], []
+    for line in lines.values():
+        have = on_hand.get(line.name, 0)
+        quantity = line.quantity
+        if have and line.dimension == "count:piece":
+            quantity = max(0.0, quantity - have)
+
+        display_quantity, display_unit = _display(quantity, line.dimension, line.unit)
+        entry = {
+            "name": line.display_name,
+            "key": line.name,
+            "quantity": display_quantity if quantity or not line.unquantified else None,
+            "unit": display_unit if line.dimension != "count:piece" else "",
+            "toTaste": line.unquantified and not line.quantity,
+            "recipes": sorted(line.recipes),
+            "inPantry": have,
+        }
+        if have and line.dimension == "count:piece" and quantity == 0:
+            covered.append(entry)
+        else:
+            items.append(entry)
+
+    items.sort(key=lambda entry: entry["key"])
+    covered.sort(key=lambda entry: entry["key"])
+    return {"items": items, "covered": covered}
@@ -0,0 +1,41 @@
+"""
+Shared test setup: run the app against throwaway directories, without the
+background jobs, and give each test its own inventory shard.
+"""
+
+import os
+import sys
+import tempfile
+import uuid
+
+import pytest
+
+_TMP = tempfile.mkdtemp(prefix="chefbuddy-tests-")
+os.environ.setdefault("RECIPE_STORE_DIR", os.path.join(_TMP, "recipes"))
+os.environ.setdefault("ARCHIVE_DIR", os.path.join(_TMP, "archive"))
+os.environ.setdefault("PROFILE_DIR", os.path.join(_TMP, "profiles"))
+os.environ["WARM_INTERVAL_SECONDS"] = "0"
+os.environ["EXPIRY_CHECK_INTERVAL_HOURS"] = "0"
+os.environ["ARCHIVE_SWEEP_INTERVAL_HOURS"] = "0"
+os.environ["LLM_LEDGER_MODE"] = "off"
+# Cheapest bcrypt cost, so account tests stay fast
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+from utils.auth import create_access_token  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def auth_headers():
+    """Bearer headers for a fresh user, so each test starts with an empty shard."""
+    token = create_access_token({"sub": f"{uuid.uuid4().hex}@example.com"})
+    return {"Authorization": f"Bearer {token}"}
@@ -0,0 +1,140 @@
+import asyncio
+
+from services.admission import AdmissionMiddleware
+
+
+def scope(path="/api/generate-recipe", headers=()):
+    return {"type": "http", "method": "POST", "path": path, "headers": list(headers)}
+
+
+class Recorder:
+    """Collects what the middleware sends for one request."""
+
+    def __init__(self):
+        self.messages = []
+
+    async def __call__(self, message):
+        self.messages.append(message)
+
+    @property
+    def status(self):
+        return next(m["status"] for m in self.messages if m["type"] == "http.response.start")
+
+    @property
+    def headers(self):
+        return dict(next(m["headers"] for m in self.messages if m["type"] == "http.response.start"))
+
+
+def slow_app(release: asyncio.Event):
+    async def app(scope, receive, send):
+        await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+    return app
+
+
+async def never_disconnects():
+    await asyncio.Event().wait()
+
+
+def test_full_queue_is_rejected_with_retry_after():
+    async def run():
+        release = asyncio.Event()
+        middleware = AdmissionMiddleware(slow_app(release), concurrency=1, queue_size=1)
+        running, queued, rejected = Recorder(), Recorder(), Recorder()
+
+        first = asyncio.create_task(middleware(scope(), never_disconnects, running))
+        await asyncio.sleep(0.01)
+        second = asyncio.create_task(middleware(scope(), never_disconnects, queued))
+        await asyncio.sleep(0.01)
+        await middleware(scope(), never_disconnects, rejected)
+
+        assert rejected.status == 503
+        assert int(rejected.headers[b"retry-after"]) >= 1
+
+        release.set()
+        await asyncio.gather(first, second)
+        assert running.status == queued.status == 200
+        limiter = middleware.limiters["recipe"]
+        assert limiter.active == 0 and not limiter.waiters
+
+    asyncio.run(run())
+
+
+def test_queued_request_past_its_deadline_is_dropped():
+    async def run():
+        release = asyncio.Event()
+        middleware = AdmissionMiddleware(slow_app(release), concurrency=1, queue_size=4)
+        running, expired = Recorder(), Recorder()
+
+        first = asyncio.create_task(middleware(scope(), never_disconnects, running))
+        await asyncio.sleep(0.01)
+        await middleware(scope(headers=[(b"x-request-deadline", b"0.05")]), never_disconnects, expired)
+        assert expired.status == 503
+
+        release.set()
+        await first
+        assert middleware.limiters["recipe"].active == 0
+
+    asyncio.run(run())
+
+
+def test_other_routes_bypass_admission():
+    async def run():
+        release = asyncio.Event()
+        release.set()
+        middleware = AdmissionMiddleware(slow_app(release), concurrency=1, queue_size=0)
+        sent = Recorder()
+        await middleware({"type": "http", "method": "GET", "path": "/api/expiry/items", "headers": []},
+                         never_disconnects, sent)
+        assert sent.status == 200
+
+    asyncio.run(run())
+
+
+def test_simultaneous_arrivals_respect_the_bound():
+    async def run():
+        release = asyncio.Event()
+        middleware = AdmissionMiddleware(slow_app(release), concurrency=1, queue_size=1)
+        recorders = [Recorder() for _ in range(4)]
+        tasks = [asyncio.create_task(middleware(scope(), never_disconnects, sent)) for sent in recorders]
+        await asyncio.sleep(0.01)
+        release.set()
+        await asyncio.gather(*tasks)
+
+        assert sorted(sent.status for sent in recorders) == [200, 200, 503, 503]
+        limiter = middleware.limiters["recipe"]
+        assert limiter.active == 0 and not limiter.waiters
+
+    asyncio.run(run())
+
+
+def test_disconnect_while_queued_frees_the_place_in_line():
+    async def run():
+        release = asyncio.Event()
+        middleware = AdmissionMiddleware(slow_app(release), concurrency=1, queue_size=1)
+        disconnect = asyncio.Event()
+
+        async def receive():
+            await disconnect.wait()
+            return {"type": "http.disconnect"}
+
+        running, gone, later = Recorder(), Recorder(), Recorder()
+        first = asyncio.create_task(middleware(scope(), never_disconnects, running))
+        await asyncio.sleep(0.01)
+        queued = asyncio.create_task(middleware(scope(), receive, gone))
+        await asyncio.sleep(0.01)
+        disconnect.set()
+        await queued
+        assert gone.messages == []
+
+        # The freed place in line is available again
+        third = asyncio.create_task(middleware(scope(), never_disconnects, later))
+        await asyncio.sleep(0.01)
+        release.set()
+        await asyncio.gather(first, third)
+        assert running.status == later.status == 200
+        limiter = middleware.limiters["recipe"]
+        assert limiter.active == 0 and not limiter.waiters
+
+    asyncio.run(run())
@@ -0,0 +1,86 @@
+import threading
+import uuid
+from datetime import timedelta
+
+import pytest
+
+from utils import auth
+from utils.auth import create_access_token, decode_access_token_cached, revoke_token
+
+
+@pytest.fixture
+def decodes(monkeypatch):
+    """Count real JWT verifications (cache misses)."""
+    calls = []
+    decode = auth._decode_payload
+
+    def counting(token):
+        calls.append(token)
+        return decode(token)
+
+    monkeypatch.setattr(auth, "_decode_payload", counting)
+    return calls
+
+
+def test_verified_tokens_are_cached_until_the_ttl(decodes, monkeypatch):
+    token = create_access_token({"sub": "cached@example.com"})
+    assert decode_access_token_cached(token) == "cached@example.com"
+    assert decode_access_token_cached(token) == "cached@example.com"
+    assert len(decodes) == 1
+
+    now = auth.time.time()
+    monkeypatch.setattr(auth.time, "time", lambda: now + auth.TOKEN_CACHE_TTL_SECONDS + 1)
+    assert decode_access_token_cached(token) == "cached@example.com"
+    assert len(decodes) == 2
+
+
+def test_cache_never_outlives_the_token(decodes, monkeypatch):
+    token = create_access_token({"sub": "brief@example.com"}, expires_delta=timedelta(seconds=30))
+    assert decode_access_token_cached(token) == "brief@example.com"
+
+    now = auth.time.time()
+    monkeypatch.setattr(auth.time, "time", lambda: now + 60)
+    decode_access_token_cached(token)
+    assert len(decodes) == 2
+
+    expired = create_access_token({"sub": "late@example.com"}, expires_delta=timedelta(minutes=-1))
+    assert decode_access_token_cached(expired) is None
+
+
+def test_revoked_tokens_are_rejected_even_when_cached():
+    token = create_access_token({"sub": "leaving@example.com"})
+    other = create_access_token({"sub": "leaving@example.com", "n": 2})
+    assert decode_access_token_cached(token) == "leaving@example.com"
+
+    revoke_token(token)
+    assert decode_access_token_cached(token) is None
+    assert decode_access_token_cached(other) == "leaving@example.com"
+
+
+def test_register_login_me_logout(client, monkeypatch):
+    threads = []
+    verify = auth.verify_password
+
+    def recording(plain, hashed):
+        threads.append(threading.current_thread().name)
+        return verify(plain, hashed)
+
+    monkeypatch.setattr(auth, "verify_password", recording)
+    email = f"{uuid.uuid4().hex}@example.com"
+    account = {"email": email, "password": "hunter22", "full_name": "Test User"}
+
+    assert client.post("/api/auth/register", json=account).status_code == 200
+    assert client.post("/api/auth/register", json=account).status_code == 400
+    bad = client.post("/api/auth/login", json={"email": email, "password": "wrong"})
+    assert bad.status_code == 401
+    token = client.post("/api/auth/login", json={"email": email.upper(), "password": "hunter22"}).json()["access_token"]
+    # bcrypt ran on the hashing pool, not the event loop
+    assert threads and all(name.startswith("auth-hash") for name in threads)
+
+    headers = {"Authorization": f"Bearer {token}"}
+    me = client.get("/api/auth/me", headers=headers).json()
+    assert me["email"] == email and me["full_name"] == "Test User"
+    assert "hashed_password" not in me
+
+    assert client.post("/api/auth/logout", headers=headers).status_code == 200
+    assert client.get("/api/auth/me", headers=headers).status_code == 401
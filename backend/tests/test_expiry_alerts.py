@@ -0,0 +1,55 @@
+import asyncio
+from datetime import date, timedelta
+
+import main
+
+
+def test_advice_is_only_generated_for_subscribed_inventories(monkeypatch):
+    asked = []
+
+    async def fake_advice(name, category, days_left):
+        asked.append(name)
+        return "use it today"
+
+    monkeypatch.setattr(main, "generate_advice_for_item", fake_advice)
+    purchased = (date.today() - timedelta(days=6)).isoformat()
+    for owner, name in (("listening@example.com", "milk"), ("away@example.com", "yogurt")):
+        main.item_store.shard(owner).add({"name": name, "category": "dairy", "purchaseDate": purchased})
+
+    subscription = main.alert_hub.subscribe("listening@example.com")
+    try:
+        asyncio.run(main.check_expiring_items())
+    finally:
+        main.alert_hub.unsubscribe(subscription)
+
+    assert asked == ["milk"]
+    assert subscription.queue.qsize() == 1
+
+
+def test_new_subscribers_get_current_alerts_without_llm_calls(monkeypatch):
+    async def no_llm(*args):
+        raise AssertionError("connecting must not call the LLM")
+
+    monkeypatch.setattr(main, "generate_advice_for_item", no_llm)
+    owner = "connecting@example.com"
+    purchased = (date.today() - timedelta(days=6)).isoformat()
+    shard = main.item_store.shard(owner)
+    shard.add({"name": "milk", "category": "dairy", "purchaseDate": purchased})
+    shard.add({"name": "cumin", "category": "spices", "purchaseDate": date.today().isoformat()})
+
+    async def first_frames(count):
+        response = await main.stream_expiry_alerts(token=None, email=owner)
+        frames = []
+        try:
+            async for frame in response.body_iterator:
+                frames.append(frame)
+                if len(frames) == count:
+                    return frames
+        finally:
+            await response.body_iterator.aclose()
+
+    connected, alert = asyncio.run(first_frames(2))
+    assert connected == b": connected\n\n"
+    assert alert.startswith(b"event: expiry-alert\n")
+    assert b'"name": "milk"' in alert and b'"advice": "' in alert
+    assert not main.alert_hub.has_subscribers(owner)
@@ -0,0 +1,111 @@
+from datetime import date, timedelta
+
+from utils.auth import create_access_token
+
+
+def add(client, headers, name="milk", category="dairy", days_ago=0, **extra):
+    body = {
+        "name": name,
+        "category": category,
+        "purchaseDate": (date.today() - timedelta(days=days_ago)).isoformat(),
+        **extra,
+    }
+    response = client.post("/api/expiry/items", json=body, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()["item"]
+
+
+def test_list_etag_revalidates_until_a_change(client, auth_headers):
+    add(client, auth_headers)
+    first = client.get("/api/expiry/items", headers=auth_headers)
+    etag = first.headers["etag"]
+
+    revalidated = client.get("/api/expiry/items", headers={**auth_headers, "If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    # Weak comparison: a W/ prefix still matches
+    assert client.get("/api/expiry/items", headers={**auth_headers, "If-None-Match": f"W/{etag}"}).status_code == 304
+
+    add(client, auth_headers, name="bread", category="bakery")
+    changed = client.get("/api/expiry/items", headers={**auth_headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert [item["name"] for item in changed.json()] == ["bread", "milk"]
+
+
+def test_item_etag_and_projection_variants(client, auth_headers):
+    item = add(client, auth_headers)
+    full = client.get(f"/api/expiry/items/{item['id']}", headers=auth_headers)
+    projected = client.get(f"/api/expiry/items/{item['id']}?fields=name,daysLeft", headers=auth_headers)
+    assert projected.json() == {"id": item["id"], "name": "milk", "daysLeft": full.json()["daysLeft"]}
+    assert projected.headers["etag"] != full.headers["etag"]
+
+    etag = projected.headers["etag"]
+    headers = {**auth_headers, "If-None-Match": etag}
+    assert client.get(f"/api/expiry/items/{item['id']}?fields=name,daysLeft", headers=headers).status_code == 304
+    assert client.get(f"/api/expiry/items/{item['id']}", headers=headers).status_code == 200
+    assert client.get("/api/expiry/items?fields=bogus", headers=auth_headers).status_code == 400
+
+
+def test_invalid_input_is_rejected(client, auth_headers):
+    item = add(client, auth_headers)
+    bad_create = {"name": "x", "category": "dairy", "purchaseDate": "yesterday"}
+    assert client.post("/api/expiry/items", json=bad_create, headers=auth_headers).status_code == 422
+    for bad in ({"category": None}, {"purchaseDate": None}, {"purchaseDate": "13/45/2024"}, {"name": None}):
+        response = client.patch(f"/api/expiry/items/{item['id']}", json=bad, headers=auth_headers)
+        assert response.status_code == 422, bad
+    assert client.get("/api/expiry/items", headers=auth_headers).status_code == 200
+    assert client.get("/api/expiry/items/²", headers=auth_headers).status_code == 404
+
+
+def test_change_feed(client, auth_headers):
+    listing = client.get("/api/expiry/items", headers=auth_headers)
+    seq = int(listing.headers["x-change-seq"])
+    instance = client.get("/api/expiry/items/changes", headers=auth_headers).json()["instance"]
+
+    milk = add(client, auth_headers)
+    bread = add(client, auth_headers, name="bread", category="bakery")
+    client.patch(f"/api/expiry/items/{milk['id']}", json={"quantity": 4}, headers=auth_headers)
+    client.delete(f"/api/expiry/items/{bread['id']}", headers=auth_headers)
+
+    feed = client.get(f"/api/expiry/items/changes?since={seq}&instance={instance}", headers=auth_headers).json()
+    assert feed["resync"] is False
+    assert [(change["op"], change["id"]) for change in feed["changes"]] == [
+        ("update", milk["id"]), ("delete", bread["id"]),
+    ]
+    assert feed["changes"][0]["item"]["quantity"] == 4
+    assert "item" not in feed["changes"][1]
+
+    # A sequence number from the future, or from another server instance, forces a full reload
+    future = client.get(f"/api/expiry/items/changes?since={feed['seq'] + 10}", headers=auth_headers).json()
+    assert future["resync"] is True and future["changes"] == []
+    other = client.get(f"/api/expiry/items/changes?since={seq}&instance=deadbeef", headers=auth_headers).json()
+    assert other["resync"] is True
+
+
+def test_stats_endpoint(client, auth_headers):
+    add(client, auth_headers, name="milk", category="dairy", days_ago=30)
+    add(client, auth_headers, name="cumin", category="spices")
+    stats = client.get("/api/expiry/stats", headers=auth_headers).json()
+    assert stats["total"] == 2
+    assert stats["byCategory"] == {"dairy": 1, "spices": 1}
+    assert stats["expired"] == 1
+    assert stats["later"] == 1
+
+
+def test_inventories_are_separate(client, auth_headers):
+    add(client, auth_headers)
+    other = {"Authorization": "Bearer " + create_access_token({"sub": "someone-else@example.com"})}
+    assert client.get("/api/expiry/stats", headers=auth_headers).json()["total"] == 1
+    assert all(item["name"] != "milk" for item in client.get("/api/expiry/items", headers=other).json())
+
+
+def test_bad_tokens_are_rejected_not_anonymous(client, auth_headers):
+    expired = create_access_token({"sub": "late@example.com"}, expires_delta=timedelta(minutes=-1))
+    for value in ("Bearer not-a-jwt", f"Bearer {expired}", "Basic dXNlcjpwYXNz", "Bearer"):
+        response = client.get("/api/expiry/items", headers={"Authorization": value})
+        assert response.status_code == 401, value
+        assert response.headers["www-authenticate"] == "Bearer"
+    assert client.get("/api/expiry/alerts/stream?token=not-a-jwt").status_code == 401
+    assert client.get("/api/expiry/items").status_code == 200
+    assert client.get("/api/expiry/items", headers=auth_headers).status_code == 200
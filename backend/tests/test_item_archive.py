@@ -0,0 +1,107 @@
+import os
+from datetime import date, timedelta
+
+import pytest
+
+import main
+from services.item_archive import ARCHIVE_GRACE_DAYS, ItemArchive
+from services.item_store import EPOCH_ORDINAL, ItemStore
+from utils.predict_expiry import safe_expiry_offsets
+
+TODAY = date.today().toordinal() - EPOCH_ORDINAL
+
+
+def make_item(name, category, days_ago):
+    return {
+        "name": name,
+        "category": category,
+        "purchaseDate": (date.today() - timedelta(days=days_ago)).isoformat(),
+        "quantity": 1,
+        "notes": None,
+        "manufacturedDate": None,
+        "createdAt": "2024-01-01T00:00:00",
+    }
+
+
+@pytest.fixture
+def archive(tmp_path):
+    return ItemArchive(str(tmp_path))
+
+
+def test_sweep_archives_only_items_past_the_grace_period(archive):
+    shard = ItemStore(safe_expiry_offsets).shard("tester")
+    old = shard.add(make_item("bread", "bakery", days_ago=ARCHIVE_GRACE_DAYS + 30))
+    shard.add(make_item("cumin", "spices", days_ago=ARCHIVE_GRACE_DAYS + 30))
+    shard.add(make_item("milk", "dairy", days_ago=0))
+    seq = shard.version
+
+    assert archive.sweep([shard], TODAY) == 1
+    assert sorted(item.name for item in shard.list()) == ["cumin", "milk"]
+    # Archived rows are released, and clients syncing deltas see them go
+    assert len(shard.ids) == 2
+    assert shard.changes_since(seq) == [(shard.version, "delete", old.id)]
+    assert shard.stats(TODAY)["total"] == 2
+
+    total, items = archive.query("tester")
+    assert total == 1
+    assert items[0]["name"] == "bread"
+    assert items[0]["archiveId"].endswith(f"-{old.id}")
+    assert archive.query("someone else") == (0, [])
+    assert archive.sweep([shard], TODAY) == 0
+
+
+def test_failed_write_keeps_items_live(tmp_path):
+    blocker = tmp_path / "not-a-directory"
+    blocker.write_text("")
+    archive = ItemArchive(str(blocker))
+    shard = ItemStore(safe_expiry_offsets).shard("tester")
+    shard.add(make_item("bread", "bakery", days_ago=ARCHIVE_GRACE_DAYS + 30))
+
+    assert archive.sweep([shard], TODAY) == 0
+    assert len(shard) == 1
+
+
+def test_query_filters_and_pages(archive):
+    shard = ItemStore(safe_expiry_offsets).shard("tester")
+    for name in ("bread", "brioche", "bagel", "milk"):
+        shard.add(make_item(name, "dairy" if name == "milk" else "bakery", days_ago=ARCHIVE_GRACE_DAYS + 40))
+    archive.sweep([shard], TODAY)
+
+    assert archive.query("tester", prefix="BR")[0] == 2
+    assert archive.query("tester", category="dairy")[0] == 1
+    total, page = archive.query("tester", offset=1, limit=2)
+    assert total == 4 and len(page) == 2
+
+
+def test_restore_round_trip(archive):
+    shard = ItemStore(safe_expiry_offsets).shard("tester")
+    shard.add(make_item("bread", "bakery", days_ago=ARCHIVE_GRACE_DAYS + 30))
+    archive.sweep([shard], TODAY)
+    archive_id = archive.query("tester")[1][0]["archiveId"]
+
+    restored = archive.restore(shard, archive_id)
+    assert restored.name == "bread"
+    assert restored.createdAt == "2024-01-01T00:00:00"
+    assert shard.get(restored.id) is not None
+    assert archive.query("tester") == (0, [])
+    assert not any(name.endswith(".ndjson.gz") for _, _, names in os.walk(archive.directory) for name in names)
+    assert archive.restore(shard, archive_id) is None
+    assert archive.restore(shard, "../../etc/passwd") is None
+
+
+def test_archive_endpoints(client, auth_headers, tmp_path, monkeypatch):
+    monkeypatch.setattr(main.item_archive, "directory", str(tmp_path))
+    old_date = (date.today() - timedelta(days=ARCHIVE_GRACE_DAYS + 30)).isoformat()
+    client.post("/api/expiry/items", json={"name": "bread", "category": "bakery", "purchaseDate": old_date},
+                headers=auth_headers)
+    main.item_archive.sweep(main.item_store.shards(), TODAY)
+
+    listing = client.get("/api/expiry/archive", headers=auth_headers).json()
+    assert listing["total"] == 1
+    archive_id = listing["items"][0]["archiveId"]
+
+    restored = client.post(f"/api/expiry/archive/{archive_id}/restore", headers=auth_headers)
+    assert restored.status_code == 200
+    assert restored.json()["item"]["name"] == "bread"
+    assert [item["name"] for item in client.get("/api/expiry/items", headers=auth_headers).json()] == ["bread"]
+    assert client.post(f"/api/expiry/archive/{archive_id}/restore", headers=auth_headers).status_code == 404
@@ -0,0 +1,241 @@
+import random
+from collections import Counter
+from datetime import date, timedelta
+
+import pytest
+
+from services import item_store
+from services.item_store import EPOCH_ORDINAL, NULL, InventoryShard, ItemStore
+from utils.predict_expiry import safe_expiry_offsets
+
+TODAY = date.today().toordinal() - EPOCH_ORDINAL
+
+
+def make_item(name="milk", category="dairy", days_ago=0, **extra):
+    item = {
+        "name": name,
+        "category": category,
+        "purchaseDate": (date.today() - timedelta(days=days_ago)).isoformat(),
+        "quantity": 1,
+        "notes": None,
+        "manufacturedDate": None,
+        "createdAt": "2024-01-01T12:30:00",
+    }
+    item.update(extra)
+    return item
+
+
+@pytest.fixture
+def shard():
+    return ItemStore(safe_expiry_offsets).shard("tester")
+
+
+def recomputed_stats(shard, today):
+    """Stats from scratch, for comparison with the incremental ones."""
+    items = shard.list()
+    days = [shard.expiry[shard._row(item.id)] for item in items]
+    dated = [day for day in days if day != NULL]
+    histogram = [sum(1 for day in dated if day - today == offset) for offset in range(len(shard.window))]
+    return {
+        "total": len(items),
+        "byCategory": dict(Counter(item.category for item in items)),
+        "expired": sum(1 for day in dated if day < today),
+        "expiringToday": histogram[0],
+        "expiringThisWeek": sum(histogram[:7]),
+        "histogram": histogram,
+        "later": sum(1 for day in dated if day - today >= len(histogram)),
+        "undated": len(days) - len(dated),
+    }
+
+
+def test_round_trip(shard):
+    stored = shard.add(make_item(notes="top shelf", quantity=3))
+    fetched = shard.get(stored.id).to_dict()
+    assert fetched == {
+        "id": stored.id,
+        "name": "milk",
+        "category": "dairy",
+        "purchaseDate": date.today().isoformat(),
+        "quantity": 3,
+        "notes": "top shelf",
+        "manufacturedDate": None,
+        "createdAt": "2024-01-01T12:30:00",
+    }
+
+    updated = shard.update(stored.id, {"quantity": None, "notes": "door"})
+    assert (updated.quantity, updated.notes, updated.name) == (None, "door", "milk")
+    assert shard.get("999") is None
+    assert shard.update("999", {"quantity": 1}) is None
+
+
+def test_rejected_writes_leave_the_row_untouched(shard):
+    stored = shard.add(make_item())
+    before = shard.get(stored.id).to_dict()
+    version = shard.version
+
+    for bad in ({"category": None}, {"purchaseDate": "not a date"}, {"name": None}, {"quantity": 2 ** 40}):
+        with pytest.raises(ValueError):
+            shard.update(stored.id, bad)
+
+    assert shard.get(stored.id).to_dict() == before
+    assert shard.version == version
+    assert shard.stats(TODAY) == recomputed_stats(shard, TODAY)
+    with pytest.raises(ValueError):
+        shard.add({"name": "x", "category": "dairy"})
+    assert len(shard) == 1
+
+
+def test_ids_must_be_ascii_digits(shard):
+    shard.add(make_item())
+    assert shard.get("²") is None
+    assert shard.get("1") is not None
+
+
+def test_categories_are_normalized_and_bounded_per_shard():
+    store = ItemStore(safe_expiry_offsets)
+    greedy = store.shard("greedy")
+    assert greedy.add(make_item(category="  Dairy ")).category == "dairy"
+    for index in range(300):
+        greedy.add(make_item(category=f"category {index}"))
+    assert greedy.list()[0].category == "other"
+    # Other inventories still get their own new categories
+    assert store.shard("someone else").add(make_item(category="Pickles")).category == "pickles"
+
+
+def test_delete_tombstones_and_compaction(shard):
+    ids = [shard.add(make_item(name=f"item {index}")).id for index in range(10)]
+    assert shard.delete(ids[3])
+    assert not shard.delete(ids[3])
+    assert shard.get(ids[3]) is None
+    assert len(shard) == 9
+    assert len(shard.ids) == 10  # tombstoned, not yet removed
+
+    shard.compact()
+    assert len(shard.ids) == 9
+    assert [item.name for item in shard.list()] == [f"item {index}" for index in range(9, -1, -1) if index != 3]
+    # Ids survive compaction, and new ids keep counting up
+    assert shard.get(ids[4]).name == "item 4"
+    assert shard.add(make_item()).id == "11"
+
+
+def test_deletes_compact_automatically(shard):
+    ids = [shard.add(make_item(name=f"item {index % 7}")).id for index in range(200)]
+    for item_id in ids[:150]:
+        shard.delete(item_id)
+    assert len(shard.ids) < 200
+    assert len(shard) == 50
+    assert sorted(item.id for item in shard.list()) == sorted(ids[150:])
+
+
+def test_stats_match_a_full_recompute(shard):
+    rng = random.Random(7)
+    names = ["milk", "spinach", "apple", "chicken", "pasta", "cumin", "bread", "peas"]
+    categories = ["dairy", "vegetables", "fruits", "meat", "packaged", "spices", "bakery", "frozen"]
+    live = []
+    for step in range(1500):
+        action = rng.random()
+        if action < 0.6 or not live:
+            item = make_item(rng.choice(names), rng.choice(categories), days_ago=rng.randint(0, 40))
+            live.append(shard.add(item).id)
+        elif action < 0.8:
+            shard.delete(live.pop(rng.randrange(len(live))))
+        else:
+            shard.update(rng.choice(live), {
+                "category": rng.choice(categories),
+                "purchaseDate": (date.today() - timedelta(days=rng.randint(0, 40))).isoformat(),
+            })
+        if step % 250 == 0:
+            # Forward a day, a few days, past the window, and back again
+            for today in (TODAY, TODAY + 1, TODAY + 4, TODAY + 40, TODAY - 3, TODAY):
+                assert shard.stats(today) == recomputed_stats(shard, today)
+
+    shard.compact()
+    assert shard.stats(TODAY) == recomputed_stats(shard, TODAY)
+
+
+def test_expiring_uses_the_safe_expiry(shard):
+    fresh = shard.add(make_item(name="cumin", category="spices"))
+    old = shard.add(make_item(name="milk", category="dairy", days_ago=30))
+    expiring = {item.id for item in shard.expiring(TODAY + 3)}
+    assert old.id in expiring
+    assert fresh.id not in expiring
+    # A lower bound leaves out what has already expired
+    new = shard.add(make_item(name="milk", category="dairy"))
+    assert [item.id for item in shard.expiring(TODAY + 30, from_day=TODAY)] == [new.id]
+
+
+def test_query_filters_sort_and_page(shard):
+    for name, category, quantity in [
+        ("Chicken", "meat", 2), ("chickpeas", "packaged", 5), ("chili", "spices", None), ("milk", "dairy", 1),
+    ]:
+        shard.add(make_item(name=name, category=category, quantity=quantity))
+
+    def names(**filters):
+        total, page = shard.query_projected(("name",), False, **filters)
+        return total, [item["name"] for item in page]
+
+    assert names(prefix="CHI", sort="name") == (3, ["Chicken", "chickpeas", "chili"])
+    assert names(min_quantity=2, sort="-quantity") == (2, ["chickpeas", "Chicken"])
+    assert names(category="MEAT") == (1, ["Chicken"])
+    assert names(prefix="chi", max_quantity=4) == (1, ["Chicken"])
+    assert names(sort="oldest", offset=1, limit=2) == (4, ["chickpeas", "chili"])
+    assert names(category="nope") == (0, [])
+
+
+def test_change_log_resync_after_overflow(monkeypatch):
+    monkeypatch.setattr(item_store, "CHANGE_LOG_SIZE", 5)
+    shard = InventoryShard("tester", safe_expiry_offsets)
+    first = shard.add(make_item())
+    seq = shard.version
+    assert shard.changes_since(0) == [(1, "add", first.id)]
+
+    for index in range(3):
+        shard.update(first.id, {"quantity": index})
+    # Repeated changes collapse to the latest one per item
+    assert shard.changes_since(seq) == [(shard.version, "update", first.id)]
+
+    for _ in range(10):
+        shard.add(make_item())
+    assert shard.changes_since(seq) is None
+    assert shard.changes_since(shard.version + 1) is None
+    assert shard.changes_since(shard.version) == []
+
+
+def test_encoded_cache_is_bounded_and_dropped_on_change():
+    store = ItemStore(safe_expiry_offsets)
+    store.encoded.size = 4
+    shard, other = store.shard("tester"), store.shard("someone else")
+    encodings = []
+
+    def encode(item):
+        encodings.append(item.id)
+        return (item.name, item.quantity)
+
+    ids = [shard.add(make_item(name=f"item {index}", quantity=index)).id for index in range(6)]
+    other.add(make_item(name="theirs"))
+    shard.list_encoded(encode)
+    other.list_encoded(encode)
+    # The budget is shared by every shard of the store
+    assert len(store.encoded) == 4
+
+    assert shard.get_encoded(ids[0], encode) == ("item 0", 0)
+    encodings.clear()
+    assert shard.get_encoded(ids[0], encode) == ("item 0", 0)
+    assert encodings == []
+
+    shard.update(ids[0], {"quantity": 9})
+    assert shard.get_encoded(ids[0], encode) == ("item 0", 9)
+    assert encodings == [ids[0]]
+
+    shard.delete(ids[0])
+    assert shard.get_encoded(ids[0], encode) is None
+    assert ("tester", ids[0]) not in store.encoded._entries
+
+
+def test_archiving_drops_cached_encodings():
+    store = ItemStore(safe_expiry_offsets)
+    shard = store.shard("tester")
+    old = shard.add(make_item(name="bread", category="bakery", days_ago=400))
+    shard.get_encoded(old.id, lambda item: (item.name,))
+    assert shard.archive_expired(TODAY, lambda items: None) == 1
+    assert len(store.encoded) == 0
@@ -0,0 +1,40 @@
+import pytest
+
+from utils.nutrition import add_nutrition, estimate_nutrition
+from utils.units import ingredient_amount
+
+
+def test_ingredient_amount_reads_both_formats():
+    assert ingredient_amount("salt") == ("salt", "")
+    assert ingredient_amount({"name": "pasta", "amount": "200 g"}) == ("pasta", "200 g")
+    assert ingredient_amount({"name": "egg", "amount": 2}) == ("egg", "2")
+    assert ingredient_amount({"name": "rice", "qty": 1.5, "unit": "cup"}) == ("rice", "1.5 cup")
+    assert ingredient_amount({"name": None}) == ("", "")
+
+
+def test_estimate_converts_units_and_divides_by_servings():
+    recipe = {
+        "servings": "2 servings",
+        "ingredients": [
+            {"name": "Pasta", "amount": "0.2 kg"},          # 200 g at 371 kcal / 100 g
+            {"name": "onion, diced", "amount": "1"},        # one 110 g piece at 40 kcal / 100 g
+            {"name": "salt", "amount": "to taste"},
+            {"name": "unobtainium", "amount": "3 g"},
+        ],
+    }
+    nutrition = estimate_nutrition(recipe)
+    assert nutrition["servings"] == 2
+    assert nutrition["perServing"]["kcal"] == round((742 + 44) / 2)
+    assert nutrition["perServing"]["protein"] == pytest.approx((26 + 1.21) / 2, abs=0.1)
+    assert nutrition["unmatched"] == ["unobtainium"]
+    assert nutrition["matched"] == 3
+
+
+def test_add_nutrition_fills_missing_calories_only():
+    recipe = add_nutrition({"ingredients": [{"name": "pasta", "amount": "100 g"}]})
+    assert recipe["calories"] == 371
+    assert recipe["nutrition"]["servings"] == 1
+
+    stated = add_nutrition({"calories": "450 kcal", "ingredients": [{"name": "pasta", "amount": "100 g"}]})
+    assert stated["calories"] == "450 kcal"
+    assert stated["nutrition"]["perServing"]["kcal"] == 371
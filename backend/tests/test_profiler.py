@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from services.profiler import ProfilingMiddleware, profiler_settings
+
+
+@pytest.fixture
+def settings(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiler_settings, "enabled", True)
+    monkeypatch.setattr(profiler_settings, "sample_rate", 1.0)
+    monkeypatch.setattr(profiler_settings, "slow_ms", 0.0)
+    monkeypatch.setattr(profiler_settings, "directory", str(tmp_path))
+    return profiler_settings
+
+
+def scope():
+    return {"type": "http", "method": "GET", "path": "/api/stream", "headers": []}
+
+
+async def discard(message):
+    pass
+
+
+def test_streaming_response_releases_the_profiler_at_response_start(settings, tmp_path):
+    async def run():
+        resume = asyncio.Event()
+        seen_busy = []
+
+        async def streaming_app(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            seen_busy.append(settings.busy)
+            await resume.wait()
+            await send({"type": "http.response.body", "body": b"data: done\n\n"})
+
+        middleware = ProfilingMiddleware(streaming_app)
+        task = asyncio.create_task(middleware(scope(), None, discard))
+        await asyncio.sleep(0.01)
+        assert seen_busy == [False]
+        assert len(list(tmp_path.glob("*.prof"))) == 1
+        resume.set()
+        await task
+
+    asyncio.run(run())
+    assert not settings.busy
+
+
+def test_only_sampled_requests_are_profiled(settings, tmp_path):
+    settings.sample_rate = 0.0
+    settings.slow_ms = 1.0
+
+    async def slow_app(scope, receive, send):
+        assert not settings.busy
+        await asyncio.sleep(0.01)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+
+    asyncio.run(ProfilingMiddleware(slow_app)(scope(), None, discard))
+    assert list(tmp_path.glob("*.prof")) == []
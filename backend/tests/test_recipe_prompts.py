@@ -0,0 +1,9 @@
+from services.openrouter_recipes import build_query_prompt
+
+
+def test_query_prompt_includes_only_set_preferences():
+    prompt = build_query_prompt("soup", {"dietary_type": "Vegan", "cuisine_type": "None", "difficulty": ""})
+    assert "Dietary preference: Vegan" in prompt
+    assert "Cuisine type" not in prompt and "Difficulty" not in prompt
+    assert build_query_prompt("soup") == build_query_prompt("soup", {})
+    assert build_query_prompt("soup").startswith("Generate a recipe based on this request: soup\n\nReturn")
@@ -0,0 +1,54 @@
+import asyncio
+import json
+import os
+import threading
+
+from services import openrouter_recipes
+from services.recipe_store import RecipeStore
+
+
+def recipe(title="Tomato soup", ingredients=("tomato", "onion", "salt")):
+    return {"title": title, "ingredients": [{"name": name, "amount": "1"} for name in ingredients]}
+
+
+def test_round_trip_survives_a_restart(tmp_path):
+    rid, stored = RecipeStore(str(tmp_path)).put(recipe())
+    reopened = RecipeStore(str(tmp_path))
+    assert reopened.get(rid) == stored
+    assert reopened.ids() == [rid]
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_corrupt_index_lines_are_skipped(tmp_path):
+    rid, _ = RecipeStore(str(tmp_path)).put(recipe())
+    with open(tmp_path / "index.ndjson", "a", encoding="utf-8") as f:
+        f.write('not json\n{"id": "abc"}\n{"id": "0123456789abcdef", "title": ["pa')
+
+    store = RecipeStore(str(tmp_path))
+    assert store.ids() == [rid]
+    # The torn last line doesn't swallow the next entry
+    other, _ = store.put(recipe("Beef stew", ("beef", "carrot", "potato")))
+    assert sorted(RecipeStore(str(tmp_path)).ids()) == sorted([rid, other])
+    last = (tmp_path / "index.ndjson").read_text(encoding="utf-8").splitlines()[-1]
+    assert json.loads(last)["id"] == other
+
+
+def test_generated_recipes_are_saved_off_the_event_loop(tmp_path, monkeypatch):
+    store = RecipeStore(str(tmp_path))
+    threads = []
+    put = store.put
+
+    def recording_put(recipe):
+        threads.append(threading.current_thread())
+        return put(recipe)
+
+    async def fake_completion(messages, **kwargs):
+        return recipe()
+
+    monkeypatch.setattr(store, "put", recording_put)
+    monkeypatch.setattr(openrouter_recipes, "recipe_store", store)
+    monkeypatch.setattr(openrouter_recipes, "chat_completion", fake_completion)
+
+    saved = asyncio.run(openrouter_recipes.generate_recipe("soup"))
+    assert store.get(saved["id"]) == saved
+    assert threads and threads[0] is not threading.main_thread()
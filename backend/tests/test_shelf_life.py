@@ -0,0 +1,18 @@
+from utils.predict_expiry import resolve_shelf_config
+from utils.shelf_life_kb import get_knowledge_base
+
+
+def test_lookup_respects_the_category():
+    kb = get_knowledge_base()
+    assert kb.lookup("peas", "vegetables").category == "vegetables"
+    assert kb.lookup("peas").name == "pea"
+    # A full-name match under another category isn't taken
+    assert kb.lookup("peas", "frozen") is None
+    assert kb.lookup("Peas", " Vegetables ") is not None
+
+
+def test_category_mismatch_falls_back_to_the_category_default():
+    _, config, matched = resolve_shelf_config("frozen", "peas")
+    _, default, _ = resolve_shelf_config("frozen")
+    assert matched is None
+    assert config == default
@@ -0,0 +1,41 @@
+from services.shopping_list import aggregate_ingredients
+from utils.units import parse_amount
+
+
+def test_parse_amount():
+    assert parse_amount("1 1/2 cups") == (1.5, "cup")
+    assert parse_amount("2-3 cloves")[0] == 3
+    assert parse_amount("to taste")[0] is None
+    # A zero denominator is unparseable, not a crash
+    assert parse_amount("1/0 cup")[0] is None
+
+
+def test_malformed_recipes_are_skipped():
+    recipes = [
+        {"title": "odd", "ingredients": "salt, pepper"},
+        {"title": "empty", "ingredients": None},
+        {"title": "soup", "ingredients": [3, None, {"name": "onion", "amount": "2"}, "salt"]},
+    ]
+    items = {item["key"]: item for item in aggregate_ingredients(recipes)["items"]}
+    assert set(items) == {"onion", "salt"}
+    assert items["onion"]["quantity"] == 2
+    assert items["onion"]["recipes"] == ["soup"]
+
+
+def test_units_are_converted_before_merging():
+    recipes = [
+        {"title": "bake", "ingredients": [{"name": "pasta", "amount": "200 g"}]},
+        {"title": "salad", "ingredients": [{"name": "Pasta", "amount": "0.2 kg"}]},
+    ]
+    (line,) = aggregate_ingredients(recipes)["items"]
+    assert (line["key"], line["quantity"], line["unit"]) == ("pasta", 400, "g")
+    assert line["recipes"] == ["bake", "salad"]
+
+
+def test_unit_in_the_name_merges_with_the_same_unit_in_the_amount():
+    recipes = [
+        {"title": "soup", "ingredients": [{"name": "Garlic cloves", "amount": "3"}]},
+        {"title": "stir fry", "ingredients": [{"name": "garlic", "amount": "2 cloves"}]},
+    ]
+    (line,) = aggregate_ingredients(recipes)["items"]
+    assert (line["key"], line["quantity"], line["unit"]) == ("garlic", 5, "clove")
@@ -0,0 +1,130 @@
+"""
+Template advice for items that aren't close to expiry.
+Advice for a spice with months left barely depends on the item, so it is
+assembled locally from per-category storage tips and quick ideas instead of
+an LLM call. The text uses the same sections as the LLM prompt asks for
+(urgency, two quick recipes, a storage tip, a sign-off), so clients render
+either kind the same way.
+"""
+
+import os
+import zlib
+from typing import Dict, List, Tuple
+
+from utils.predict_expiry import FOOD_DATA
+
+# Items with more days left than this get template advice unless more ideas are requested
+ADVICE_LLM_THRESHOLD_DAYS = int(os.getenv("ADVICE_LLM_THRESHOLD_DAYS", "3"))
+
+# (title, steps) - "{item}" is replaced with the item name
+Idea = Tuple[str, List[str]]
+
+CATEGORY_ADVICE: Dict[str, Dict] = {
+    "dairy": {
+        "storage": "Keep it at the back of the fridge rather than in the door, tightly closed, and always use a clean spoon.",
+        "ideas": [
+            ("Creamy {item} Pasta", ["Cook pasta until al dente", "Stir {item} into the hot pasta with a splash of pasta water", "Season with pepper and herbs and serve"]),
+            ("{item} Smoothie", ["Blend {item} with a banana and a handful of berries", "Add honey or oats to taste", "Serve chilled"]),
+            ("Savoury {item} Toast", ["Toast a thick slice of bread", "Top with {item}, sliced tomato and black pepper", "Grill for 2 minutes until warm"]),
+        ],
+    },
+    "vegetables": {
+        "storage": "Store unwashed in a breathable bag in the crisper drawer; wash just before using.",
+        "ideas": [
+            ("Quick {item} Stir-Fry", ["Slice {item} thinly", "Stir-fry in a hot pan with garlic and a little oil", "Finish with soy sauce and serve over rice"]),
+            ("Roasted {item}", ["Toss {item} with oil, salt and pepper", "Roast at 200°C for 20-25 minutes", "Finish with lemon juice"]),
+            ("{item} Soup", ["Soften onion in a pot, add chopped {item}", "Cover with stock and simmer 15 minutes", "Blend and season to taste"]),
+        ],
+    },
+    "fruits": {
+        "storage": "Keep ripe fruit in the fridge and away from ethylene producers like bananas and apples.",
+        "ideas": [
+            ("{item} Yogurt Bowl", ["Chop {item}", "Layer with yogurt and granola", "Drizzle with honey"]),
+            ("Baked {item} Crumble", ["Slice {item} into a baking dish", "Rub flour, butter and sugar into crumbs and scatter over", "Bake at 180°C for 25 minutes"]),
+            ("{item} Smoothie", ["Blend {item} with milk or juice", "Add ice and a spoon of oats", "Serve straight away"]),
+        ],
+    },
+    "meat": {
+        "storage": "Keep it on the lowest fridge shelf in a sealed container, or freeze it in portions if plans change.",
+        "ideas": [
+            ("Pan-Seared {item}", ["Pat {item} dry and season well", "Sear in a hot pan until cooked through", "Rest 5 minutes, then slice"]),
+            ("{item} Skewers", ["Cut {item} into cubes and marinate 15 minutes", "Thread onto skewers with vegetables", "Grill, turning, until cooked through"]),
+            ("One-Pot {item} Rice", ["Brown {item} in a pot", "Add rice, stock and spices", "Cover and simmer 18 minutes"]),
+        ],
+    },
+    "packaged": {
+        "storage": "Keep it sealed in a cool, dry cupboard; once opened, move it to an airtight container.",
+        "ideas": [
+            ("Pantry {item} Bake", ["Combine {item} with vegetables you have on hand", "Top with cheese or breadcrumbs", "Bake at 190°C for 20 minutes"]),
+            ("Quick {item} Bowl", ["Prepare {item} as the pack directs", "Add a fried egg and greens", "Season with sauce or spices"]),
+            ("{item} Salad", ["Prepare {item} and let it cool", "Toss with chopped vegetables and a simple vinaigrette", "Chill 10 minutes before serving"]),
+        ],
+    },
+    "spices": {
+        "storage": "Keep it tightly closed, away from the stove and sunlight; whole spices keep longer than ground.",
+        "ideas": [
+            ("{item}-Spiced Roast Vegetables", ["Toss vegetables with oil and a teaspoon of {item}", "Roast at 200°C for 25 minutes", "Finish with salt and lemon"]),
+            ("{item} Rice", ["Toast {item} in a little oil for 30 seconds", "Add rice and water", "Cover and cook until fluffy"]),
+            ("{item} Spice Rub", ["Mix {item} with salt, pepper and garlic powder", "Rub onto meat, tofu or vegetables", "Rest 15 minutes before cooking"]),
+        ],
+    },
+    "bakery": {
+        "storage": "Keep it in a bread bag at room temperature, or slice and freeze what you won't eat in two days.",
+        "ideas": [
+            ("{item} French Toast", ["Whisk eggs, milk and cinnamon", "Soak slices of {item}", "Fry in butter until golden"]),
+            ("{item} Croutons", ["Cube {item} and toss with oil and herbs", "Bake at 180°C for 10-12 minutes", "Scatter over soup or salad"]),
+            ("{item} Bread Pudding", ["Tear {item} into a dish", "Pour over sweetened egg custard", "Bake at 170°C for 35 minutes"]),
+        ],
+    },
+    "frozen": {
+        "storage": "Keep the freezer at -18°C, reseal opened bags tightly, and label them with the date.",
+        "ideas": [
+            ("{item} Fried Rice", ["Fry {item} straight from frozen", "Add cooked rice and soy sauce", "Push aside, scramble an egg, and mix through"]),
+            ("{item} Soup", ["Add {item} to simmering stock", "Season with herbs and garlic", "Simmer 10 minutes and serve"]),
+            ("{item} Traybake", ["Spread {item} on a tray with oil and seasoning", "Roast at 200°C for 20 minutes", "Serve with a dip"]),
+        ],
+    },
+}
+
+
+def _urgency(item_name: str, days_left: int) -> str:
+    if days_left > 60:
+        return f"No rush - your {item_name} should stay good for around {days_left // 30} months."
+    if days_left > 14:
+        return f"Plenty of time - use your {item_name} within the next {days_left // 7} weeks."
+    return f"Use your {item_name} within {days_left} days."
+
+
+def template_advice(item_name: str, category: str, days_left: int) -> str:
+    """
+    Advice text for an item, built without an LLM.
+
+    Args:
+        item_name: Name of the food item
+        category: Food category (unknown categories use the packaged tips)
+        days_left: Days until safe expiry
+
+    Returns:
+        Text with the same sections as generate_advice_for_item
+    """
+    cat_lower = category.lower()
+    entry = CATEGORY_ADVICE.get(cat_lower if cat_lower in FOOD_DATA else "packaged", CATEGORY_ADVICE["packaged"])
+    name = item_name.strip() or "item"
+    title_name = name[:1].upper() + name[1:]
+
+    # Vary the two ideas per item, but keep them stable between requests
+    ideas = entry["ideas"]
+    start = zlib.crc32(name.lower().encode()) % len(ideas)
+    chosen = [ideas[(start + offset) % len(ideas)] for offset in range(2)]
+
+    lines = [f"**{_urgency(name, days_left)}**", "", "**Quick ideas:**"]
+    for number, (title, steps) in enumerate(chosen, 1):
+        lines.append(f"{number}. **{title.format(item=title_name)}**")
+        lines.extend(f"   - {step.format(item=name)}" for step in steps)
+    lines += [
+        "",
+        f"**Storage tip:** {entry['storage']}",
+        "",
+        "Enjoy your cooking - ask for more ideas any time!",
+    ]
+    return "\n".join(lines)
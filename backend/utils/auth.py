@@ -1,28 +1,71 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+import asyncio
+import hashlib
 import os
+import secrets
+import threading
+import time
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# passlib (bcrypt) and python-jose are imported on first use so that importing
+# this module stays cheap on serverless cold starts.
+
+# bcrypt cost factor (each +1 doubles hashing time)
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Threads available for hashing - bounds how many logins burn CPU at once
+AUTH_HASH_WORKERS = int(os.getenv("AUTH_HASH_WORKERS", "2"))
+
+@lru_cache(maxsize=1)
+def get_pwd_context():
+    """Password hashing context, built on first use."""
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+@lru_cache(maxsize=1)
+def get_hash_executor() -> ThreadPoolExecutor:
+    """Bounded worker pool for bcrypt so hashing never runs on the event loop."""
+    return ThreadPoolExecutor(max_workers=AUTH_HASH_WORKERS, thread_name_prefix="auth-hash")
 
 # JWT settings
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-this-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 days
 
+# Verified-token cache (keyed by SHA-256 of the token, never the token itself)
+TOKEN_CACHE_TTL_SECONDS = int(os.getenv("TOKEN_CACHE_TTL_SECONDS", "300"))
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "1024"))
+
+# Shared secret for /api/admin routes (admin API disabled when unset)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+_token_cache: "OrderedDict[str, tuple]" = OrderedDict()  # digest -> (email, cached_until)
+_revoked_tokens: dict = {}  # digest -> token expiry (epoch seconds)
+_token_lock = threading.Lock()
+
 security = HTTPBearer()
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     """Hash a password."""
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the hashing pool without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_hash_executor(), verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the hashing pool without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_hash_executor(), get_password_hash, password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
@@ -32,28 +75,120 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
+    from jose import jwt
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def _decode_payload(token: str) -> Optional[dict]:
+    """Decode and verify a JWT, returning its payload or None."""
+    from jose import JWTError, jwt
+    try:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+
 def decode_access_token(token: str) -> Optional[str]:
     """Decode and validate a JWT token."""
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
+    payload = _decode_payload(token)
+    if payload is None:
+        return None
+    email: str = payload.get("sub")
+    if email is None:
+        return None
+    return email
+
+def _token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def decode_access_token_cached(token: str) -> Optional[str]:
+    """
+    Validate a JWT token, reusing earlier verifications.
+
+    Verified tokens are cached for TOKEN_CACHE_TTL_SECONDS (never past their
+    own expiry). Revoked tokens are rejected even while cached.
+
+    Returns:
+        Email from the token subject, or None if invalid/revoked
+    """
+    digest = _token_digest(token)
+    now = time.time()
+
+    with _token_lock:
+        if digest in _revoked_tokens:
             return None
-        return email
-    except JWTError:
+        cached = _token_cache.get(digest)
+        if cached is not None:
+            email, cached_until = cached
+            if now < cached_until:
+                _token_cache.move_to_end(digest)
+                return email
+            del _token_cache[digest]
+
+    payload = _decode_payload(token)
+    email = payload.get("sub") if payload else None
+    if email is None:
         return None
 
+    cached_until = min(now + TOKEN_CACHE_TTL_SECONDS, payload.get("exp", now))
+    with _token_lock:
+        if digest in _revoked_tokens:
+            return None
+        _token_cache[digest] = (email, cached_until)
+        _token_cache.move_to_end(digest)
+        while len(_token_cache) > TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+    return email
+
+def revoke_token(token: str) -> None:
+    """Revoke a token (e.g. on logout) and drop it from the verification cache."""
+    digest = _token_digest(token)
+    payload = _decode_payload(token)
+    now = time.time()
+    # Keep the revocation only as long as the token itself could still be valid
+    expires_at = payload.get("exp", now + ACCESS_TOKEN_EXPIRE_MINUTES * 60) if payload else now
+
+    with _token_lock:
+        _token_cache.pop(digest, None)
+        for revoked, revoked_until in list(_revoked_tokens.items()):
+            if revoked_until <= now:
+                del _revoked_tokens[revoked]
+        if expires_at > now:
+            _revoked_tokens[digest] = expires_at
+
+def credentials_exception() -> HTTPException:
+    """401 for a missing, malformed, invalid, expired or revoked token."""
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid authentication credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
 async def get_current_user_email(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
     """Dependency to get the current user's email from JWT token."""
     token = credentials.credentials
-    email = decode_access_token(token)
+    email = decode_access_token_cached(token)
     if email is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise credentials_exception()
     return email
+
+async def get_optional_user_email(authorization: Optional[str] = Header(default=None)) -> Optional[str]:
+    """
+    Dependency returning the current user's email, or None when no
+    Authorization header is sent. A header that is sent but doesn't hold a
+    valid bearer token is a 401 rather than a silent fall back to anonymous.
+    """
+    if authorization is None:
+        return None
+    scheme, _, token = authorization.partition(" ")
+    token = token.strip()
+    email = decode_access_token_cached(token) if scheme.lower() == "bearer" and token else None
+    if email is None:
+        raise credentials_exception()
+    return email
+
+async def require_admin(x_admin_token: Optional[str] = Header(default=None)) -> None:
+    """Dependency guarding admin routes with the ADMIN_TOKEN shared secret (X-Admin-Token header)."""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin token")
@@ -0,0 +1,114 @@
+"""
+Import-time profiler for the serverless entry point.
+Runs `python -X importtime` on a module in a fresh interpreter, prints the
+slowest imports and fails when the total exceeds the cold-start budget.
+
+Usage:
+    python -m utils.import_profile                      # profiles api.index
+    python -m utils.import_profile main --top 20
+    python -m utils.import_profile api.index --budget-ms 800
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cold-start regression budget for importing the entry point (milliseconds)
+DEFAULT_BUDGET_MS = float(os.getenv("COLD_START_BUDGET_MS", "1500"))
+
+
+def profile_imports(module: str) -> List[Dict]:
+    """
+    Import a module in a clean interpreter and collect -X importtime output.
+
+    Args:
+        module: Dotted module name to import (e.g. "api.index")
+
+    Returns:
+        List of entries with module name, depth, self and cumulative time (us)
+    """
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        entries.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+        })
+    return entries
+
+
+def build_report(module: str, top: int = 15) -> Dict:
+    """
+    Summarize import cost for a module.
+
+    Returns:
+        Dictionary with total time and the slowest top-level packages/modules
+    """
+    entries = profile_imports(module)
+    # The target's own cumulative time excludes interpreter startup (site, encodings)
+    total_us = next(
+        (entry["cumulative_us"] for entry in entries if entry["module"] == module and entry["depth"] == 0),
+        sum(entry["self_us"] for entry in entries),
+    )
+    top_level = [entry for entry in entries if entry["depth"] <= 2]
+
+    return {
+        "module": module,
+        "total_ms": round(total_us / 1000, 1),
+        "slowest_packages": sorted(top_level, key=lambda e: e["cumulative_us"], reverse=True)[:top],
+        "slowest_modules": sorted(entries, key=lambda e: e["self_us"], reverse=True)[:top],
+    }
+
+
+def print_report(report: Dict) -> None:
+    """Print a human-readable import profile."""
+    print(f"\n{'='*60}")
+    print(f"  Import profile: {report['module']} ({report['total_ms']} ms)")
+    print(f"{'='*60}\n")
+
+    print("Slowest packages (cumulative):")
+    for entry in report["slowest_packages"]:
+        print(f"  {entry['cumulative_us'] / 1000:8.1f} ms  {entry['module']}")
+
+    print("\nSlowest modules (self):")
+    for entry in report["slowest_modules"]:
+        print(f"  {entry['self_us'] / 1000:8.1f} ms  {entry['module']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile import time of the backend entry point")
+    parser.add_argument("module", nargs="?", default="api.index")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    args = parser.parse_args()
+
+    report = build_report(args.module, top=args.top)
+    print_report(report)
+
+    if report["total_ms"] > args.budget_ms:
+        print(f"\n❌ Cold-start budget exceeded: {report['total_ms']} ms > {args.budget_ms} ms")
+        sys.exit(1)
+    print(f"\n✓ Within cold-start budget: {report['total_ms']} ms <= {args.budget_ms} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Deterministic nutrition estimates for recipes.
+A bundled per-100 g nutrient table (data/nutrition.csv) is loaded once into
+typed columns indexed by canonical ingredient name. Ingredient amounts are
+converted to grams with the unit parser plus per-ingredient densities and
+piece weights, and a recipe's totals are one pass over those columns - so
+enriching a response costs microseconds, not another LLM call.
+"""
+
+import csv
+import os
+import re
+from array import array
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from utils.units import MASS, VOLUME, canonical_ingredient, ingredient_amount, parse_amount, to_base
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NUTRITION_CSV_PATH = os.getenv("NUTRITION_CSV_PATH", os.path.join(BACKEND_DIR, "data", "nutrition.csv"))
+
+NUTRIENTS = ("kcal", "protein", "carbs", "fat", "fiber")
+
+# Typical weight in grams of one countable unit when the table has no piece weight
+COUNT_GRAMS = {
+    "piece": 100.0, "clove": 3.0, "head": 500.0, "leaf": 0.5, "slice": 30.0, "can": 400.0,
+    "bunch": 100.0, "sprig": 1.0, "stalk": 40.0, "stick": 113.0, "fillet": 150.0, "pinch": 0.3,
+    "dash": 0.6, "handful": 30.0, "packet": 200.0, "bottle": 500.0, "jar": 400.0, "loaf": 500.0,
+}
+
+_SERVINGS = re.compile(r"\d+")
+
+
+class NutritionTable:
+    """Nutrient columns per 100 g, plus density (g/ml) and piece weight (g)."""
+
+    def __init__(self, rows: List[Dict[str, str]]):
+        self.index: Dict[str, int] = {}
+        self.columns = {nutrient: array("d") for nutrient in NUTRIENTS}
+        self.density = array("d")
+        self.piece_grams = array("d")   # 0 when unknown
+        for row in rows:
+            name = canonical_ingredient(row["name"])
+            if name in self.index:
+                continue
+            self.index[name] = len(self.density)
+            for nutrient in NUTRIENTS:
+                self.columns[nutrient].append(float(row[nutrient]))
+            self.density.append(float(row["density"] or 1.0))
+            self.piece_grams.append(float(row["piece_g"] or 0.0))
+
+    def find(self, key: str) -> Optional[int]:
+        """
+        Row for a canonical ingredient name: exact match, then the longest
+        trailing words ("basmati rice" -> "rice"), then leading words
+        ("parmesan cheese" -> "parmesan").
+        """
+        row = self.index.get(key)
+        if row is not None:
+            return row
+        words = key.split()
+        for start in range(1, len(words)):
+            row = self.index.get(" ".join(words[start:]))
+            if row is not None:
+                return row
+        for end in range(len(words) - 1, 0, -1):
+            row = self.index.get(" ".join(words[:end]))
+            if row is not None:
+                return row
+        return None
+
+
+@lru_cache(maxsize=1)
+def get_nutrition_table() -> NutritionTable:
+    try:
+        with open(NUTRITION_CSV_PATH, newline="", encoding="utf-8") as f:
+            return NutritionTable(list(csv.DictReader(f)))
+    except OSError as e:
+        print(f"Nutrition table unavailable: {e}")
+        return NutritionTable([])
+
+
+@lru_cache(maxsize=4096)
+def ingredient_grams(name: str, amount: str) -> Tuple[Optional[int], float]:
+    """
+    Resolve one ingredient to (table row or None, grams).
+
+    Unquantified amounts ("to taste") count as 0 g.
+    """
+    table = get_nutrition_table()
+    row = table.find(canonical_ingredient(name))
+    quantity, unit = parse_amount(amount)
+    dimension, base_quantity, base_unit = to_base(quantity, unit)
+    if row is None or base_quantity is None:
+        return row, 0.0
+    if dimension == MASS:
+        return row, base_quantity
+    if dimension == VOLUME:
+        return row, base_quantity * table.density[row]
+    piece = table.piece_grams[row] if base_unit == "piece" else 0.0
+    return row, base_quantity * (piece or COUNT_GRAMS.get(base_unit, 100.0))
+
+
+def parse_servings(servings) -> int:
+    match = _SERVINGS.search(str(servings or ""))
+    return max(int(match.group()), 1) if match else 1
+
+
+def estimate_nutrition(recipe: dict) -> dict:
+    """
+    Per-serving calories and macros for a recipe.
+
+    Returns:
+        {"servings", "perServing": {kcal, protein, carbs, fat, fiber},
+        "matched": ingredients found in the table, "unmatched": names not found}
+    """
+    table = get_nutrition_table()
+    rows, grams, unmatched = [], [], []
+    ingredients = recipe.get("ingredients") or []
+    for ingredient in ingredients:
+        name, amount = ingredient_amount(ingredient)
+        row, weight = ingredient_grams(name, amount)
+        if row is None:
+            unmatched.append(name)
+        elif weight:
+            rows.append(row)
+            grams.append(weight / 100)
+
+    servings = parse_servings(recipe.get("servings"))
+    per_serving = {}
+    for nutrient, column in table.columns.items():
+        total = sum(column[row] * factor for row, factor in zip(rows, grams))
+        per_serving[nutrient] = round(total / servings, 1)
+    per_serving["kcal"] = round(per_serving["kcal"])
+    return {
+        "servings": servings,
+        "perServing": per_serving,
+        "matched": len(ingredients) - len(unmatched),
+        "unmatched": unmatched,
+    }
+
+
+def add_nutrition(recipe: dict) -> dict:
+    """Attach a nutrition estimate; recipes without calories get the per-serving kcal."""
+    nutrition = estimate_nutrition(recipe)
+    recipe["nutrition"] = nutrition
+    if recipe.get("calories") in (None, "", "Unknown"):
+        recipe["calories"] = nutrition["perServing"]["kcal"]
+    return recipe
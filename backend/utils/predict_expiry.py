@@ -4,7 +4,9 @@ Calculates manufacturing date, predicted expiry, and safe expiry dates.
 """
 
 from datetime import datetime, timedelta
-from typing import Dict, Literal, Optional
+from typing import Dict, Literal, Optional, Tuple
+
+from utils.shelf_life_kb import get_knowledge_base
 
 Category = Literal[
     "dairy", "vegetables", "fruits", "meat", 
@@ -33,10 +35,43 @@ def add_days(date: datetime, days: int) -> datetime:
     """Add days to a datetime object."""
     return date + timedelta(days=days)
 
+def resolve_shelf_config(category: str, item_name: Optional[str] = None) -> Tuple[str, FoodConfig, Optional[str]]:
+    """
+    Shelf-life parameters for an item.
+
+    Returns:
+        (lowercased category, config with store_delay/shelf_life/safety_percent,
+        matched knowledge-base item name or None)
+    """
+    # Normalize category to lowercase
+    cat_lower = category.lower()
+    config = FOOD_DATA.get(cat_lower, FOOD_DATA["packaged"])
+    
+    # Prefer item-specific data from the shelf-life knowledge base
+    matched_item = None
+    kb = get_knowledge_base() if item_name else None
+    entry = kb.lookup(item_name, cat_lower if cat_lower in FOOD_DATA else None) if kb else None
+    if entry is not None:
+        config = entry
+        matched_item = entry.name
+    return cat_lower, config, matched_item
+
+def safe_expiry_offsets(category: str, item_name: Optional[str] = None) -> Tuple[int, int]:
+    """
+    Day offsets for date-only expiry scans.
+
+    Returns:
+        (days from manufacture back to purchase, days from manufacture to safe expiry)
+    """
+    _, config, _ = resolve_shelf_config(category, item_name)
+    safety_days = max(1, int((config.shelf_life * config.safety_percent) / 100))
+    return config.store_delay, config.shelf_life - safety_days
+
 def predict_expiry(
     category: str, 
     purchase_date: str | datetime, 
-    override_manufactured: Optional[datetime] = None
+    override_manufactured: Optional[datetime] = None,
+    item_name: Optional[str] = None
 ) -> Dict:
     """
     Predict expiry dates for a food item.
@@ -45,13 +80,12 @@ def predict_expiry(
         category: Food category (dairy, vegetables, etc.)
         purchase_date: Date when item was purchased
         override_manufactured: Optional manufactured date if known
+        item_name: Optional item name for item-specific shelf-life data
         
     Returns:
         Dictionary with prediction details including safe expiry date
     """
-    # Normalize category to lowercase
-    cat_lower = category.lower()
-    config = FOOD_DATA.get(cat_lower, FOOD_DATA["packaged"])
+    cat_lower, config, matched_item = resolve_shelf_config(category, item_name)
     
     # Parse purchase date if string
     if isinstance(purchase_date, str):
@@ -80,6 +114,7 @@ def predict_expiry(
         "safeExpiry": safe_expiry.isoformat(),
         "shelfLifeDays": config.shelf_life,
         "safetyDays": safety_days,
+        "matchedItem": matched_item,
     }
 
 def calculate_days_left(safe_expiry: str | datetime) -> int:
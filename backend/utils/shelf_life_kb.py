@@ -0,0 +1,184 @@
+"""
+Item-level shelf-life knowledge base.
+Per-food store delay, shelf life and safety percent, compiled from
+data/shelf_life.csv into a compact sorted binary table that is memory-mapped
+and binary-searched by normalized item name - nothing is loaded into Python
+objects except the record being looked up.
+
+Rebuild the table after editing the CSV:
+    python -m utils.shelf_life_kb build
+"""
+
+import csv
+import mmap
+import os
+import re
+import struct
+import sys
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+CSV_PATH = os.path.join(DATA_DIR, "shelf_life.csv")
+KB_PATH = os.getenv("SHELF_LIFE_KB_PATH", os.path.join(DATA_DIR, "shelf_life.bin"))
+
+CATEGORIES = ["dairy", "vegetables", "fruits", "meat", "packaged", "spices", "bakery", "frozen"]
+
+# File layout: header, then fixed-size records sorted by key
+MAGIC = b"SLKB"
+HEADER = struct.Struct("<4sHHI")          # magic, format version, record size, record count
+KEY_SIZE = 32                             # normalized name, UTF-8, NUL padded
+RECORD = struct.Struct(f"<{KEY_SIZE}sHHBB")  # key, store_delay, shelf_life, safety_percent, category
+FORMAT_VERSION = 1
+
+_WORD = re.compile(r"[a-z0-9']+")
+
+
+def _singular(word: str) -> str:
+    """Crude English singularization - applied identically at build and lookup time."""
+    if len(word) <= 3 or word.endswith(("ss", "us", "is")):
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith(("oes", "ches", "shes", "xes")):
+        return word[:-2]
+    if word.endswith("s"):
+        return word[:-1]
+    return word
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase, drop punctuation, collapse whitespace and singularize each word."""
+    words = [_singular(word) for word in _WORD.findall(name.lower())]
+    return " ".join(words)
+
+
+def _encode_key(name: str) -> bytes:
+    return name.encode("utf-8")[:KEY_SIZE].ljust(KEY_SIZE, b"\0")
+
+
+class ShelfLifeEntry:
+    __slots__ = ("name", "category", "store_delay", "shelf_life", "safety_percent")
+
+    def __init__(self, name: str, category: str, store_delay: int, shelf_life: int, safety_percent: int):
+        self.name = name
+        self.category = category
+        self.store_delay = store_delay
+        self.shelf_life = shelf_life
+        self.safety_percent = safety_percent
+
+
+class ShelfLifeKB:
+    """Read-only view over the memory-mapped shelf-life table."""
+
+    def __init__(self, path: str = KB_PATH):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, record_size, count = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != FORMAT_VERSION or record_size != RECORD.size:
+            raise ValueError(f"Unsupported shelf-life table: {path}")
+        self.count = count
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _key_at(self, index: int) -> bytes:
+        offset = HEADER.size + index * RECORD.size
+        return self._mm[offset:offset + KEY_SIZE]
+
+    def _find(self, name: str) -> Optional[ShelfLifeEntry]:
+        key = _encode_key(name)
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count and self._key_at(lo) == key:
+            raw, store_delay, shelf_life, safety_percent, category = RECORD.unpack_from(
+                self._mm, HEADER.size + lo * RECORD.size
+            )
+            return ShelfLifeEntry(
+                raw.rstrip(b"\0").decode("utf-8"), CATEGORIES[category], store_delay, shelf_life, safety_percent
+            )
+        return None
+
+    def lookup(self, item_name: str, category: Optional[str] = None) -> Optional[ShelfLifeEntry]:
+        """
+        Find shelf-life data for a free-text item name.
+
+        Tries the full normalized name first, then shorter word runs, longest
+        first and preferring the end of the name where the head noun usually
+        is ("organic greek yogurt" -> "greek yogurt" -> "yogurt"). When a
+        `category` is given, matches (full-name ones included) must agree with
+        it, so "chicken stock" doesn't resolve to raw chicken and frozen peas
+        don't get the fresh vegetable's shelf life.
+
+        Returns:
+            Matching entry, or None if the item is unknown (or only known
+            under another category - callers then use the category default)
+        """
+        words = normalize_name(item_name).split()
+        count = len(words)
+        for length in range(count, 0, -1):
+            for start in range(count - length, -1, -1):
+                entry = self._find(" ".join(words[start:start + length]))
+                if entry is None:
+                    continue
+                if category is None or entry.category == category.strip().lower():
+                    return entry
+        return None
+
+
+@lru_cache(maxsize=1)
+def get_knowledge_base() -> Optional[ShelfLifeKB]:
+    """Shared knowledge base instance, or None if the table hasn't been built."""
+    try:
+        return ShelfLifeKB()
+    except (OSError, ValueError) as e:
+        print(f"Shelf-life knowledge base unavailable: {e}")
+        return None
+
+
+def read_csv(path: str = CSV_PATH) -> List[Tuple[str, str, int, int, int]]:
+    """Read source rows (name, category, store_delay, shelf_life, safety_percent)."""
+    with open(path, newline="", encoding="utf-8") as f:
+        return [
+            (row["name"], row["category"], int(row["store_delay"]), int(row["shelf_life"]), int(row["safety_percent"]))
+            for row in csv.DictReader(f)
+        ]
+
+
+def build(rows: Iterable[Tuple[str, str, int, int, int]], path: str = KB_PATH) -> int:
+    """
+    Compile rows into the binary table (duplicates after normalization keep the first row).
+
+    Returns:
+        Number of records written
+    """
+    records = {}
+    for name, category, store_delay, shelf_life, safety_percent in rows:
+        key = _encode_key(normalize_name(name))
+        if key not in records:
+            records[key] = RECORD.pack(key, store_delay, shelf_life, safety_percent, CATEGORIES.index(category))
+
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, RECORD.size, len(records)))
+        for key in sorted(records):
+            f.write(records[key])
+    return len(records)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "build":
+        count = build(read_csv())
+        print(f"✓ Wrote {count} entries to {KB_PATH}")
+    else:
+        kb = get_knowledge_base()
+        for query in sys.argv[1:]:
+            entry = kb.lookup(query) if kb else None
+            print(f"{query!r}: " + (
+                f"{entry.name} ({entry.category}) delay={entry.store_delay} "
+                f"shelf={entry.shelf_life} safety={entry.safety_percent}%" if entry else "not found"
+            ))
@@ -0,0 +1,167 @@
+"""
+Ingredient quantity parsing and unit normalization.
+Turns free-text amounts ("1 1/2 cups", "200 g", "½ tsp") into a quantity in
+a base unit per dimension (grams, millilitres or a count), and ingredient
+names into canonical keys so equivalent entries can be merged.
+"""
+
+import re
+from typing import Optional, Tuple
+
+from utils.shelf_life_kb import normalize_name
+
+# unit alias -> (dimension, factor to the dimension's base unit)
+MASS, VOLUME = "mass", "volume"
+UNITS = {
+    "g": (MASS, 1.0), "gram": (MASS, 1.0), "gm": (MASS, 1.0), "gr": (MASS, 1.0),
+    "kg": (MASS, 1000.0), "kilogram": (MASS, 1000.0), "kilo": (MASS, 1000.0),
+    "mg": (MASS, 0.001), "milligram": (MASS, 0.001),
+    "oz": (MASS, 28.35), "ounce": (MASS, 28.35),
+    "lb": (MASS, 453.6), "pound": (MASS, 453.6),
+    "ml": (VOLUME, 1.0), "millilitre": (VOLUME, 1.0), "milliliter": (VOLUME, 1.0),
+    "l": (VOLUME, 1000.0), "litre": (VOLUME, 1000.0), "liter": (VOLUME, 1000.0),
+    "dl": (VOLUME, 100.0), "cl": (VOLUME, 10.0),
+    "tsp": (VOLUME, 4.93), "teaspoon": (VOLUME, 4.93),
+    "tbsp": (VOLUME, 14.79), "tablespoon": (VOLUME, 14.79), "tbs": (VOLUME, 14.79),
+    "cup": (VOLUME, 240.0), "c": (VOLUME, 240.0),
+    "fl oz": (VOLUME, 29.57), "pint": (VOLUME, 473.0), "quart": (VOLUME, 946.0),
+    "gallon": (VOLUME, 3785.0),
+}
+BASE_UNITS = {MASS: "g", VOLUME: "ml"}
+
+# Countable units that stay as their own dimension ("2 cloves" never merges with "2 heads")
+COUNT_UNITS = {
+    "pc": "piece", "pcs": "piece", "piece": "piece", "whole": "piece", "": "piece", "no": "piece", "nos": "piece",
+    "clove": "clove", "head": "head", "leaf": "leaf", "leave": "leaf", "slice": "slice", "can": "can", "tin": "can",
+    "bunch": "bunch", "sprig": "sprig", "stalk": "stalk", "stick": "stick", "fillet": "fillet", "pinch": "pinch",
+    "dash": "dash", "handful": "handful", "packet": "packet", "pack": "packet", "bottle": "bottle", "jar": "jar",
+    "loaf": "loaf", "egg": "piece",
+}
+
+# Unit words sometimes written into the ingredient name
+NAME_UNIT_SUFFIXES = {"clove", "sprig", "stalk", "head", "bunch", "fillet"}
+
+FRACTIONS = {"½": "1/2", "¼": "1/4", "¾": "3/4", "⅓": "1/3", "⅔": "2/3", "⅛": "1/8"}
+
+# Words that describe preparation or size rather than the ingredient itself
+DESCRIPTORS = {
+    "fresh", "freshly", "chopped", "diced", "minced", "sliced", "grated", "shredded", "crushed", "ground",
+    "large", "small", "medium", "ripe", "organic", "finely", "roughly", "thinly", "peeled", "boneless",
+    "skinless", "cooked", "raw", "optional", "to", "taste", "divided", "softened", "melted", "warm", "cold",
+}
+
+# Regional / synonym names mapped to one canonical ingredient
+ALIASES = {
+    "scallion": "spring onion", "green onion": "spring onion", "cilantro": "coriander",
+    "coriander leaf": "coriander", "garbanzo bean": "chickpea", "aubergine": "eggplant", "brinjal": "eggplant",
+    "courgette": "zucchini", "capsicum": "bell pepper", "bhindi": "okra", "curd": "yogurt",
+    "maida": "all purpose flour", "plain flour": "all purpose flour", "atta": "wheat flour",
+    "basil leaf": "basil", "basil leave": "basil", "mint leaf": "mint", "mint leave": "mint",
+    "bay leave": "bay leaf", "curry leave": "curry leaf",
+    "chilli": "chili", "chile": "chili", "chili pepper": "chili", "green chili": "chili",
+}
+
+_NUMBER = r"(?:\d+\s+\d+/\d+|\d+/\d+|\d+(?:\.\d+)?|\.\d+)"
+_AMOUNT = re.compile(rf"^\s*(?P<qty>{_NUMBER})(?:\s*(?:-|to)\s*(?P<upper>{_NUMBER}))?\s*(?P<unit>.*)$")
+
+
+def _to_number(text: str) -> Optional[float]:
+    """Value of a matched number ("1 1/2" -> 1.5), or None for a zero denominator."""
+    total = 0.0
+    for part in text.split():
+        if "/" in part:
+            numerator, denominator = part.split("/")
+            if float(denominator) == 0:
+                return None
+            total += float(numerator) / float(denominator)
+        else:
+            total += float(part)
+    return total
+
+
+def _normalize_unit(unit: str) -> str:
+    unit = unit.lower().strip().rstrip(".")
+    unit = re.sub(r"\(.*?\)", "", unit).strip()
+    # Only the first word or two are the unit ("cups chopped" -> "cup")
+    words = unit.split()
+    if len(words) >= 2 and f"{words[0]} {words[1]}" in UNITS:
+        return f"{words[0]} {words[1]}"
+    word = words[0] if words else ""
+    if word in UNITS or word in COUNT_UNITS:
+        return word
+    singular = word[:-2] if word.endswith("es") and word[:-2] in COUNT_UNITS else word[:-1] if word.endswith("s") else word
+    if singular in UNITS or singular in COUNT_UNITS:
+        return singular
+    # Anything else ("2 large", "3 ripe") describes the item, so it's a plain count
+    return ""
+
+
+def parse_amount(amount) -> Tuple[Optional[float], str]:
+    """
+    Parse a free-text amount.
+
+    Args:
+        amount: e.g. "1 1/2 cups", "200g", "2-3 cloves", "½ tsp", "to taste", 3
+
+    Returns:
+        (quantity or None when unspecified, normalized unit string); ranges
+        use their upper bound so shopping lists never come up short
+    """
+    if isinstance(amount, (int, float)):
+        return float(amount), ""
+    text = str(amount or "").strip()
+    for symbol, value in FRACTIONS.items():
+        text = re.sub(rf"(\d)\s*{symbol}", rf"\1 {value}", text)
+        text = text.replace(symbol, value)
+    text = re.sub(r"^an?\s+", "1 ", text, flags=re.IGNORECASE)
+    match = _AMOUNT.match(text)
+    quantity = _to_number(match.group("upper") or match.group("qty")) if match else None
+    if quantity is None:
+        return None, _normalize_unit(text)
+    return quantity, _normalize_unit(match.group("unit"))
+
+
+def ingredient_amount(ingredient) -> Tuple[str, str]:
+    """(name, amount text) from a generated ({name, amount}) or corpus ({name, qty, unit}) ingredient."""
+    if isinstance(ingredient, str):
+        return ingredient, ""
+    name = str(ingredient.get("name") or "")
+    if "qty" in ingredient:
+        return name, f"{ingredient.get('qty', '')} {ingredient.get('unit', '')}".strip()
+    amount = ingredient.get("amount")
+    return name, "" if amount is None else str(amount)
+
+
+def to_base(quantity: Optional[float], unit: str) -> Tuple[str, Optional[float], str]:
+    """
+    Convert a quantity to its dimension's base unit.
+
+    Returns:
+        (dimension, quantity in base unit, base unit name) - count units are
+        their own dimension, e.g. ("count:clove", 3.0, "clove")
+    """
+    if unit in UNITS:
+        dimension, factor = UNITS[unit]
+        return dimension, None if quantity is None else quantity * factor, BASE_UNITS[dimension]
+    count_unit = COUNT_UNITS.get(unit, unit)
+    return f"count:{count_unit}", quantity, count_unit
+
+
+def split_ingredient(name: str) -> Tuple[str, str]:
+    """
+    Canonical ingredient key plus any unit word written into the name
+    ("Garlic cloves" -> ("garlic", "clove"), "Fresh Tomatoes, diced" -> ("tomato", "")).
+    """
+    name = re.sub(r"\(.*?\)", "", name.split(",")[0])
+    words = [word for word in normalize_name(name).split() if word not in DESCRIPTORS]
+    # "garlic cloves" / "celery stalks" -> the ingredient, not its unit
+    unit = ""
+    if len(words) > 1 and words[-1] in NAME_UNIT_SUFFIXES:
+        unit = words.pop()
+    key = " ".join(words)
+    return ALIASES.get(key, key), unit
+
+
+def canonical_ingredient(name: str) -> str:
+    """Canonical ingredient key ("Fresh Tomatoes, diced" -> "tomato")."""
+    return split_ingredient(name)[0]
@@ -14,8 +14,8 @@ export const AuthProvider = ({ children }) => {
         }
     });
     
-    // Mock token for API calls
-    const [token] = useState('mock-token');
+    // No real token: API calls go unauthenticated (the backend rejects invalid tokens)
+    const [token] = useState(null);
     const [loading] = useState(false);
 
     // Mock update preferences function
@@ -18,6 +18,7 @@ import VintageRecipeCard from '../components/VintageRecipeCard';
 
 const ExpiryRecommendations = () => {
   const { token } = useAuth();
+  const authHeaders = token ? { 'Authorization': `Bearer ${token}` } : {};
   const [items, setItems] = useState([]);
   const [loading, setLoading] = useState(true);
   const [selectedItems, setSelectedItems] = useState([]);
@@ -34,9 +35,7 @@ const ExpiryRecommendations = () => {
   const fetchExpiringItems = async () => {
     try {
       const response = await fetch(api.expiryItems, {
-        headers: {
-          'Authorization': `Bearer ${token}`
-        }
+        headers: authHeaders
       });
       
       if (!response.ok) {
@@ -85,7 +84,7 @@ const ExpiryRecommendations = () => {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
-          'Authorization': `Bearer ${token}`
+          ...authHeaders
         },
         body: JSON.stringify({ item_ids: selectedItems })
       });
@@ -110,9 +109,7 @@ const ExpiryRecommendations = () => {
     try {
       const response = await fetch(api.expiryItemAdvice(itemId), {
         method: 'POST',
-        headers: {
-          'Authorization': `Bearer ${token}`
-        }
+        headers: authHeaders
       });
       const data = await response.json();
       setSelectedAdvice({